@@ -0,0 +1,585 @@
+# Esse arquivo contém os benchmarks das funções utilizadas nos experimentos de algoritmos genéticos
+# Para rodar: python benchmark.py
+#   python benchmark.py --salva base.json        salva os resultados como referência
+#   python benchmark.py --compara base.json      compara com a referência e aponta regressões
+#   python benchmark.py --cruzamento-ordenado    compara só as versões do cruzamento ordenado
+
+#---------------------------------
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+
+import numpy as np
+
+import funcoes as f
+from classes import ProblemaCaixeiro
+from classes import ProblemaLigaTernaria
+from classes import ProblemaMochila
+from constantes import preco as PRECO
+from funcoes import cruzamento_ordenado
+from funcoes import cruzamento_ordenado_np
+from funcoes import cruzamento_ordenado_pop
+from funcoes import cruzamento_pmx
+from funcoes import cruzamento_ciclico
+#---------------------------------
+
+###############################################################################
+#                           Cruzamentos do caixeiro                           #
+###############################################################################
+
+def tempo_por_chamada(funcao, repeticoes=5):
+    """Mede o menor tempo médio de uma chamada de `funcao`.
+
+    Args:
+      funcao: função sem argumentos a ser medida.
+      repeticoes: número de repetições da medição.
+
+    Returns:
+      Tempo em segundos de uma chamada (o melhor entre as repetições).
+    """
+    timer = timeit.Timer(funcao)
+    numero, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeticoes, number=numero)) / numero
+
+
+def amostras_de_tempo(funcao, repeticoes=9):
+    """Mede o tempo médio de uma chamada de `funcao` em várias repetições.
+
+    Cada repetição faz chamadas suficientes para levar cerca de 0,1 s, então
+    `repeticoes` amostras custam em torno de `repeticoes / 10` segundos.
+
+    Args:
+      funcao: função sem argumentos a ser medida.
+      repeticoes: número de amostras.
+
+    Returns:
+      Array com o tempo em segundos de uma chamada em cada repetição.
+    """
+    timer = timeit.Timer(funcao)
+    numero, _ = timer.autorange()
+    numero = max(1, numero // 2)
+    return np.array(timer.repeat(repeat=repeticoes, number=numero)) / numero
+
+
+def benchmark_cruzamento_ordenado(tamanhos=(10, 50, 100, 500, 1000, 2000), num_pares=50):
+    """Compara o cruzamento ordenado original com as versões em tempo linear.
+
+    Args:
+      tamanhos: comprimentos de caminho (número de cidades) a serem testados.
+      num_pares: número de pares de pais usados na versão em lote.
+
+    Returns:
+      Lista de dicionários com o tempo por par de pais (em segundos) de cada
+      implementação para cada comprimento de caminho.
+    """
+    rng = np.random.default_rng(0)
+    resultados = []
+
+    for n in tamanhos:
+        populacao = rng.permuted(np.tile(np.arange(n), (2 * num_pares, 1)), axis=1)
+        pai, mae = populacao[0], populacao[1]
+        pai_lista, mae_lista = pai.tolist(), mae.tolist()
+
+        resultado = {
+            "numero_genes": n,
+            "cruzamento_ordenado": tempo_por_chamada(
+                lambda: cruzamento_ordenado(pai_lista, mae_lista)
+            ),
+            "cruzamento_ordenado_np": tempo_por_chamada(
+                lambda: cruzamento_ordenado_np(pai, mae, rng)
+            ),
+            "cruzamento_ordenado_pop": tempo_por_chamada(
+                lambda: cruzamento_ordenado_pop(populacao.copy(), 1.0, rng)
+            ) / num_pares,
+            "cruzamento_pmx": tempo_por_chamada(lambda: cruzamento_pmx(pai, mae, rng)),
+            "cruzamento_ciclico": tempo_por_chamada(lambda: cruzamento_ciclico(pai, mae)),
+        }
+        resultados.append(resultado)
+
+    return resultados
+
+
+def imprime_tabela(resultados):
+    """Imprime uma lista de resultados como uma tabela de tempos em microssegundos."""
+    colunas = list(resultados[0].keys())
+    print(" | ".join(f"{coluna:>24}" for coluna in colunas))
+    for resultado in resultados:
+        celulas = [f"{resultado[colunas[0]]:>24}"]
+        celulas += [f"{resultado[coluna] * 1e6:>21.1f} us" for coluna in colunas[1:]]
+        print(" | ".join(celulas))
+
+
+###############################################################################
+#                         Casos de teste por problema                         #
+###############################################################################
+# Cada função abaixo monta os casos de um problema para um tamanho de população
+# e um número de genes. Um caso é uma tupla (tipo, nome, chamada), onde `tipo`
+# é "populacao", "objetivo", "selecao", "cruzamento" ou "mutacao" e `chamada` é
+# uma função sem argumentos que processa a população inteira uma vez.
+# Cruzamentos e mutações são medidos com chance 1, ou seja, todos os indivíduos
+# passam pelo operador. Quando o mesmo operador é medido em duas populações de
+# um problema, a população vai entre parênteses no nome do caso.
+# As funções de um único gene ou indivíduo (gene_*, individuo_*, e as
+# funcao_objetivo_* sem _pop, como computa_mochila) não têm casos próprios:
+# elas são medidas dentro das versões de população que as chamam.
+
+LETRAS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def _casos_selecao(populacao, fitness, minimizacao, rng):
+    """Casos das funções de seleção, que são comuns a todos os problemas."""
+    fitness_lista = list(fitness)
+    fitness_np = np.asarray(fitness, dtype=float)
+    torneio = f.selecao_torneio_min if minimizacao else f.selecao_torneio_max
+    torneio_np = f.selecao_torneio_min_np if minimizacao else f.selecao_torneio_max_np
+    casos = [
+        ("selecao", torneio.__name__, lambda: torneio(populacao, fitness_lista)),
+        ("selecao", torneio_np.__name__, lambda: torneio_np(fitness_np, rng=rng)),
+        ("selecao", "selecao_ranking",
+         lambda: f.selecao_ranking(fitness_np, minimizacao=minimizacao, rng=rng)),
+    ]
+    if not minimizacao:
+        casos += [
+            ("selecao", "selecao_roleta_max", lambda: f.selecao_roleta_max(populacao, fitness_lista)),
+            ("selecao", "selecao_roleta_max_np", lambda: f.selecao_roleta_max_np(fitness_np, rng=rng)),
+            ("selecao", "selecao_amostragem_universal",
+             lambda: f.selecao_amostragem_universal(fitness_np, rng=rng)),
+        ]
+    return casos
+
+
+def _cruza_pares(funcao_cruzamento, populacao):
+    """Cruza os pares (0, 1), (2, 3), ... de uma população em lista."""
+    for i in range(0, len(populacao) - 1, 2):
+        funcao_cruzamento(populacao[i], populacao[i + 1])
+
+
+def casos_caixas(tamanho_populacao, numero_genes, rng):
+    """Casos dos problemas das caixas binárias e não binárias."""
+    valor_max = 10
+    pop_cb = f.populacao_cb(tamanho_populacao, numero_genes)
+    pop_cb_np = f.populacao_cb_np(tamanho_populacao, numero_genes, rng)
+    pop_cnb = f.populacao_cnb(tamanho_populacao, numero_genes, valor_max)
+    pop_cnb_np = f.populacao_cnb_np(tamanho_populacao, numero_genes, valor_max, rng)
+
+    casos = [
+        ("populacao", "populacao_cb", lambda: f.populacao_cb(tamanho_populacao, numero_genes)),
+        ("populacao", "populacao_cb_np",
+         lambda: f.populacao_cb_np(tamanho_populacao, numero_genes, rng)),
+        ("populacao", "populacao_cnb",
+         lambda: f.populacao_cnb(tamanho_populacao, numero_genes, valor_max)),
+        ("populacao", "populacao_cnb_np",
+         lambda: f.populacao_cnb_np(tamanho_populacao, numero_genes, valor_max, rng)),
+        ("objetivo", "funcao_objetivo_pop_cb", lambda: f.funcao_objetivo_pop_cb(pop_cb)),
+        ("objetivo", "funcao_objetivo_pop_cb_np", lambda: f.funcao_objetivo_pop_cb_np(pop_cb_np)),
+        ("objetivo", "funcao_objetivo_pop_cnb", lambda: f.funcao_objetivo_pop_cnb(pop_cnb)),
+        ("objetivo", "funcao_objetivo_pop_cnb_np",
+         lambda: f.funcao_objetivo_pop_cnb_np(pop_cnb_np)),
+        ("cruzamento", "cruzamento_ponto_simples",
+         lambda: _cruza_pares(f.cruzamento_ponto_simples, pop_cb)),
+        ("cruzamento", "cruzamento_ponto_simples_np",
+         lambda: f.cruzamento_ponto_simples_np(pop_cb_np, 1.0, rng)),
+        ("cruzamento", "cruzamento_ponto_simples (cnb)",
+         lambda: _cruza_pares(f.cruzamento_ponto_simples, pop_cnb)),
+        ("cruzamento", "cruzamento_ponto_simples_np (cnb)",
+         lambda: f.cruzamento_ponto_simples_np(pop_cnb_np, 1.0, rng)),
+        ("mutacao", "mutacao_cb", lambda: [f.mutacao_cb(individuo) for individuo in pop_cb]),
+        ("mutacao", "mutacao_cb_np", lambda: f.mutacao_cb_np(pop_cb_np, 1.0, rng)),
+        ("mutacao", "mutacao_cnb",
+         lambda: [f.mutacao_cnb(individuo, valor_max) for individuo in pop_cnb]),
+        ("mutacao", "mutacao_cnb_np", lambda: f.mutacao_cnb_np(pop_cnb_np, 1.0, valor_max, rng)),
+    ]
+    return casos + _casos_selecao(pop_cb, f.funcao_objetivo_pop_cb(pop_cb), False, rng)
+
+
+def casos_senha(tamanho_populacao, numero_genes, rng):
+    """Casos do problema da senha (a senha tem `numero_genes` letras)."""
+    senha = "".join(rng.choice(list(LETRAS), numero_genes))
+    senha_np = f.codifica_senha(senha)
+    letras_np = f.codifica_senha(LETRAS)
+    pop = f.populacao_inicial_senha(tamanho_populacao, numero_genes, LETRAS)
+    pop_np = f.populacao_inicial_senha_np(tamanho_populacao, numero_genes, letras_np, rng)
+
+    casos = [
+        ("populacao", "populacao_inicial_senha",
+         lambda: f.populacao_inicial_senha(tamanho_populacao, numero_genes, LETRAS)),
+        ("populacao", "populacao_inicial_senha_np",
+         lambda: f.populacao_inicial_senha_np(tamanho_populacao, numero_genes, letras_np, rng)),
+        ("objetivo", "funcao_objetivo_pop_senha", lambda: f.funcao_objetivo_pop_senha(pop, senha)),
+        ("objetivo", "funcao_objetivo_pop_senha_np",
+         lambda: f.funcao_objetivo_pop_senha_np(pop_np, senha_np)),
+        ("cruzamento", "cruzamento_ponto_simples",
+         lambda: _cruza_pares(f.cruzamento_ponto_simples, pop)),
+        ("mutacao", "mutacao_senha", lambda: [f.mutacao_senha(individuo, LETRAS) for individuo in pop]),
+        ("mutacao", "mutacao_senha_np", lambda: f.mutacao_senha_np(pop_np, 1.0, letras_np, rng)),
+    ]
+    return casos + _casos_selecao(pop, f.funcao_objetivo_pop_senha(pop, senha), True, rng)
+
+
+def casos_caixeiro(tamanho_populacao, numero_genes, rng):
+    """Casos do problema do caixeiro viajante (`numero_genes` cidades)."""
+    cidades = f.cria_cidades(numero_genes)
+    problema = ProblemaCaixeiro(cidades)
+    pop = f.populacao_inicial_cv(tamanho_populacao, cidades)
+    pop_np = problema.populacao_inicial(tamanho_populacao, rng)
+    pop_np_listas = list(pop_np)
+    # as mutações por indivíduo trocam o caminho no próprio array, e um
+    # caminho mutado continua válido para a próxima repetição
+    pop_mutacao = [individuo.copy() for individuo in pop_np]
+    problema.vizinhos()  # a lista de vizinhos é calculada uma vez, fora da medição
+
+    casos = [
+        ("populacao", "populacao_inicial_cv", lambda: f.populacao_inicial_cv(tamanho_populacao, cidades)),
+        ("populacao", "ProblemaCaixeiro.populacao_inicial",
+         lambda: problema.populacao_inicial(tamanho_populacao, rng)),
+        ("objetivo", "funcao_objetivo_pop_cv", lambda: f.funcao_objetivo_pop_cv(pop, cidades)),
+        ("objetivo", "ProblemaCaixeiro.funcao_objetivo_pop", lambda: problema.funcao_objetivo_pop(pop_np)),
+        ("cruzamento", "cruzamento_ordenado", lambda: _cruza_pares(f.cruzamento_ordenado, pop)),
+        ("cruzamento", "cruzamento_ordenado_np",
+         lambda: _cruza_pares(lambda pai, mae: f.cruzamento_ordenado_np(pai, mae, rng), pop_np_listas)),
+        ("cruzamento", "cruzamento_ordenado_pop",
+         lambda: f.cruzamento_ordenado_pop(pop_np.copy(), 1.0, rng)),
+        ("cruzamento", "cruzamento_pmx",
+         lambda: _cruza_pares(lambda pai, mae: f.cruzamento_pmx(pai, mae, rng), pop_np_listas)),
+        ("cruzamento", "cruzamento_ciclico", lambda: _cruza_pares(f.cruzamento_ciclico, pop_np_listas)),
+        ("mutacao", "mutacao_de_troca", lambda: [f.mutacao_de_troca(individuo) for individuo in pop]),
+        ("mutacao", "ProblemaCaixeiro.mutacao_de_troca",
+         lambda: [problema.mutacao_de_troca(individuo, rng) for individuo in pop_mutacao]),
+        ("mutacao", "ProblemaCaixeiro.mutacao_2opt",
+         lambda: [problema.mutacao_2opt(individuo, rng) for individuo in pop_mutacao]),
+        ("mutacao", "ProblemaCaixeiro.mutacao_2opt_vizinhos",
+         lambda: [problema.mutacao_2opt_vizinhos(individuo, rng) for individuo in pop_mutacao]),
+        ("mutacao", "ProblemaCaixeiro.mutacao_de_troca_pop",
+         lambda: problema.mutacao_de_troca_pop(pop_np.copy(), 1.0, rng)),
+    ]
+    return casos + _casos_selecao(pop, f.funcao_objetivo_pop_cv(pop, cidades), True, rng)
+
+
+def casos_mochila(tamanho_populacao, numero_genes, rng):
+    """Casos do problema da mochila (`numero_genes` objetos)."""
+    objetos = {
+        f"objeto {i}": {"valor": int(valor), "peso": int(peso)}
+        for i, (valor, peso) in enumerate(rng.integers(1, 100, (numero_genes, 2)))
+    }
+    limite = sum(objeto["peso"] for objeto in objetos.values()) // 2
+    ordem_dos_nomes = list(objetos)
+    problema = ProblemaMochila(objetos, limite, ordem_dos_nomes)
+    pop = f.populacao_cb(tamanho_populacao, numero_genes)
+    pop_np = problema.populacao_inicial(tamanho_populacao, rng)
+
+    casos = [
+        ("populacao", "populacao_cb", lambda: f.populacao_cb(tamanho_populacao, numero_genes)),
+        ("populacao", "ProblemaMochila.populacao_inicial",
+         lambda: problema.populacao_inicial(tamanho_populacao, rng)),
+        ("objetivo", "funcao_objetivo_pop_mochila",
+         lambda: f.funcao_objetivo_pop_mochila(pop, objetos, limite, ordem_dos_nomes)),
+        ("objetivo", "ProblemaMochila.funcao_objetivo_pop", lambda: problema.funcao_objetivo_pop(pop_np)),
+        ("cruzamento", "cruzamento_ponto_simples",
+         lambda: _cruza_pares(f.cruzamento_ponto_simples, pop)),
+        ("cruzamento", "cruzamento_ponto_simples_np",
+         lambda: f.cruzamento_ponto_simples_np(pop_np.copy(), 1.0, rng)),
+        ("mutacao", "mutacao_cb", lambda: [f.mutacao_cb(individuo) for individuo in pop]),
+        ("mutacao", "mutacao_cb_np", lambda: f.mutacao_cb_np(pop_np.copy(), 1.0, rng)),
+    ]
+    fitness = f.funcao_objetivo_pop_mochila(pop, objetos, limite, ordem_dos_nomes)
+    return casos + _casos_selecao(pop, fitness, False, rng)
+
+
+def casos_liga(tamanho_populacao, numero_genes, rng):
+    """Casos do problema da liga ternária.
+
+    O genoma da liga tem sempre o tamanho da tabela de preços, então
+    `numero_genes` é ignorado. Mede as funções `*_lt` (ligas em listas de
+    massas) e a `ProblemaLigaTernaria` (ligas esparsas).
+    """
+    problema = ProblemaLigaTernaria()
+    pop = problema.populacao_inicial(tamanho_populacao, rng)
+    num_elementos = len(PRECO)
+    pop_lt = f.populacao_inicial_lt(tamanho_populacao, num_elementos, PRECO)
+
+    casos = [
+        ("populacao", "populacao_inicial_lt",
+         lambda: f.populacao_inicial_lt(tamanho_populacao, num_elementos, PRECO)),
+        ("objetivo", "funcao_objetivo_pop_lt", lambda: f.funcao_objetivo_pop_lt(pop_lt, PRECO)),
+        ("cruzamento", "cruzamento_ordenado_lt",
+         lambda: _cruza_pares(lambda pai, mae: f.cruzamento_ordenado_lt(pai, mae, num_elementos), pop_lt)),
+        ("mutacao", "mutacao_troca_lt", lambda: [f.mutacao_troca_lt(individuo) for individuo in pop_lt]),
+        ("populacao", "ProblemaLigaTernaria.populacao_inicial",
+         lambda: problema.populacao_inicial(tamanho_populacao, rng)),
+        ("objetivo", "ProblemaLigaTernaria.funcao_objetivo_pop", lambda: problema.funcao_objetivo_pop(pop)),
+        ("cruzamento", "ProblemaLigaTernaria.cruzamento_pop",
+         lambda: problema.cruzamento_pop(pop.copy(), 1.0, rng)),
+        ("mutacao", "ProblemaLigaTernaria.mutacao_pop", lambda: problema.mutacao_pop(pop.copy(), 1.0, rng)),
+    ]
+    return casos + _casos_selecao(list(pop), problema.funcao_objetivo_pop(pop), False, rng)
+
+
+PROBLEMAS = {
+    "caixas": casos_caixas,
+    "senha": casos_senha,
+    "caixeiro": casos_caixeiro,
+    "mochila": casos_mochila,
+    "liga": casos_liga,
+}
+
+
+###############################################################################
+#                         Suíte completa e regressões                         #
+###############################################################################
+
+def pico_de_memoria(funcao):
+    """Pico de memória (em bytes) alocada durante uma chamada de `funcao`.
+
+    A medição usa o tracemalloc, que também enxerga os arrays do NumPy. Ela é
+    feita separada da medição de tempo, pois o tracemalloc deixa tudo mais
+    lento.
+    """
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        funcao()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def executa_suite(
+    tamanhos_populacao=(100, 1000),
+    numeros_genes=(10, 100),
+    problemas=tuple(PROBLEMAS),
+    repeticoes=9,
+    semente=0,
+):
+    """Mede todas as funções de todos os problemas em uma grade de tamanhos.
+
+    Args:
+      tamanhos_populacao: tamanhos de população a serem testados.
+      numeros_genes: números de genes (comprimento do genoma) a serem testados.
+      problemas: nomes dos problemas (chaves de `PROBLEMAS`).
+      repeticoes: número de amostras de cada medição de tempo.
+      semente: semente dos sorteios, para todas as execuções medirem as mesmas
+        populações.
+
+    Returns:
+      Lista de dicionários, um por função e tamanho, com o tempo de uma
+      chamada (mediana das amostras, e o primeiro e o terceiro quartis em
+      `tempo_q1` e `tempo_q3`), a vazão (indivíduos por segundo e, para funções objetivo,
+      avaliações por segundo) e o pico de memória.
+    """
+    resultados = []
+    for problema in problemas:
+        for tamanho_populacao in tamanhos_populacao:
+            for numero_genes in numeros_genes:
+                if problema == "liga" and numero_genes != numeros_genes[0]:
+                    continue  # o genoma da liga não depende de numero_genes
+                random.seed(semente)
+                rng = np.random.default_rng(semente)
+                for tipo, nome, chamada in PROBLEMAS[problema](tamanho_populacao, numero_genes, rng):
+                    q1, tempo, q3 = np.percentile(amostras_de_tempo(chamada, repeticoes), (25, 50, 75))
+                    resultado = {
+                        "problema": problema,
+                        "tipo": tipo,
+                        "funcao": nome,
+                        "tamanho_populacao": tamanho_populacao,
+                        "numero_genes": numero_genes,
+                        "tempo": tempo,
+                        "tempo_q1": q1,
+                        "tempo_q3": q3,
+                        "individuos_por_segundo": tamanho_populacao / tempo,
+                        "pico_memoria": pico_de_memoria(chamada),
+                    }
+                    if tipo == "objetivo":
+                        resultado["avaliacoes_por_segundo"] = tamanho_populacao / tempo
+                    resultados.append(resultado)
+    return resultados
+
+
+def _mede_casos(chaves, repeticoes, semente):
+    """Tempo (q1, mediana, q3) dos casos de `chaves`, montados com `semente`."""
+    por_grupo = {}
+    for problema, funcao, tamanho_populacao, numero_genes in chaves:
+        por_grupo.setdefault((problema, tamanho_populacao, numero_genes), set()).add(funcao)
+    tempos = {}
+    for (problema, tamanho_populacao, numero_genes), funcoes in por_grupo.items():
+        random.seed(semente)
+        rng = np.random.default_rng(semente)
+        for _, nome, chamada in PROBLEMAS[problema](tamanho_populacao, numero_genes, rng):
+            if nome in funcoes:
+                amostras = amostras_de_tempo(chamada, repeticoes)
+                chave = (problema, nome, tamanho_populacao, numero_genes)
+                tempos[chave] = tuple(np.percentile(amostras, (25, 50, 75)))
+    return tempos
+
+
+def remede(resultados, repeticoes=9, semente=0):
+    """Mede de novo o tempo de alguns resultados da suíte, no próprio lugar.
+
+    A medição é feita em um processo Python novo: o mesmo código medido em
+    dois processos pode variar 20% ou mais (alinhamento de memória, carga da
+    máquina), uma variação que os quartis de uma única execução não mostram.
+    Cada resultado fica com a medição de menor mediana entre a antiga e a
+    nova, então uma regressão só se confirma se aparecer nas duas.
+    """
+    chaves = [_chave(resultado) for resultado in resultados]
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        tempos = pool.apply(_mede_casos, (chaves, repeticoes, semente))
+    for resultado in resultados:
+        q1, tempo, q3 = tempos[_chave(resultado)]
+        if tempo < resultado["tempo"]:
+            tamanho_populacao = resultado["tamanho_populacao"]
+            resultado.update(tempo=tempo, tempo_q1=q1, tempo_q3=q3)
+            resultado["individuos_por_segundo"] = tamanho_populacao / tempo
+            if "avaliacoes_por_segundo" in resultado:
+                resultado["avaliacoes_por_segundo"] = tamanho_populacao / tempo
+
+
+def _chave(resultado):
+    return (
+        resultado["problema"],
+        resultado["funcao"],
+        resultado["tamanho_populacao"],
+        resultado["numero_genes"],
+    )
+
+
+def salva_resultados(resultados, caminho):
+    """Salva os resultados da suíte em JSON, junto com a descrição da máquina."""
+    dados = {
+        "data": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "processador": platform.processor(),
+        "resultados": resultados,
+    }
+    with open(caminho, "w") as arquivo:
+        json.dump(dados, arquivo, indent=1)
+
+
+def carrega_resultados(caminho):
+    """Lê os resultados salvos por `salva_resultados`."""
+    with open(caminho) as arquivo:
+        return json.load(arquivo)["resultados"]
+
+
+def compara_resultados(atuais, referencia, tolerancia=0.2, piso_tempo=20e-6, piso_memoria=4096):
+    """Compara os resultados atuais com uma referência salva anteriormente.
+
+    Um caso só é uma regressão de tempo quando as três condições valem: a
+    mediana piorou mais do que `tolerancia`, os intervalos entre os quartis
+    das duas execuções não se sobrepõem (o primeiro quartil atual está acima
+    do terceiro quartil da referência) e a diferença das medianas passa de
+    `piso_tempo`. Assim, o ruído da medição de funções que levam poucos
+    microssegundos não é confundido com uma regressão.
+
+    Args:
+      atuais: resultados de `executa_suite`.
+      referencia: resultados de uma execução anterior.
+      tolerancia: aumento relativo de tempo ou de memória aceito antes de o
+        caso ser considerado uma regressão (0.2 = 20% pior).
+      piso_tempo: aumento absoluto de tempo (em segundos) abaixo do qual o
+        caso nunca é uma regressão.
+      piso_memoria: aumento absoluto do pico de memória (em bytes) abaixo do
+        qual o caso nunca é uma regressão.
+
+    Returns:
+      Lista de dicionários, um por caso presente nas duas execuções, com a
+      razão entre os tempos (atual / referência), a razão entre os picos de
+      memória e se houve regressão.
+    """
+    por_chave = {_chave(resultado): resultado for resultado in referencia}
+    comparacoes = []
+    for atual in atuais:
+        anterior = por_chave.get(_chave(atual))
+        if anterior is None:
+            continue
+        razao_tempo = atual["tempo"] / anterior["tempo"]
+        razao_memoria = (atual["pico_memoria"] + 1) / (anterior["pico_memoria"] + 1)
+        # referências antigas não têm os quartis
+        separados = atual.get("tempo_q1", atual["tempo"]) > anterior.get("tempo_q3", anterior["tempo"])
+        regressao_tempo = (
+            razao_tempo > 1 + tolerancia
+            and separados
+            and atual["tempo"] - anterior["tempo"] > piso_tempo
+        )
+        regressao_memoria = (
+            razao_memoria > 1 + tolerancia
+            and atual["pico_memoria"] - anterior["pico_memoria"] > piso_memoria
+        )
+        comparacoes.append({
+            "problema": atual["problema"],
+            "funcao": atual["funcao"],
+            "tamanho_populacao": atual["tamanho_populacao"],
+            "numero_genes": atual["numero_genes"],
+            "razao_tempo": razao_tempo,
+            "razao_memoria": razao_memoria,
+            "regressao": regressao_tempo or regressao_memoria,
+        })
+    return comparacoes
+
+
+def imprime_suite(resultados):
+    """Imprime os resultados da suíte como uma tabela."""
+    print(f"{'problema':>9} | {'função':>42} | {'pop':>6} | {'genes':>6} | "
+          f"{'tempo':>12} | {'indivíduos/s':>14} | {'memória':>10}")
+    for r in resultados:
+        print(f"{r['problema']:>9} | {r['funcao']:>42} | {r['tamanho_populacao']:>6} | "
+              f"{r['numero_genes']:>6} | {r['tempo'] * 1e6:>9.1f} us | "
+              f"{r['individuos_por_segundo']:>14.0f} | {r['pico_memoria'] / 1024:>7.1f} KB")
+
+
+def imprime_comparacao(comparacoes):
+    """Imprime a comparação com a referência, marcando as regressões."""
+    print(f"{'problema':>9} | {'função':>42} | {'pop':>6} | {'genes':>6} | "
+          f"{'tempo':>7} | {'memória':>7}")
+    for c in comparacoes:
+        marca = "  <-- REGRESSÃO" if c["regressao"] else ""
+        print(f"{c['problema']:>9} | {c['funcao']:>42} | {c['tamanho_populacao']:>6} | "
+              f"{c['numero_genes']:>6} | {c['razao_tempo']:>6.2f}x | {c['razao_memoria']:>6.2f}x{marca}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark das funções de funcoes.py")
+    parser.add_argument("--populacoes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--genes", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--problemas", nargs="+", choices=list(PROBLEMAS), default=list(PROBLEMAS))
+    parser.add_argument("--repeticoes", type=int, default=9)
+    parser.add_argument("--salva", metavar="ARQUIVO", help="salva os resultados em JSON")
+    parser.add_argument("--compara", metavar="ARQUIVO", help="compara com resultados salvos")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    parser.add_argument("--piso-tempo", type=float, default=20e-6,
+                        help="aumento de tempo (s) abaixo do qual não há regressão")
+    parser.add_argument("--confirmacoes", type=int, default=2,
+                        help="quantas vezes os casos com regressão são medidos de novo, "
+                             "cada vez em um processo novo")
+    parser.add_argument("--cruzamento-ordenado", action="store_true",
+                        help="executa apenas a comparação dos cruzamentos ordenados")
+    args = parser.parse_args()
+
+    if args.cruzamento_ordenado:
+        imprime_tabela(benchmark_cruzamento_ordenado())
+        sys.exit()
+
+    resultados = executa_suite(args.populacoes, args.genes, args.problemas, args.repeticoes)
+    imprime_suite(resultados)
+    if args.salva:
+        salva_resultados(resultados, args.salva)
+    if args.compara:
+        referencia = carrega_resultados(args.compara)
+        comparacoes = compara_resultados(resultados, referencia, args.tolerancia, args.piso_tempo)
+        for _ in range(args.confirmacoes):
+            suspeitos = {_chave(c) for c in comparacoes if c["regressao"]}
+            if not suspeitos:
+                break
+            remede([r for r in resultados if _chave(r) in suspeitos], args.repeticoes)
+            comparacoes = compara_resultados(resultados, referencia, args.tolerancia, args.piso_tempo)
+        print()
+        imprime_comparacao(comparacoes)
+        if any(c["regressao"] for c in comparacoes):
+            sys.exit(1)
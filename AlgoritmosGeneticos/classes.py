@@ -1 +1,2306 @@
- 
+# Esse arquivo contém as classes utilizadas nos experimentos de algoritmos genéticos
+# As funções que operam sobre indivíduos e populações continuam em funcoes.py;
+# aqui ficam os objetos que organizam essas funções (o motor do algoritmo, os problemas etc.).
+
+#---------------------------------
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from collections import OrderedDict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+
+import numpy as np
+
+import funcoes
+from constantes import preco as PRECO
+from funcoes import _gerador
+from funcoes import populacao_cb_np
+from referencia_cv import dois_opt_vizinhos
+from referencia_cv import vizinho_mais_proximo_candidatos
+from referencia_cv import vizinhos_mais_proximos
+#---------------------------------
+
+###############################################################################
+#                        Motor do algoritmo genético                          #
+###############################################################################
+
+
+def _retorna_delta(funcao):
+    """Marca um operador de mutação que retorna também a variação da fitness.
+
+    O `AlgoritmoGenetico` usa a marca para recusar o operador quando
+    `mutacao_com_delta` não foi ligado.
+    """
+    funcao.retorna_delta = True
+    return funcao
+
+
+class AlgoritmoGenetico:
+    """Motor genérico do laço seleção -> cruzamento -> mutação.
+
+    Substitui o laço que era copiado em cada notebook. O motor recebe as mesmas
+    funções de `funcoes.py` (população, função objetivo, seleção, cruzamento e
+    mutação) e guarda a fitness de cada indivíduo da população. A cada geração
+    apenas os filhos que de fato foram alterados pelo cruzamento ou pela
+    mutação são avaliados novamente, então a função objetivo é chamada uma
+    única vez por geração e só para quem mudou.
+
+    Args:
+      populacao: população inicial (lista de indivíduos).
+      funcao_objetivo_pop: função que recebe uma lista de indivíduos e retorna
+        uma lista com a fitness de cada um deles.
+      funcao_selecao: função de seleção no formato `f(populacao, fitness)`,
+        como `selecao_torneio_min` ou `selecao_roleta_max`.
+      funcao_cruzamento: função no formato `f(pai, mae)` que retorna dois filhos.
+      funcao_mutacao: função no formato `f(individuo)` que retorna o indivíduo
+        mutado.
+      chance_cruzamento: probabilidade de cada par de pais cruzar.
+      chance_mutacao: probabilidade de cada indivíduo sofrer mutação.
+      minimizacao: `True` para problemas de minimização e `False` para
+        problemas de maximização.
+      operadores_em_lote: quando `True`, a população é um array NumPy com um
+        indivíduo por linha e os operadores trabalham na população inteira:
+        `funcao_cruzamento(populacao, chance_cruzamento)` e
+        `funcao_mutacao(populacao, chance_mutacao)` devem retornar a nova
+        população e um array booleano com os indivíduos alterados (por
+        exemplo `cruzamento_ponto_simples_np` e `mutacao_cb_np`).
+      mutacao_com_delta: quando `True`, a mutação também retorna a variação da
+        fitness causada por ela (ver `ProblemaCaixeiro.mutacao_de_troca`). A
+        fitness guardada é atualizada somando essa variação, sem chamar a
+        função objetivo. Em lote, a mutação retorna a população, os alterados
+        e um array com a variação de cada indivíduo. Operadores que retornam
+        a variação (marcados com `_retorna_delta`) são recusados sem essa
+        opção.
+      selecao_por_indices: quando `True`, a seleção tem o formato
+        `f(fitness)` e retorna um array com as posições dos selecionados
+        (por exemplo `selecao_torneio_min_np`).
+      busca_local: função opcional `f(individuo, prazo)` que melhora um
+        indivíduo e retorna o indivíduo melhorado e a variação da fitness
+        (por exemplo `ProblemaCaixeiro.busca_local_2opt`). Quando informada,
+        o algoritmo vira um algoritmo memético: a cada geração os
+        `num_busca_local` melhores filhos passam pela busca local.
+      num_busca_local: quantos filhos passam pela busca local por geração.
+      tempo_busca_local: tempo máximo (em segundos) gasto com busca local em
+        cada geração. None para não ter limite.
+      registros: lista de destinos para as estatísticas de cada geração (ver
+        `RegistroCircular`, `EscritorCSV` e `GraficoAoVivo`). O histórico
+        (`self.historico`) é sempre um desses destinos.
+      tamanho_historico: quantas gerações o histórico em memória guarda; as
+        mais antigas são descartadas. None para guardar todas.
+      mede_diversidade: de quantas em quantas gerações a fração de genomas
+        distintos na população é medida (`True` é o mesmo que 1). A medida
+        custa um conjunto com os genomas da população inteira, o que pode
+        custar mais do que a avaliação em populações grandes, por isso fica
+        desligada por padrão. Nas gerações não medidas, `diversidade` é None.
+      checkpoints: `GravadorDeCheckpoints` opcional que salva o estado do
+        algoritmo periodicamente (ver também `salva_checkpoint` e `retoma`).
+      perfil: `PerfilDeExecucao` opcional que mede o tempo de cada fase da
+        geração e conta avaliações, cruzamentos e mutações. Sem perfil, o
+        laço não mede nada (ver também `perfila`).
+      rng: fonte de números aleatórios da execução, de preferência um
+        `ContextoOperadores`. Quando informada, é passada como `rng=` para a
+        seleção, o cruzamento e a mutação, e é usada para sortear quem cruza
+        e quem sofre mutação. Quando None, os operadores usam os geradores
+        globais (`random` e o gerador padrão de `funcoes`).
+    """
+
+    def __init__(
+        self,
+        populacao,
+        funcao_objetivo_pop,
+        funcao_selecao,
+        funcao_cruzamento,
+        funcao_mutacao,
+        chance_cruzamento=0.5,
+        chance_mutacao=0.05,
+        minimizacao=False,
+        operadores_em_lote=False,
+        mutacao_com_delta=False,
+        selecao_por_indices=False,
+        busca_local=None,
+        num_busca_local=5,
+        tempo_busca_local=None,
+        registros=(),
+        tamanho_historico=10_000,
+        mede_diversidade=False,
+        checkpoints=None,
+        perfil=None,
+        rng=None,
+    ):
+        if getattr(funcao_mutacao, "retorna_delta", False) and not mutacao_com_delta:
+            raise ValueError(
+                f"{funcao_mutacao.__name__} retorna também a variação da fitness; "
+                "use mutacao_com_delta=True"
+            )
+        self.funcao_objetivo_pop = funcao_objetivo_pop
+        self.funcao_selecao = funcao_selecao
+        self.funcao_cruzamento = funcao_cruzamento
+        self.funcao_mutacao = funcao_mutacao
+        self.chance_cruzamento = chance_cruzamento
+        self.chance_mutacao = chance_mutacao
+        self.minimizacao = minimizacao
+        self.operadores_em_lote = operadores_em_lote
+        self.mutacao_com_delta = mutacao_com_delta
+        self.selecao_por_indices = selecao_por_indices
+        self.busca_local = busca_local
+        self.num_busca_local = num_busca_local
+        self.tempo_busca_local = tempo_busca_local
+        self.mede_diversidade = mede_diversidade
+        self.checkpoints = checkpoints
+        self.perfil = perfil
+        self.rng = rng
+        self._aleatorio = random if rng is None else rng
+        self._kw_rng = {} if rng is None else {"rng": rng}
+
+        if operadores_em_lote:
+            self.populacao = np.asarray(populacao)
+        else:
+            self.populacao = list(populacao)
+        self.fitness = np.asarray(funcao_objetivo_pop(self.populacao), dtype=float)
+        self.num_avaliacoes = len(self.populacao)
+        if perfil is not None:
+            perfil.registra_avaliacao(len(self.populacao))
+        self.geracao = 0
+        self.historico = RegistroCircular(tamanho_historico)
+        self.registros = [self.historico, *registros]
+        self._inicio = time.perf_counter()
+
+        self.melhor_individuo = None
+        self.melhor_fitness = float("inf") if minimizacao else -float("inf")
+        self._atualiza_melhor()
+
+    def _eh_melhor(self, a, b):
+        """Diz se a fitness `a` é melhor do que a fitness `b`."""
+        return a < b if self.minimizacao else a > b
+
+    def _posicao_do_melhor(self):
+        """Posição do melhor indivíduo da população atual."""
+        if self.minimizacao:
+            return int(np.argmin(self.fitness))
+        return int(np.argmax(self.fitness))
+
+    def _atualiza_melhor(self):
+        """Atualiza o hall da fama com o melhor indivíduo da população atual."""
+        posicao = self._posicao_do_melhor()
+        if self._eh_melhor(self.fitness[posicao], self.melhor_fitness):
+            self.melhor_individuo = copy(self.populacao[posicao])
+            self.melhor_fitness = float(self.fitness[posicao])
+
+    def _seleciona(self):
+        """Aplica a função de seleção e carrega junto a fitness dos escolhidos.
+
+        A função de seleção recebe as posições dos indivíduos no lugar da
+        população, assim ela retorna as posições escolhidas e conseguimos
+        reaproveitar a fitness já calculada de cada um deles.
+        """
+        if self.selecao_por_indices:
+            escolhidos = np.asarray(
+                self.funcao_selecao(self.fitness, **self._kw_rng), dtype=int
+            )
+        else:
+            posicoes = list(range(len(self.populacao)))
+            escolhidos = np.asarray(
+                self.funcao_selecao(posicoes, self.fitness.tolist(), **self._kw_rng), dtype=int
+            )
+        if self.operadores_em_lote:
+            self.populacao = self.populacao[escolhidos]
+        else:
+            self.populacao = [self.populacao[i] for i in escolhidos]
+        self.fitness = self.fitness[escolhidos]
+
+    def _sorteia(self, quantidade, chance):
+        """Posições (entre 0 e `quantidade` - 1) sorteadas com probabilidade `chance`.
+
+        Com um `ContextoOperadores`, todos os números são sorteados de uma vez
+        e o laço dos operadores só passa pelas posições sorteadas.
+        """
+        if isinstance(self.rng, ContextoOperadores):
+            return np.flatnonzero(self.rng.random(quantidade) <= chance).tolist()
+        aleatorio = self._aleatorio
+        return [i for i in range(quantidade) if aleatorio.random() <= chance]
+
+    def _cruza(self, alterados):
+        """Cruza os pares (0, 1), (2, 3), ... marcando os filhos gerados.
+
+        Returns:
+          Número de filhos gerados.
+        """
+        populacao = self.populacao
+        pares = self._sorteia(len(populacao) // 2, self.chance_cruzamento)
+        for par in pares:
+            i = 2 * par
+            filho1, filho2 = self.funcao_cruzamento(
+                populacao[i], populacao[i + 1], **self._kw_rng
+            )
+            populacao[i] = filho1
+            populacao[i + 1] = filho2
+            alterados[i] = True
+            alterados[i + 1] = True
+        return 2 * len(pares)
+
+    def _muta(self, alterados):
+        """Aplica a mutação marcando os indivíduos que foram mutados.
+
+        O indivíduo é copiado antes da mutação, pois a seleção pode colocar o
+        mesmo objeto em mais de uma posição da população. Com
+        `mutacao_com_delta`, quem não passou pelo cruzamento tem a fitness
+        atualizada pela variação retornada e não precisa ser reavaliado.
+
+        Returns:
+          Número de indivíduos mutados.
+        """
+        populacao = self.populacao
+        sorteados = self._sorteia(len(populacao), self.chance_mutacao)
+        for i in sorteados:
+            mutado = self.funcao_mutacao(copy(populacao[i]), **self._kw_rng)
+            if self.mutacao_com_delta:
+                mutado, delta = mutado
+                if not alterados[i]:
+                    populacao[i] = mutado
+                    self.fitness[i] += delta
+                    continue
+            populacao[i] = mutado
+            alterados[i] = True
+        return len(sorteados)
+
+    def _reavalia(self, alterados):
+        """Calcula a fitness apenas dos indivíduos alterados nesta geração.
+
+        Returns:
+          Número de indivíduos avaliados.
+        """
+        posicoes = np.flatnonzero(alterados)
+        if len(posicoes) > 0:
+            if self.operadores_em_lote:
+                novos = self.populacao[posicoes]
+            else:
+                novos = [self.populacao[i] for i in posicoes]
+            self.fitness[posicoes] = self.funcao_objetivo_pop(novos)
+            self.num_avaliacoes += len(posicoes)
+            if self.perfil is not None:
+                self.perfil.registra_avaliacao(len(posicoes))
+        return len(posicoes)
+
+    def _melhora_filhos(self, alterados):
+        """Aplica a busca local nos melhores filhos desta geração.
+
+        Returns:
+          Número de filhos que passaram pela busca local.
+        """
+        filhos = np.flatnonzero(alterados)
+        ordem = np.argsort(self.fitness[filhos])
+        if not self.minimizacao:
+            ordem = ordem[::-1]
+
+        prazo = None
+        if self.tempo_busca_local is not None:
+            prazo = time.perf_counter() + self.tempo_busca_local
+
+        melhorados = 0
+        for i in filhos[ordem[: self.num_busca_local]]:
+            if prazo is not None and time.perf_counter() > prazo:
+                break
+            self.populacao[i], variacao = self.busca_local(self.populacao[i], prazo)
+            self.fitness[i] += variacao
+            melhorados += 1
+        return melhorados
+
+    def passo(self):
+        """Executa uma geração do algoritmo genético.
+
+        Returns:
+          Dicionário com as estatísticas da geração.
+        """
+        # sem perfil, o custo da medição é só o teste `perfil is not None`
+        perfil = self.perfil
+        if perfil is not None:
+            marca = time.perf_counter()
+
+        self._seleciona()
+        if perfil is not None:
+            marca = perfil.registra_fase("selecao", marca)
+
+        if self.operadores_em_lote:
+            self.populacao, cruzados = self.funcao_cruzamento(
+                self.populacao, self.chance_cruzamento, **self._kw_rng
+            )
+            if perfil is not None:
+                marca = perfil.registra_fase("cruzamento", marca)
+            mutacao = self.funcao_mutacao(self.populacao, self.chance_mutacao, **self._kw_rng)
+            if self.mutacao_com_delta:
+                self.populacao, mutados, deltas = mutacao
+                so_mutados = mutados & ~cruzados
+                self.fitness[so_mutados] += deltas[so_mutados]
+                alterados = cruzados
+            else:
+                if len(mutacao) != 2:
+                    raise ValueError(
+                        "A mutação em lote deve retornar (populacao, alterados); se ela "
+                        "também retorna a variação da fitness, use mutacao_com_delta=True"
+                    )
+                self.populacao, mutados = mutacao
+                alterados = cruzados | mutados
+            num_cruzados = num_mutados = None
+        else:
+            alterados = np.zeros(len(self.populacao), dtype=bool)
+            num_cruzados = self._cruza(alterados)
+            if perfil is not None:
+                marca = perfil.registra_fase("cruzamento", marca)
+            num_mutados = self._muta(alterados)
+        if perfil is not None:
+            marca = perfil.registra_fase("mutacao", marca)
+
+        self._reavalia(alterados)
+        if perfil is not None:
+            marca = perfil.registra_fase("avaliacao", marca)
+
+        num_melhorados = 0
+        if self.busca_local is not None:
+            num_melhorados = self._melhora_filhos(alterados)
+            if perfil is not None:
+                marca = perfil.registra_fase("busca_local", marca)
+
+        self._atualiza_melhor()
+        self.geracao += 1
+
+        registro = self._estatisticas()
+        for destino in self.registros:
+            destino.registra(registro)
+        if self.checkpoints is not None and self.geracao % self.checkpoints.intervalo == 0:
+            self.checkpoints.salva(self)
+
+        if perfil is not None:
+            perfil.registra_fase("registros", marca)
+            if num_cruzados is None:
+                num_cruzados = int(np.count_nonzero(cruzados))
+                num_mutados = int(np.count_nonzero(mutados))
+            perfil.registra_geracao(num_cruzados, num_mutados, num_melhorados)
+        return registro
+
+    def _estatisticas(self):
+        """Monta o registro com as estatísticas da geração atual."""
+        diversidade = None
+        if self.mede_diversidade and self.geracao % int(self.mede_diversidade) == 0:
+            distintos = {_chave_genoma(individuo) for individuo in self.populacao}
+            diversidade = len(distintos) / len(self.populacao)
+        return {
+            "geracao": self.geracao,
+            "melhor_fitness": self.melhor_fitness,
+            "melhor_da_geracao": float(self.fitness[self._posicao_do_melhor()]),
+            "media": float(self.fitness.mean()),
+            "desvio_padrao": float(self.fitness.std()),
+            "diversidade": diversidade,
+            "avaliacoes": self.num_avaliacoes,
+            "tempo": time.perf_counter() - self._inicio,
+        }
+
+    def geracoes(self, num_geracoes):
+        """Executa `num_geracoes` gerações, entregando o registro de cada uma.
+
+        É um gerador: cada geração só é executada quando o registro anterior
+        é consumido, então nada precisa ficar acumulado em memória. Os
+        registros pendentes são descarregados no fim, mesmo quando o laço
+        de quem chama é interrompido com `break`.
+
+        Exemplo:
+          for registro in ag.geracoes(1_000_000):
+              if registro["melhor_fitness"] == 0:
+                  break
+        """
+        try:
+            for _ in range(num_geracoes):
+                yield self.passo()
+        finally:
+            self.descarrega_registros()
+
+    def descarrega_registros(self):
+        """Força os destinos dos registros a escreverem o que está pendente."""
+        for destino in self.registros:
+            destino.descarrega()
+        if self.checkpoints is not None:
+            self.checkpoints.espera()
+
+    def fecha_registros(self):
+        """Fecha todos os destinos dos registros (arquivos, gráficos...)."""
+        for destino in self.registros:
+            destino.fecha()
+        if self.checkpoints is not None:
+            self.checkpoints.fecha()
+
+    def executa(self, num_geracoes):
+        """Executa `num_geracoes` gerações do algoritmo genético.
+
+        Pode ser chamado mais de uma vez; a busca continua de onde parou.
+
+        Args:
+          num_geracoes: número de gerações a serem executadas.
+
+        Returns:
+          Lista com as estatísticas das gerações guardadas no histórico.
+        """
+        for _ in self.geracoes(num_geracoes):
+            pass
+        return list(self.historico)
+
+    def melhores(self, quantidade):
+        """Retorna cópias dos `quantidade` melhores indivíduos da população.
+
+        Returns:
+          Lista com os indivíduos e array com a fitness de cada um deles.
+        """
+        ordem = np.argsort(self.fitness)
+        if not self.minimizacao:
+            ordem = ordem[::-1]
+        posicoes = ordem[:quantidade]
+        return [copy(self.populacao[i]) for i in posicoes], self.fitness[posicoes].copy()
+
+    def recebe_migrantes(self, individuos, fitness):
+        """Coloca indivíduos vindos de fora no lugar dos piores da população.
+
+        Args:
+          individuos: lista de indivíduos que vão entrar na população.
+          fitness: fitness já calculada de cada um desses indivíduos.
+        """
+        ordem = np.argsort(self.fitness)
+        if self.minimizacao:
+            ordem = ordem[::-1]
+        for posicao, individuo, fit in zip(ordem, individuos, fitness):
+            self.populacao[posicao] = individuo
+            self.fitness[posicao] = fit
+        self._atualiza_melhor()
+
+    def perfila(self, num_geracoes, intervalo=0.001, arquivo=None, num_funcoes=20):
+        """Executa `num_geracoes` gerações medindo onde o tempo é gasto.
+
+        As gerações rodam com um `PerfilDeExecucao` (tempo por fase e
+        contadores) e com um `AmostradorDePerfil` (funções mais frequentes na
+        pilha). Se o algoritmo já tem um perfil, ele é usado e continua
+        acumulando; senão um perfil temporário é criado só para estas
+        gerações.
+
+        Args:
+          num_geracoes: número de gerações a serem executadas.
+          intervalo: intervalo entre duas amostras da pilha, em segundos.
+          arquivo: caminho opcional onde o relatório é salvo.
+          num_funcoes: quantas funções aparecem no relatório do amostrador.
+
+        Returns:
+          O relatório, em texto.
+        """
+        perfil_anterior = self.perfil
+        if self.perfil is None:
+            self.perfil = PerfilDeExecucao()
+        try:
+            with AmostradorDePerfil(intervalo) as amostrador:
+                self.executa(num_geracoes)
+            relatorio = self.perfil.relatorio() + "\n\n" + amostrador.relatorio(num_funcoes)
+        finally:
+            self.perfil = perfil_anterior
+
+        if arquivo is not None:
+            with open(arquivo, "w") as saida:
+                saida.write(relatorio)
+        return relatorio
+
+    def estado(self, cache=None):
+        """Cópia de tudo que é preciso para continuar a busca mais tarde.
+
+        Inclui a população, a fitness, o melhor indivíduo, os contadores, o
+        histórico e o estado dos geradores de números aleatórios (`random`, o
+        gerador padrão do NumPy em `funcoes` e o `rng` da execução, se houver:
+        um `ContextoOperadores`, um `numpy.random.Generator` ou um
+        `random.Random`; outros tipos levantam TypeError).
+
+        Args:
+          cache: `CacheFitness` opcional cujo conteúdo também deve ser salvo.
+
+        Returns:
+          Dicionário com os arrays e dicionário com os demais valores.
+        """
+        arrays = {
+            "populacao": np.array(self.populacao),
+            "fitness": self.fitness.copy(),
+        }
+        em_lista = not isinstance(self.populacao, np.ndarray)
+        valores = {
+            "populacao_em_lista": em_lista,
+            "lista_de_arrays": em_lista and isinstance(self.populacao[0], np.ndarray),
+            "geracao": self.geracao,
+            "num_avaliacoes": self.num_avaliacoes,
+            "melhor_fitness": self.melhor_fitness,
+            "tempo": time.perf_counter() - self._inicio,
+            "historico": list(self.historico),
+            "estado_random": random.getstate(),
+            "estado_numpy": funcoes._GERADOR.bit_generator.state,
+        }
+        if isinstance(self.rng, ContextoOperadores):
+            valores["estado_contexto"] = self.rng.estado()
+        elif isinstance(self.rng, np.random.Generator):
+            valores["estado_rng_numpy"] = self.rng.bit_generator.state
+        elif isinstance(self.rng, random.Random):
+            valores["estado_rng_random"] = self.rng.getstate()
+        elif self.rng is not None and self.rng is not random:
+            raise TypeError(
+                f"O estado de um rng do tipo {type(self.rng).__name__} não pode ser salvo; "
+                "use um ContextoOperadores, um numpy.random.Generator ou um random.Random"
+            )
+        if self.melhor_individuo is not None:
+            arrays["melhor_individuo"] = np.array(self.melhor_individuo)
+            valores["melhor_em_lista"] = isinstance(self.melhor_individuo, list)
+        if cache is not None:
+            chaves, arrays["cache_valores"], valores["cache"] = cache.estado()
+            if chaves is not None:
+                arrays["cache_chaves"] = chaves
+        return arrays, valores
+
+    def restaura_estado(self, arrays, valores, cache=None):
+        """Volta ao estado retornado por `estado` (o inverso de `estado`)."""
+        populacao = arrays["populacao"]
+        if valores["lista_de_arrays"]:
+            populacao = [individuo.copy() for individuo in populacao]
+        elif valores["populacao_em_lista"]:
+            populacao = populacao.tolist()
+        self.populacao = populacao
+        self.fitness = np.array(arrays["fitness"], dtype=float)
+
+        self.melhor_fitness = valores["melhor_fitness"]
+        self.melhor_individuo = None
+        if "melhor_individuo" in arrays:
+            melhor = arrays["melhor_individuo"]
+            self.melhor_individuo = melhor.tolist() if valores["melhor_em_lista"] else melhor[()]
+
+        self.geracao = valores["geracao"]
+        self.num_avaliacoes = valores["num_avaliacoes"]
+        self._inicio = time.perf_counter() - valores["tempo"]
+        self.historico.limpa()
+        for registro in valores["historico"]:
+            self.historico.registra(registro)
+
+        versao, estado_interno, gauss = valores["estado_random"]
+        random.setstate((versao, tuple(estado_interno), gauss))
+        funcoes._GERADOR.bit_generator.state = valores["estado_numpy"]
+        if "estado_contexto" in valores:
+            self.rng.restaura(valores["estado_contexto"])
+        elif "estado_rng_numpy" in valores:
+            self.rng.bit_generator.state = valores["estado_rng_numpy"]
+        elif "estado_rng_random" in valores:
+            versao, estado_interno, gauss = valores["estado_rng_random"]
+            self.rng.setstate((versao, tuple(estado_interno), gauss))
+
+        if cache is not None and "cache" in valores:
+            cache.restaura(arrays.get("cache_chaves"), arrays["cache_valores"], valores["cache"])
+
+    def salva_checkpoint(self, caminho, cache=None):
+        """Salva o estado do algoritmo na pasta `caminho` (ver `estado`).
+
+        A população fica em `caminho/populacao.npy`, que pode ser aberta com
+        `carrega_populacao` (inclusive mapeada em memória) para começar outra
+        busca a partir dela.
+        """
+        _escreve_checkpoint(caminho, *self.estado(cache))
+
+    def retoma(self, caminho, cache=None):
+        """Continua a busca a partir de um checkpoint salvo em `caminho`.
+
+        O algoritmo deve ter sido criado com os mesmos operadores da execução
+        original. Como os geradores de números aleatórios também são
+        restaurados, a continuação é idêntica à execução que não parou.
+
+        Args:
+          caminho: pasta do checkpoint.
+          cache: `CacheFitness` opcional que recebe o conteúdo salvo do cache.
+        """
+        self.restaura_estado(*_le_checkpoint(caminho), cache=cache)
+
+
+###############################################################################
+#                          Números aleatórios                                 #
+###############################################################################
+
+
+class ContextoOperadores:
+    """Fonte de números aleatórios de uma execução, com sorteios em lote.
+
+    Os operadores de `funcoes.py` que trabalham com listas sorteiam um número
+    de cada vez com o módulo `random`, que é global: duas execuções em
+    paralelo disputam o mesmo gerador e não dá para reproduzi-las. O contexto
+    embrulha um `numpy.random.Generator` próprio da execução e oferece a
+    mesma interface do módulo `random` (`random`, `uniform`, `randint`,
+    `choice`, `choices`, `sample` e `shuffle`), então pode ser passado como
+    `rng` para qualquer operador. Os números uniformes são sorteados em
+    blocos de `tamanho_buffer` pelo NumPy e consumidos um a um, o que é bem
+    mais barato do que uma chamada ao gerador por número.
+
+    Os métodos do `numpy.random.Generator` (`integers`, `permutation`...)
+    também funcionam e são repassados ao gerador, então o contexto serve
+    para os operadores com NumPy.
+
+    Args:
+      semente: inteiro, `numpy.random.SeedSequence` ou None (semente
+        aleatória).
+      tamanho_buffer: quantos números uniformes são sorteados de uma vez.
+    """
+
+    def __init__(self, semente=None, tamanho_buffer=4096):
+        if not isinstance(semente, np.random.SeedSequence):
+            semente = np.random.SeedSequence(semente)
+        self.semente = semente
+        self.gerador = np.random.default_rng(semente)
+        self.tamanho_buffer = tamanho_buffer
+        self._buffer = []
+
+    def __getattr__(self, nome):
+        # só é chamado para nomes que o contexto não tem
+        if nome == "gerador" or nome.startswith("_"):
+            raise AttributeError(nome)
+        return getattr(self.gerador, nome)
+
+    def filhos(self, quantidade):
+        """Cria `quantidade` contextos independentes derivados deste.
+
+        Cada processo, ilha ou trabalhador deve receber o seu próprio filho:
+        as sequências não se sobrepõem e são sempre as mesmas para a mesma
+        semente.
+        """
+        return [ContextoOperadores(semente, self.tamanho_buffer) for semente in self.semente.spawn(quantidade)]
+
+    def _uniformes(self, quantidade):
+        """Retira `quantidade` números uniformes em [0, 1) do buffer."""
+        buffer = self._buffer
+        if len(buffer) < quantidade:
+            novos = self.gerador.random(max(quantidade, self.tamanho_buffer)).tolist()
+            buffer[:0] = novos
+        uniformes = buffer[-quantidade:]
+        del buffer[-quantidade:]
+        return uniformes
+
+    def _recarrega(self):
+        """Sorteia um novo bloco de números e retira o primeiro deles."""
+        self._buffer = self.gerador.random(self.tamanho_buffer).tolist()
+        return self._buffer.pop()
+
+    # os métodos abaixo retiram o número do buffer diretamente, sem chamar
+    # `self.random()`, pois são chamados milhões de vezes
+
+    def random(self, size=None):
+        """Número uniforme em [0, 1). Com `size`, funciona como no NumPy."""
+        if size is not None:
+            return self.gerador.random(size)
+        return self._buffer.pop() if self._buffer else self._recarrega()
+
+    def uniform(self, a, b):
+        """Número real entre `a` e `b`, como `random.uniform`."""
+        u = self._buffer.pop() if self._buffer else self._recarrega()
+        return a + (b - a) * u
+
+    def randint(self, a, b):
+        """Inteiro entre `a` e `b` (inclusive), como `random.randint`."""
+        u = self._buffer.pop() if self._buffer else self._recarrega()
+        return a + int(u * (b - a + 1))
+
+    def choice(self, sequencia):
+        """Elemento sorteado de `sequencia`, como `random.choice`."""
+        n = len(sequencia)
+        if not n:
+            raise IndexError("Não é possível sortear de uma sequência vazia")
+        u = self._buffer.pop() if self._buffer else self._recarrega()
+        return sequencia[int(u * n)]
+
+    def choices(self, populacao, weights=None, *, cum_weights=None, k=1):
+        """`k` elementos sorteados com reposição, como `random.choices`."""
+        n = len(populacao)
+        if weights is None and cum_weights is None:
+            return [populacao[int(u * n)] for u in self._uniformes(k)]
+        if cum_weights is None:
+            cum_weights = np.cumsum(weights, dtype=float)
+        else:
+            cum_weights = np.asarray(cum_weights, dtype=float)
+        pontos = np.array(self._uniformes(k)) * cum_weights[-1]
+        posicoes = np.minimum(np.searchsorted(cum_weights, pontos, side="right"), n - 1)
+        return [populacao[i] for i in posicoes.tolist()]
+
+    def sample(self, populacao, k):
+        """`k` elementos distintos de `populacao`, como `random.sample`."""
+        n = len(populacao)
+        if not 0 <= k <= n:
+            raise ValueError("Amostra maior do que a população ou negativa")
+
+        if 4 * k <= n:
+            # poucos elementos: sorteia e descarta os repetidos
+            escolhidos = set()
+            resultado = []
+            while len(resultado) < k:
+                for u in self._uniformes(k - len(resultado)):
+                    i = int(u * n)
+                    if i not in escolhidos:
+                        escolhidos.add(i)
+                        resultado.append(populacao[i])
+            return resultado
+
+        # Fisher-Yates parcial
+        posicoes = list(range(n))
+        for i, u in enumerate(self._uniformes(k)):
+            j = i + int(u * (n - i))
+            posicoes[i], posicoes[j] = posicoes[j], posicoes[i]
+        return [populacao[i] for i in posicoes[:k]]
+
+    def shuffle(self, x):
+        """Embaralha a lista `x` no lugar, como `random.shuffle`."""
+        if len(x) < 2:
+            return
+        for i, u in zip(range(len(x) - 1, 0, -1), self._uniformes(len(x) - 1)):
+            j = int(u * (i + 1))
+            x[i], x[j] = x[j], x[i]
+
+    def estado(self):
+        """Estado do contexto (gerador e buffer), para salvar em checkpoints."""
+        return {"gerador": self.gerador.bit_generator.state, "buffer": list(self._buffer)}
+
+    def restaura(self, estado):
+        """Volta ao estado retornado por `estado`."""
+        self.gerador.bit_generator.state = estado["gerador"]
+        self._buffer = list(estado["buffer"])
+
+
+###############################################################################
+#                         Registro das gerações                               #
+###############################################################################
+# Destinos para os registros (dicionários com as estatísticas de cada geração)
+# emitidos pelo AlgoritmoGenetico. Todo destino tem os métodos `registra`,
+# `descarrega` e `fecha`.
+
+
+class RegistroCircular:
+    """Guarda em memória apenas os últimos registros.
+
+    Funciona como uma lista (dá para iterar, indexar e medir o tamanho), mas
+    ocupa memória constante mesmo em execuções com milhões de gerações.
+
+    Args:
+      tamanho_maximo: número de registros guardados. None para guardar todos.
+    """
+
+    def __init__(self, tamanho_maximo=10_000):
+        self._registros = deque(maxlen=tamanho_maximo)
+
+    def registra(self, registro):
+        self._registros.append(registro)
+
+    def descarrega(self):
+        pass
+
+    def fecha(self):
+        pass
+
+    def limpa(self):
+        self._registros.clear()
+
+    def __len__(self):
+        return len(self._registros)
+
+    def __iter__(self):
+        return iter(self._registros)
+
+    def __getitem__(self, indice):
+        return self._registros[indice]
+
+    def coluna(self, campo):
+        """Lista com o valor de `campo` em todos os registros guardados."""
+        return [registro[campo] for registro in self._registros]
+
+
+class EscritorCSV:
+    """Escreve os registros em um arquivo CSV, em lotes.
+
+    O arquivo é aberto para acréscimo: uma execução retomada continua o mesmo
+    arquivo, e o cabeçalho só é escrito quando o arquivo está vazio. As
+    linhas ficam em memória até completar `tamanho_lote` e então são
+    escritas de uma vez.
+
+    Args:
+      caminho: caminho do arquivo CSV.
+      tamanho_lote: número de registros acumulados antes de cada escrita.
+    """
+
+    def __init__(self, caminho, tamanho_lote=1000):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self._pendentes = []
+        self._arquivo = open(caminho, "a", newline="")
+        self._escritor = None
+
+    def registra(self, registro):
+        self._pendentes.append(registro)
+        if len(self._pendentes) >= self.tamanho_lote:
+            self.descarrega()
+
+    def descarrega(self):
+        """Escreve no arquivo os registros pendentes."""
+        if not self._pendentes:
+            return
+        if self._escritor is None:
+            self._escritor = csv.DictWriter(self._arquivo, fieldnames=list(self._pendentes[0]))
+            if self._arquivo.tell() == 0:
+                self._escritor.writeheader()
+        self._escritor.writerows(self._pendentes)
+        self._arquivo.flush()
+        self._pendentes.clear()
+
+    def fecha(self):
+        self.descarrega()
+        self._arquivo.close()
+
+
+class GraficoAoVivo:
+    """Atualiza um gráfico do matplotlib enquanto o algoritmo roda.
+
+    O gráfico é redesenhado no máximo uma vez a cada `intervalo` segundos.
+    Para manter a memória constante, quando o número de pontos passa de
+    `max_pontos` metade deles é descartada (um ponto sim, outro não) e a
+    partir daí só uma a cada duas gerações é guardada, e assim por diante.
+
+    Args:
+      campos: campos dos registros a serem desenhados.
+      intervalo: tempo mínimo (em segundos) entre dois redesenhos.
+      max_pontos: número máximo de pontos guardados por curva.
+      ax: eixo do matplotlib onde desenhar. Por padrão, cria uma figura nova.
+    """
+
+    def __init__(self, campos=("melhor_fitness", "media"), intervalo=1.0, max_pontos=2000, ax=None):
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            _, ax = plt.subplots()
+        self.ax = ax
+        self.campos = list(campos)
+        self.intervalo = intervalo
+        self.max_pontos = max_pontos
+        self._passo = 1
+        self._geracoes = []
+        self._valores = {campo: [] for campo in self.campos}
+        self._linhas = {campo: ax.plot([], [], label=campo)[0] for campo in self.campos}
+        self._ultimo_desenho = -float("inf")
+        ax.set_xlabel("geração")
+        ax.legend()
+
+    def registra(self, registro):
+        if registro["geracao"] % self._passo == 0:
+            self._geracoes.append(registro["geracao"])
+            for campo in self.campos:
+                self._valores[campo].append(registro[campo])
+            if len(self._geracoes) > self.max_pontos:
+                self._passo *= 2
+                del self._geracoes[1::2]
+                for valores in self._valores.values():
+                    del valores[1::2]
+
+        if time.perf_counter() - self._ultimo_desenho >= self.intervalo:
+            self.descarrega()
+
+    def descarrega(self):
+        """Redesenha o gráfico com os pontos guardados."""
+        for campo, linha in self._linhas.items():
+            linha.set_data(self._geracoes, self._valores[campo])
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.ax.figure.canvas.draw_idle()
+        self.ax.figure.canvas.flush_events()
+        self._ultimo_desenho = time.perf_counter()
+
+    def fecha(self):
+        self.descarrega()
+
+
+###############################################################################
+#                           Perfil de execução                                #
+###############################################################################
+
+
+class PerfilDeExecucao:
+    """Tempo gasto em cada fase da geração e contadores do AlgoritmoGenetico.
+
+    Basta passar um perfil para o algoritmo (`AlgoritmoGenetico(...,
+    perfil=PerfilDeExecucao())`) e chamar `relatorio()` depois da execução.
+    As fases são seleção, cruzamento, mutação, avaliação, busca local e
+    registros (estatísticas, destinos dos registros e checkpoints).
+
+    `chamadas_objetivo` e `avaliacoes` contam as chamadas de
+    `funcao_objetivo_pop` e os indivíduos avaliados, incluindo a avaliação da
+    população inicial quando o perfil é passado na criação do algoritmo
+    (nesse caso `avaliacoes` é igual a `num_avaliacoes` do algoritmo).
+
+    Args:
+      cache: `CacheFitness` opcional. Quando informado, o relatório mostra os
+        acertos e erros do cache desde a criação do perfil.
+    """
+
+    FASES = ("selecao", "cruzamento", "mutacao", "avaliacao", "busca_local", "registros")
+    CONTADORES = ("geracoes", "chamadas_objetivo", "avaliacoes", "cruzamentos", "mutacoes", "buscas_locais")
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.zera()
+
+    def zera(self):
+        """Zera os tempos e os contadores."""
+        self.tempos = dict.fromkeys(self.FASES, 0.0)
+        self.contadores = dict.fromkeys(self.CONTADORES, 0)
+        if self.cache is not None:
+            self._cache_inicial = (self.cache.acertos, self.cache.erros)
+
+    def registra_fase(self, fase, inicio):
+        """Soma o tempo desde `inicio` na `fase` e retorna o instante atual."""
+        agora = time.perf_counter()
+        self.tempos[fase] += agora - inicio
+        return agora
+
+    def registra_avaliacao(self, avaliados):
+        """Conta uma chamada da função objetivo com `avaliados` indivíduos."""
+        self.contadores["chamadas_objetivo"] += 1
+        self.contadores["avaliacoes"] += avaliados
+
+    def registra_geracao(self, cruzados, mutados, melhorados):
+        """Atualiza os contadores com o que aconteceu em uma geração."""
+        contadores = self.contadores
+        contadores["geracoes"] += 1
+        contadores["cruzamentos"] += cruzados
+        contadores["mutacoes"] += mutados
+        contadores["buscas_locais"] += melhorados
+
+    def resumo(self):
+        """Dicionário com os tempos (em segundos), os contadores e o cache."""
+        resumo = {f"tempo_{fase}": tempo for fase, tempo in self.tempos.items()}
+        resumo.update(self.contadores)
+        if self.cache is not None:
+            resumo["acertos_cache"] = self.cache.acertos - self._cache_inicial[0]
+            resumo["erros_cache"] = self.cache.erros - self._cache_inicial[1]
+        return resumo
+
+    def relatorio(self):
+        """Tabela com o tempo de cada fase e os contadores, em texto."""
+        total = sum(self.tempos.values()) or 1.0
+        geracoes = self.contadores["geracoes"] or 1
+        linhas = [f"{'fase':<12} {'total (s)':>10} {'%':>6} {'por geração (ms)':>17}"]
+        for fase, tempo in sorted(self.tempos.items(), key=lambda item: -item[1]):
+            linhas.append(
+                f"{fase:<12} {tempo:>10.3f} {100 * tempo / total:>6.1f} {1000 * tempo / geracoes:>17.3f}"
+            )
+        linhas.append("")
+        for nome, valor in self.resumo().items():
+            if not nome.startswith("tempo_"):
+                linhas.append(f"{nome:<18} {valor:>12}")
+        return "\n".join(linhas)
+
+
+def _descreve_quadro(quadro):
+    """Identifica a função de um quadro da pilha: (arquivo, linha, nome)."""
+    codigo = quadro.f_code
+    return os.path.basename(codigo.co_filename), codigo.co_firstlineno, codigo.co_name
+
+
+class AmostradorDePerfil:
+    """Profiler por amostragem da thread que o criou.
+
+    Uma thread separada olha a pilha da thread principal a cada `intervalo`
+    segundos (via `sys._current_frames`) e conta em quais funções ela está.
+    Diferente do cProfile, o código medido roda sem modificações, então o
+    custo é pequeno e quase não distorce as medidas. Cada função aparece com
+    duas contagens: "própria" (a amostra caiu dentro dela) e "acumulada" (ela
+    estava em algum ponto da pilha).
+
+    A amostra só é tirada quando a thread principal solta o GIL, então as
+    contagens são aproximadas; para o tempo exato de cada fase da geração,
+    use o `PerfilDeExecucao`.
+
+    Exemplo:
+      with AmostradorDePerfil() as amostrador:
+          ag.executa(100)
+      print(amostrador.relatorio())
+
+    Args:
+      intervalo: tempo entre duas amostras, em segundos.
+    """
+
+    def __init__(self, intervalo=0.001):
+        self.intervalo = intervalo
+        self.num_amostras = 0
+        self.propria = Counter()
+        self.acumulada = Counter()
+        self._alvo = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    def inicia(self):
+        """Começa a amostrar a pilha da thread atual."""
+        self._alvo = threading.get_ident()
+        self._parar.clear()
+        # a thread principal só solta o GIL a cada "switch interval" (5 ms por
+        # padrão); sem diminuí-lo, as amostras se concentrariam nos pontos em
+        # que ela solta o GIL por conta própria
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.intervalo / 5))
+        self._thread = threading.Thread(target=self._amostra, daemon=True)
+        self._thread.start()
+
+    def para(self):
+        """Para de amostrar."""
+        self._parar.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def __enter__(self):
+        self.inicia()
+        return self
+
+    def __exit__(self, *exc):
+        self.para()
+
+    def _amostra(self):
+        while not self._parar.wait(self.intervalo):
+            quadro = sys._current_frames().get(self._alvo)
+            if quadro is None:
+                continue
+            self.num_amostras += 1
+            self.propria[_descreve_quadro(quadro)] += 1
+            vistas = set()
+            while quadro is not None:
+                funcao = _descreve_quadro(quadro)
+                if funcao not in vistas:  # recursão conta uma vez só
+                    vistas.add(funcao)
+                    self.acumulada[funcao] += 1
+                quadro = quadro.f_back
+
+    def relatorio(self, num_funcoes=20):
+        """Funções com mais amostras próprias e acumuladas, em texto."""
+        total = self.num_amostras or 1
+        linhas = [f"{self.num_amostras} amostras a cada {1000 * self.intervalo:g} ms"]
+        for titulo, contagem in (("própria", self.propria), ("acumulada", self.acumulada)):
+            linhas.append("")
+            linhas.append(f"{titulo:>9} {'%':>6}  função")
+            for (arquivo, linha, nome), amostras in contagem.most_common(num_funcoes):
+                linhas.append(f"{amostras:>9} {100 * amostras / total:>6.1f}  {nome} ({arquivo}:{linha})")
+        return "\n".join(linhas)
+
+
+###############################################################################
+#                             Cache de fitness                                #
+###############################################################################
+
+
+def _chave_genoma(individuo):
+    """Chave que identifica um genoma: os bytes de um array ou a tupla de uma lista."""
+    if isinstance(individuo, (np.ndarray, np.void)):
+        return individuo.tobytes()
+    return tuple(individuo)
+
+
+class CacheFitness:
+    """Guarda a fitness de genomas já avaliados, com limite de tamanho (LRU).
+
+    No final da busca a população costuma estar cheia de indivíduos repetidos
+    e cada repetido seria avaliado de novo. O cache embrulha uma função
+    objetivo qualquer e só a chama para genomas que ainda não foram vistos.
+    Quando o cache enche, o genoma usado há mais tempo é descartado.
+
+    Os dados do problema (`senha_verdadeira`, `objetos`...) não fazem parte
+    da chave, então cada cache deve ser usado com um único problema.
+
+    Exemplo:
+      cache = CacheFitness(funcao_objetivo_senha)
+      cache(individuo, SENHA)                        # como funcao_objetivo_senha
+      cache.avalia_populacao(populacao, SENHA)       # como funcao_objetivo_pop_senha
+
+    Args:
+      funcao_objetivo: função objetivo de um indivíduo, no formato
+        `f(individuo, *dados)`.
+      tamanho_maximo: número máximo de genomas guardados.
+    """
+
+    def __init__(self, funcao_objetivo, tamanho_maximo=100_000):
+        self.funcao_objetivo = funcao_objetivo
+        self.tamanho_maximo = tamanho_maximo
+        self.acertos = 0
+        self.erros = 0
+        self._valores = OrderedDict()
+
+    def __len__(self):
+        return len(self._valores)
+
+    def __call__(self, individuo, *dados):
+        """Retorna a fitness de `individuo`, calculando apenas se necessário."""
+        chave = _chave_genoma(individuo)
+        valores = self._valores
+        if chave in valores:
+            self.acertos += 1
+            valores.move_to_end(chave)
+            return valores[chave]
+
+        self.erros += 1
+        fitness = self.funcao_objetivo(individuo, *dados)
+        valores[chave] = fitness
+        if len(valores) > self.tamanho_maximo:
+            valores.popitem(last=False)
+        return fitness
+
+    def avalia_populacao(self, populacao, *dados):
+        """Calcula a fitness de todos os indivíduos da população usando o cache.
+
+        Returns:
+          Lista com a fitness de cada indivíduo da população.
+        """
+        return [self(individuo, *dados) for individuo in populacao]
+
+    @property
+    def taxa_de_acerto(self):
+        """Fração das consultas que foram respondidas pelo cache."""
+        total = self.acertos + self.erros
+        return self.acertos / total if total else 0.0
+
+    def limpa(self):
+        """Esvazia o cache e zera os contadores."""
+        self._valores.clear()
+        self.acertos = 0
+        self.erros = 0
+
+    def estado(self):
+        """Conteúdo do cache em arrays, na ordem de uso (do mais antigo ao mais recente).
+
+        Returns:
+          Array com uma chave por linha (None se o cache estiver vazio), array
+          com as fitness e dicionário com o tipo das chaves e os contadores.
+        """
+        chaves = list(self._valores)
+        valores = np.array(list(self._valores.values()))
+        info = {"acertos": self.acertos, "erros": self.erros, "chaves_em_bytes": False}
+        if not chaves:
+            return None, valores, info
+        if isinstance(chaves[0], bytes):
+            info["chaves_em_bytes"] = True
+            return np.frombuffer(b"".join(chaves), dtype=np.uint8).reshape(len(chaves), -1), valores, info
+        return np.array(chaves), valores, info
+
+    def restaura(self, chaves, valores, info):
+        """Volta ao conteúdo retornado por `estado`."""
+        self.limpa()
+        self.acertos = info["acertos"]
+        self.erros = info["erros"]
+        if chaves is None:
+            return
+        if info["chaves_em_bytes"]:
+            chaves = (linha.tobytes() for linha in chaves)
+        else:
+            chaves = (tuple(linha) for linha in chaves.tolist())
+        self._valores.update(zip(chaves, valores.tolist()))
+
+
+###############################################################################
+#                               Checkpoints                                   #
+###############################################################################
+# Um checkpoint é uma pasta com um arquivo .npy para cada array (população,
+# fitness, melhor indivíduo e conteúdo do cache) e um estado.json com o resto.
+
+
+def _escreve_checkpoint(caminho, arrays, valores):
+    """Escreve um checkpoint na pasta `caminho`, substituindo o anterior.
+
+    A pasta nova é escrita ao lado e só depois troca de lugar com a antiga,
+    assim um processo que morre no meio da escrita não estraga o último
+    checkpoint. Entre as duas trocas existe um instante em que só a pasta
+    `{caminho}.antigo` existe; `_pasta_do_checkpoint` cuida desse caso na
+    leitura.
+    """
+    temporario = f"{caminho}.tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+    for nome, array in arrays.items():
+        np.save(os.path.join(temporario, f"{nome}.npy"), array)
+    with open(os.path.join(temporario, "estado.json"), "w") as arquivo:
+        # o estado de alguns geradores do NumPy (MT19937) contém arrays
+        json.dump(valores, arquivo, default=lambda objeto: objeto.tolist())
+
+    antigo = f"{caminho}.antigo"
+    if os.path.exists(caminho):
+        shutil.rmtree(antigo, ignore_errors=True)
+        os.replace(caminho, antigo)
+    os.replace(temporario, caminho)
+    shutil.rmtree(antigo, ignore_errors=True)
+
+
+def _pasta_do_checkpoint(caminho):
+    """Pasta de onde o checkpoint `caminho` deve ser lido.
+
+    Se o processo morreu entre as duas trocas de `_escreve_checkpoint`, a
+    pasta `caminho` não existe, mas o checkpoint anterior está completo em
+    `{caminho}.antigo`.
+    """
+    antigo = f"{caminho}.antigo"
+    if not os.path.exists(caminho) and os.path.exists(antigo):
+        return antigo
+    return caminho
+
+
+def _le_checkpoint(caminho):
+    """Lê um checkpoint escrito por `_escreve_checkpoint`."""
+    caminho = _pasta_do_checkpoint(caminho)
+    arrays = {}
+    for arquivo in os.listdir(caminho):
+        nome, extensao = os.path.splitext(arquivo)
+        if extensao == ".npy":
+            arrays[nome] = np.load(os.path.join(caminho, arquivo))
+    with open(os.path.join(caminho, "estado.json")) as arquivo:
+        valores = json.load(arquivo)
+    return arrays, valores
+
+
+def carrega_populacao(caminho, mmap_mode="r"):
+    """Abre a população salva em um checkpoint.
+
+    Serve para começar uma busca nova a partir da população de outra. Por
+    padrão o arquivo é mapeado em memória (somente leitura), então é preciso
+    copiar a população antes de entregá-la a operadores que a modificam.
+
+    Args:
+      caminho: pasta do checkpoint.
+      mmap_mode: modo de mapeamento passado para `np.load`. None para ler o
+        arquivo inteiro para a memória.
+
+    Returns:
+      Array com um indivíduo por linha.
+    """
+    caminho = _pasta_do_checkpoint(caminho)
+    return np.load(os.path.join(caminho, "populacao.npy"), mmap_mode=mmap_mode)
+
+
+class GravadorDeCheckpoints:
+    """Salva checkpoints periódicos de um AlgoritmoGenetico sem travar o laço.
+
+    A cópia do estado é feita na hora, mas a escrita em disco acontece em uma
+    thread separada enquanto as próximas gerações rodam. Se uma escrita ainda
+    não terminou quando o próximo checkpoint chega, o algoritmo espera por
+    ela, então existe no máximo uma escrita pendente.
+
+    Exemplo:
+      gravador = GravadorDeCheckpoints("execucao", intervalo=100)
+      ag = AlgoritmoGenetico(..., checkpoints=gravador)
+      ag.executa(10_000)
+      ...
+      ag = AlgoritmoGenetico(...)        # em outro processo
+      ag.retoma("execucao")
+
+    Args:
+      caminho: pasta onde o checkpoint é salvo (sempre o mais recente).
+      intervalo: número de gerações entre dois checkpoints.
+      cache: `CacheFitness` opcional cujo conteúdo também é salvo.
+    """
+
+    def __init__(self, caminho, intervalo=100, cache=None):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pendente = None
+
+    def salva(self, algoritmo):
+        """Copia o estado de `algoritmo` e agenda a escrita em segundo plano."""
+        arrays, valores = algoritmo.estado(self.cache)
+        self.espera()
+        self._pendente = self._executor.submit(_escreve_checkpoint, self.caminho, arrays, valores)
+
+    def espera(self):
+        """Espera a escrita pendente terminar (e repassa um eventual erro)."""
+        if self._pendente is not None:
+            pendente, self._pendente = self._pendente, None
+            pendente.result()
+
+    def fecha(self):
+        self.espera()
+        self._executor.shutdown()
+
+
+###############################################################################
+#                          Avaliação paralela                                 #
+###############################################################################
+
+# Dados de cada processo trabalhador, definidos uma única vez quando o pool é
+# criado (ver _inicializa_trabalhador).
+_FUNCAO_DO_TRABALHADOR = None
+_DADOS_DO_TRABALHADOR = ()
+
+
+def _inicializa_trabalhador(funcao_objetivo, dados):
+    """Guarda a função objetivo e os dados do problema no processo trabalhador."""
+    global _FUNCAO_DO_TRABALHADOR, _DADOS_DO_TRABALHADOR
+    _FUNCAO_DO_TRABALHADOR = funcao_objetivo
+    _DADOS_DO_TRABALHADOR = dados
+
+
+def _avalia_lote(lote):
+    """Avalia um lote de indivíduos dentro de um processo trabalhador."""
+    return [_FUNCAO_DO_TRABALHADOR(individuo, *_DADOS_DO_TRABALHADOR) for individuo in lote]
+
+
+def _mesmo_dado(a, b):
+    """Se `a` e `b` são o mesmo dado do problema (o mesmo objeto ou iguais)."""
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+    try:
+        return bool(a == b)
+    except ValueError:  # estruturas com arrays dentro
+        return False
+
+
+class AvaliadorParalelo:
+    """Avalia a função objetivo de uma população em vários processos.
+
+    Substitui as funções `funcao_objetivo_pop_*`, que avaliam a população com
+    um laço serial. Os dados do problema (`cidades`, `objetos`, `preco`...)
+    são enviados para cada processo uma única vez, quando o pool é criado; a
+    cada chamada apenas os indivíduos viajam, divididos em lotes.
+
+    Exemplo:
+      avaliador = AvaliadorParalelo(funcao_objetivo_cv, CIDADES)
+      fitness = avaliador(populacao)  # ou avaliador(populacao, CIDADES)
+
+    A função objetivo precisa poder ser enviada para outro processo, então use
+    funções definidas em módulos (como as de `funcoes.py`), não lambdas.
+
+    Args:
+      funcao_objetivo: função objetivo de um indivíduo, no formato
+        `f(individuo, *dados)`, como `funcao_objetivo_cv`.
+      *dados: dados do problema repassados para a função objetivo.
+      num_processos: número de processos trabalhadores. Por padrão, o número
+        de CPUs da máquina.
+      tamanho_lote: número de indivíduos enviados de uma vez para cada
+        processo. Por padrão, a população é dividida em cerca de quatro lotes
+        por processo.
+    """
+
+    def __init__(self, funcao_objetivo, *dados, num_processos=None, tamanho_lote=None):
+        self.funcao_objetivo = funcao_objetivo
+        self.dados = dados
+        self.num_processos = num_processos or os.cpu_count() or 1
+        self.tamanho_lote = tamanho_lote
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.num_processos,
+            initializer=_inicializa_trabalhador,
+            initargs=(funcao_objetivo, dados),
+        )
+
+    def __call__(self, populacao, *dados):
+        """Calcula a fitness de todos os indivíduos da população.
+
+        Args:
+          populacao: lista (ou array) com todos os indivíduos da população.
+          *dados: aceitos apenas para manter a assinatura das funções
+            `funcao_objetivo_pop_*`; precisam ser iguais aos dados recebidos
+            na criação do avaliador.
+
+        Returns:
+          Lista com a fitness de cada indivíduo da população.
+        """
+        if dados and (
+            len(dados) != len(self.dados)
+            or not all(_mesmo_dado(a, b) for a, b in zip(dados, self.dados))
+        ):
+            raise ValueError(
+                "Os dados do problema são enviados na criação do AvaliadorParalelo "
+                "e não podem mudar entre as chamadas."
+            )
+
+        tamanho_lote = self.tamanho_lote
+        if tamanho_lote is None:
+            tamanho_lote = max(1, -(-len(populacao) // (4 * self.num_processos)))
+
+        lotes = [populacao[i : i + tamanho_lote] for i in range(0, len(populacao), tamanho_lote)]
+        fitness = []
+        for resultado in self._pool.map(_avalia_lote, lotes):
+            fitness.extend(resultado)
+        return fitness
+
+    def fecha(self):
+        """Encerra os processos trabalhadores."""
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fecha()
+
+
+###############################################################################
+#                             Modelo de ilhas                                 #
+###############################################################################
+
+
+def _vizinhos_da_ilha(indice, num_ilhas, topologia):
+    """Retorna as ilhas para as quais a ilha `indice` envia seus migrantes."""
+    if num_ilhas == 1:
+        return []
+    if topologia == "anel":
+        return [(indice + 1) % num_ilhas]
+    if topologia == "completa":
+        return [j for j in range(num_ilhas) if j != indice]
+    raise ValueError(f"Topologia desconhecida: {topologia!r}. Use 'anel' ou 'completa'.")
+
+
+def _executa_ilha(
+    cria_ilha,
+    indice,
+    num_ilhas,
+    num_geracoes,
+    intervalo_migracao,
+    num_migrantes,
+    topologia,
+    contexto,
+    caixas_de_entrada,
+    resultados,
+):
+    """Executa uma ilha dentro de um processo e troca migrantes com as vizinhas.
+
+    Cada mensagem leva o número da época em que foi enviada e a ilha de
+    origem. Como uma vizinha pode estar uma época à frente, mensagens de
+    épocas futuras ficam guardadas até serem necessárias. Os migrantes de uma
+    época são aplicados na ordem das ilhas de origem, e não na ordem em que
+    chegaram, para o resultado não depender do escalonamento dos processos.
+    """
+    try:
+        # cada processo precisa da sua própria semente, senão todas as ilhas
+        # (criadas por fork) sorteariam exatamente os mesmos números; os
+        # geradores globais também são semeados para operadores sem `rng`
+        random.seed(int(contexto.semente.generate_state(1)[0]))
+        funcoes._GERADOR = contexto.gerador
+
+        ilha = cria_ilha(indice, contexto)
+        destinos = _vizinhos_da_ilha(indice, num_ilhas, topologia)
+        num_origens = sum(
+            indice in _vizinhos_da_ilha(j, num_ilhas, topologia) for j in range(num_ilhas)
+        )
+
+        adiantadas = {}
+        geracoes_feitas = 0
+        epoca = 0
+        while geracoes_feitas < num_geracoes:
+            passo = min(intervalo_migracao, num_geracoes - geracoes_feitas)
+            ilha.executa(passo)
+            geracoes_feitas += passo
+            if geracoes_feitas >= num_geracoes or not destinos:
+                continue
+
+            migrantes = ilha.melhores(num_migrantes)
+            for destino in destinos:
+                caixas_de_entrada[destino].put((epoca, indice, migrantes))
+
+            recebidos = adiantadas.pop(epoca, [])
+            while len(recebidos) < num_origens:
+                epoca_msg, origem, mensagem = caixas_de_entrada[indice].get()
+                if epoca_msg == epoca:
+                    recebidos.append((origem, mensagem))
+                else:
+                    adiantadas.setdefault(epoca_msg, []).append((origem, mensagem))
+
+            recebidos.sort(key=lambda par: par[0])
+            for _, (individuos, fitness) in recebidos:
+                ilha.recebe_migrantes(individuos, fitness)
+            epoca += 1
+
+        resultados.put(
+            (indice, None, ilha.melhor_individuo, ilha.melhor_fitness, ilha.minimizacao)
+        )
+    except BaseException:
+        resultados.put((indice, traceback.format_exc(), None, None, None))
+
+
+class ModeloDeIlhas:
+    """Algoritmo genético com várias populações (ilhas) em processos separados.
+
+    Cada ilha é um `AlgoritmoGenetico` independente rodando no seu próprio
+    processo, então o modelo usa vários núcleos da CPU. A cada
+    `intervalo_migracao` gerações, cada ilha envia cópias dos seus melhores
+    indivíduos para as ilhas vizinhas, que os colocam no lugar dos seus piores.
+
+    Args:
+      cria_ilha: função `f(indice, rng)` que cria e retorna o
+        `AlgoritmoGenetico` da ilha de número `indice`. Ela é chamada dentro
+        do processo da ilha; `rng` é o `ContextoOperadores` da ilha e deve ser
+        passado para o algoritmo (`AlgoritmoGenetico(..., rng=rng)`).
+      num_ilhas: número de ilhas (processos).
+      num_geracoes: número de gerações executadas em cada ilha.
+      intervalo_migracao: número de gerações entre duas migrações.
+      num_migrantes: quantos indivíduos cada ilha envia para cada vizinha.
+      topologia: "anel" (a ilha i envia para a ilha i+1) ou "completa" (todas
+        as ilhas enviam para todas as outras).
+      semente: semente para os sorteios das ilhas. Cada ilha recebe um
+        contexto filho (`ContextoOperadores.filhos`) derivado desta, então a
+        execução inteira é reproduzível a partir de uma única semente.
+      intervalo_verificacao: de quantos em quantos segundos o processo
+        principal confere se alguma ilha morreu (por falta de memória, um
+        sinal...) sem enviar o resultado. Nesse caso as outras ilhas, que
+        ficariam esperando migrantes para sempre, são encerradas.
+    """
+
+    def __init__(
+        self,
+        cria_ilha,
+        num_ilhas,
+        num_geracoes,
+        intervalo_migracao=10,
+        num_migrantes=2,
+        topologia="anel",
+        semente=None,
+        intervalo_verificacao=1.0,
+    ):
+        _vizinhos_da_ilha(0, 2, topologia)  # valida a topologia antes de começar
+        self.cria_ilha = cria_ilha
+        self.num_ilhas = num_ilhas
+        self.num_geracoes = num_geracoes
+        self.intervalo_migracao = intervalo_migracao
+        self.num_migrantes = num_migrantes
+        self.topologia = topologia
+        self.semente = semente
+        self.intervalo_verificacao = intervalo_verificacao
+
+        self.melhor_individuo = None
+        self.melhor_fitness = None
+        self.resultados_por_ilha = []
+
+    def executa(self):
+        """Executa todas as ilhas e retorna o melhor indivíduo entre elas.
+
+        Returns:
+          O melhor indivíduo encontrado em todas as ilhas e a sua fitness.
+        """
+        contexto = multiprocessing.get_context()
+        caixas_de_entrada = [contexto.Queue() for _ in range(self.num_ilhas)]
+        resultados = contexto.Queue()
+        contextos = ContextoOperadores(self.semente).filhos(self.num_ilhas)
+
+        processos = [
+            contexto.Process(
+                target=_executa_ilha,
+                args=(
+                    self.cria_ilha,
+                    indice,
+                    self.num_ilhas,
+                    self.num_geracoes,
+                    self.intervalo_migracao,
+                    self.num_migrantes,
+                    self.topologia,
+                    contextos[indice],
+                    caixas_de_entrada,
+                    resultados,
+                ),
+            )
+            for indice in range(self.num_ilhas)
+        ]
+        for processo in processos:
+            processo.start()
+
+        # os resultados são lidos antes do join para nenhum processo ficar
+        # preso esperando a fila esvaziar
+        por_ilha = {}
+        try:
+            while len(por_ilha) < self.num_ilhas:
+                try:
+                    resultado = resultados.get(timeout=self.intervalo_verificacao)
+                except queue.Empty:
+                    self._confere_ilhas(processos, por_ilha, resultados)
+                    continue
+                indice, erro, individuo, fitness, minimizacao = resultado
+                if erro is not None:
+                    raise RuntimeError(f"A ilha {indice} falhou:\n{erro}")
+                por_ilha[indice] = (individuo, fitness, minimizacao)
+        except BaseException:
+            for processo in processos:
+                processo.terminate()
+            raise
+        finally:
+            for processo in processos:
+                processo.join()
+
+        self.resultados_por_ilha = [por_ilha[i][:2] for i in range(self.num_ilhas)]
+        escolhe = min if por_ilha[0][2] else max
+        self.melhor_individuo, self.melhor_fitness = escolhe(
+            self.resultados_por_ilha, key=lambda par: par[1]
+        )
+        return self.melhor_individuo, self.melhor_fitness
+
+    def _confere_ilhas(self, processos, por_ilha, resultados):
+        """Levanta um erro se alguma ilha terminou sem enviar o resultado."""
+        mortas = [
+            indice
+            for indice, processo in enumerate(processos)
+            if indice not in por_ilha and processo.exitcode is not None
+        ]
+        if not mortas:
+            return
+        # o resultado de uma ilha que terminou normalmente pode ainda estar
+        # a caminho na fila
+        prazo = time.monotonic() + self.intervalo_verificacao
+        while mortas and time.monotonic() < prazo:
+            try:
+                indice, erro, individuo, fitness, minimizacao = resultados.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if erro is not None:
+                raise RuntimeError(f"A ilha {indice} falhou:\n{erro}")
+            por_ilha[indice] = (individuo, fitness, minimizacao)
+            mortas = [i for i in mortas if i not in por_ilha]
+        if mortas:
+            indice = mortas[0]
+            raise RuntimeError(
+                f"A ilha {indice} terminou sem enviar o resultado "
+                f"(código de saída {processos[indice].exitcode})"
+            )
+
+
+###############################################################################
+#                              Índice espacial                                #
+###############################################################################
+
+
+class IndiceEspacial:
+    """Índice em grade para encontrar as cidades mais próximas de cada cidade.
+
+    O espaço é dividido em uma grade regular com cerca de `pontos_por_celula`
+    cidades por célula. Os vizinhos de uma cidade são procurados nas células
+    em volta da sua, em anéis cada vez maiores, até que nenhuma cidade fora
+    dos anéis já visitados possa estar mais perto. Assim os k vizinhos de
+    todas as cidades são encontrados sem calcular as n x n distâncias.
+
+    Args:
+      coordenadas: array (n, dimensões) com as coordenadas das cidades.
+      pontos_por_celula: número médio de cidades por célula da grade.
+    """
+
+    def __init__(self, coordenadas, pontos_por_celula=8):
+        self.coordenadas = np.asarray(coordenadas, dtype=float)
+        n, dimensoes = self.coordenadas.shape
+
+        minimo = self.coordenadas.min(axis=0)
+        extensao = np.maximum(self.coordenadas.max(axis=0) - minimo, 1e-12)
+        celulas_por_eixo = max(1, int(np.ceil((n / pontos_por_celula) ** (1 / dimensoes))))
+        self.tamanho_celula = float(extensao.max()) / celulas_por_eixo
+        self.formato = np.maximum(1, np.ceil(extensao / self.tamanho_celula).astype(int))
+
+        celula = ((self.coordenadas - minimo) / self.tamanho_celula).astype(int)
+        self.celula_da_cidade = np.minimum(celula, self.formato - 1)
+        numero_celula = np.ravel_multi_index(self.celula_da_cidade.T, self.formato)
+
+        # cidades ordenadas por célula; as cidades da célula c ficam em
+        # self.cidades[self.inicio[c] : self.inicio[c + 1]]
+        self.cidades = np.argsort(numero_celula, kind="stable")
+        self.inicio = np.searchsorted(
+            numero_celula[self.cidades], np.arange(np.prod(self.formato) + 1)
+        )
+        self._numero_celula = numero_celula
+
+    def _cidades_no_anel(self, celula, raio):
+        """Cidades das células a uma distância (em células) de até `raio`."""
+        baixo = np.maximum(celula - raio, 0)
+        alto = np.minimum(celula + raio, self.formato - 1)
+        eixos = [np.arange(b, a + 1) for b, a in zip(baixo, alto)]
+        vizinhas = np.ravel_multi_index(
+            [g.ravel() for g in np.meshgrid(*eixos, indexing="ij")], self.formato
+        )
+        return np.concatenate(
+            [self.cidades[self.inicio[c] : self.inicio[c + 1]] for c in vizinhas]
+        )
+
+    def vizinhos(self, k):
+        """Encontra os `k` vizinhos mais próximos de todas as cidades.
+
+        As cidades de uma mesma célula são processadas juntas, pois
+        compartilham as mesmas células candidatas.
+
+        Returns:
+          Array (n, k) com os índices dos vizinhos e array (n, k) com as
+          distâncias até eles, do mais próximo ao mais distante.
+        """
+        n = len(self.coordenadas)
+        k = min(k, n - 1)
+        indices = np.empty((n, k), dtype=np.intp)
+        distancias = np.empty((n, k))
+        if k <= 0:  # uma única cidade (ou nenhuma) não tem vizinhos
+            return indices, distancias
+
+        for c in np.unique(self._numero_celula):
+            daqui = self.cidades[self.inicio[c] : self.inicio[c + 1]]
+            celula = self.celula_da_cidade[daqui[0]]
+            raio = 1
+            while True:
+                candidatas = self._cidades_no_anel(celula, raio)
+                diferenca = self.coordenadas[daqui][:, None, :] - self.coordenadas[candidatas][None, :, :]
+                d = np.sqrt((diferenca**2).sum(axis=2))
+                d[daqui[:, None] == candidatas[None, :]] = np.inf  # a própria cidade
+                cobre_tudo = len(candidatas) == n
+                if len(candidatas) > k:
+                    proximas = np.argpartition(d, k - 1, axis=1)[:, :k]
+                    k_esima = np.take_along_axis(d, proximas, axis=1).max(axis=1)
+                    # cidades fora do anel estão a pelo menos raio * tamanho_celula
+                    if cobre_tudo or (k_esima <= raio * self.tamanho_celula).all():
+                        break
+                elif cobre_tudo:
+                    proximas = np.argsort(d, axis=1)[:, :k]
+                    break
+                raio += 1
+
+            dist = np.take_along_axis(d, proximas, axis=1)
+            ordem = np.argsort(dist, axis=1)
+            indices[daqui] = candidatas[np.take_along_axis(proximas, ordem, axis=1)]
+            distancias[daqui] = np.take_along_axis(dist, ordem, axis=1)
+
+        return indices, distancias
+
+
+###############################################################################
+#                        Experimento caixeiro viajante                        #
+###############################################################################
+
+
+class ProblemaCaixeiro:
+    """Problema do caixeiro viajante com distâncias pré-calculadas.
+
+    As cidades recebidas (no formato retornado por `cria_cidades`) são
+    numeradas de 0 a n-1 e a matriz n x n de distâncias entre elas é calculada
+    uma única vez. Um caminho é representado por um array de inteiros com os
+    índices das cidades, então a distância de todos os caminhos de uma
+    população sai de uma única indexação da matriz de distâncias.
+
+    Para instâncias grandes (dezenas de milhares de cidades) a matriz n x n
+    não cabe na memória. Com `matriz_densa=False` ela não é criada: as
+    distâncias são calculadas a partir das coordenadas quando necessárias e
+    apenas as distâncias até os vizinhos candidatos de cada cidade
+    (encontrados com um `IndiceEspacial`) ficam guardadas, usando memória
+    O(n k).
+
+    Args:
+      cidades: dicionário onde as chaves são os nomes das cidades e os valores
+        são as coordenadas das cidades (em qualquer número de dimensões).
+      matriz_densa: se a matriz n x n de distâncias deve ser pré-calculada.
+    """
+
+    def __init__(self, cidades, matriz_densa=True):
+        self.nomes = list(cidades.keys())
+        self.coordenadas = np.array([cidades[nome] for nome in self.nomes], dtype=float)
+        self.num_cidades = len(self.nomes)
+        self._indice_do_nome = {nome: i for i, nome in enumerate(self.nomes)}
+        self._vizinhos = {}
+        self.indice_espacial = None
+        self.distancias = None
+
+        if matriz_densa:
+            # soma dimensão por dimensão para não criar um array n x n x dimensões
+            quadrados = np.zeros((self.num_cidades, self.num_cidades))
+            for eixo in self.coordenadas.T:
+                quadrados += (eixo[:, None] - eixo[None, :]) ** 2
+            self.distancias = np.sqrt(quadrados)
+
+    def distancia(self, a, b):
+        """Distância entre as cidades de índices `a` e `b` (aceita arrays)."""
+        if self.distancias is not None:
+            return self.distancias[a, b]
+        diferenca = self.coordenadas[a] - self.coordenadas[b]
+        return np.sqrt((diferenca**2).sum(axis=-1))
+
+    def codifica(self, caminho):
+        """Converte uma lista de nomes de cidades em um array de índices."""
+        return np.array([self._indice_do_nome[nome] for nome in caminho], dtype=np.intp)
+
+    def decodifica(self, individuo):
+        """Converte um array de índices de volta em uma lista de nomes."""
+        return [self.nomes[i] for i in individuo]
+
+    def individuo(self, rng=None):
+        """Sorteia um caminho possível (uma permutação dos índices)."""
+        rng = _gerador(rng)
+        return rng.permutation(self.num_cidades)
+
+    def populacao_inicial(self, tamanho, rng=None):
+        """Cria a população inicial como um array (tamanho, num_cidades).
+
+        Args:
+          tamanho: número de indivíduos da população.
+          rng: gerador `numpy.random.Generator` (opcional).
+
+        Returns:
+          Array onde cada linha é uma permutação dos índices das cidades.
+        """
+        rng = _gerador(rng)
+        base = np.tile(np.arange(self.num_cidades), (tamanho, 1))
+        return rng.permuted(base, axis=1)
+
+    def funcao_objetivo(self, individuo):
+        """Distância percorrida no caminho `individuo`, voltando ao início."""
+        individuo = np.asarray(individuo)
+        return float(self.distancia(individuo, np.roll(individuo, -1)).sum())
+
+    def funcao_objetivo_pop(self, populacao):
+        """Distância percorrida por todos os caminhos da população.
+
+        Args:
+          populacao: array (tamanho, num_cidades) ou lista de caminhos
+            codificados como índices.
+
+        Returns:
+          Array com a distância de cada caminho, incluindo a volta para a
+          cidade inicial.
+        """
+        populacao = np.asarray(populacao)
+        proximas = np.roll(populacao, -1, axis=1)
+        return self.distancia(populacao, proximas).sum(axis=1)
+
+    # Mutações com avaliação incremental: em vez de percorrer o caminho inteiro
+    # de novo, calculamos apenas a variação de distância nas arestas afetadas.
+
+    def _custo_arestas(self, individuo, posicoes):
+        """Soma as arestas que saem das `posicoes` (sem repetição) do caminho."""
+        n = len(individuo)
+        custo = 0.0
+        for k in set(p % n for p in posicoes):
+            custo += self.distancia(individuo[k], individuo[(k + 1) % n])
+        return custo
+
+    def delta_troca(self, individuo, i, j):
+        """Variação da distância ao trocar as cidades das posições `i` e `j`.
+
+        Apenas as (no máximo) quatro arestas que tocam as duas posições mudam.
+        O indivíduo não é alterado.
+        """
+        posicoes = (i - 1, i, j - 1, j)
+        antes = self._custo_arestas(individuo, posicoes)
+        individuo[i], individuo[j] = individuo[j], individuo[i]
+        depois = self._custo_arestas(individuo, posicoes)
+        individuo[i], individuo[j] = individuo[j], individuo[i]
+        return float(depois - antes)
+
+    def delta_2opt(self, individuo, i, j):
+        """Variação da distância ao inverter o trecho `individuo[i:j + 1]`.
+
+        Com i < j, a inversão troca as arestas (i-1, i) e (j, j+1) pelas
+        arestas (i-1, j) e (i, j+1). O indivíduo não é alterado.
+        """
+        n = len(individuo)
+        if i == 0 and j == n - 1:
+            return 0.0  # inverter o caminho todo não muda a distância
+        d = self.distancia
+        a, b = individuo[i - 1], individuo[i]
+        c, e = individuo[j], individuo[(j + 1) % n]
+        return float(d(a, c) + d(b, e) - d(a, b) - d(c, e))
+
+    def vizinhos(self, k=10):
+        """Lista, para cada cidade, as `k` cidades mais próximas.
+
+        A lista é calculada no primeiro uso e guardada para os próximos.
+
+        Returns:
+          Array (n, k) com os índices dos vizinhos e array (n, k) com as
+          distâncias até eles, do mais próximo ao mais distante.
+        """
+        if k not in self._vizinhos:
+            if self.distancias is not None:
+                indices = vizinhos_mais_proximos(self.distancias, k)
+                distancias = np.take_along_axis(self.distancias, indices, axis=1)
+            else:
+                if self.indice_espacial is None:
+                    self.indice_espacial = IndiceEspacial(self.coordenadas)
+                indices, distancias = self.indice_espacial.vizinhos(k)
+            self._vizinhos[k] = (indices, distancias)
+        return self._vizinhos[k]
+
+    def caminho_guloso(self, inicio=0, k=10):
+        """Constrói um caminho pelo vizinho mais próximo usando os candidatos.
+
+        Args:
+          inicio: índice da cidade de partida.
+          k: número de vizinhos candidatos de cada cidade.
+
+        Returns:
+          Array com o caminho construído.
+        """
+        indices, distancias = self.vizinhos(k)
+        return vizinho_mais_proximo_candidatos(self.coordenadas, indices, distancias, inicio)
+
+    @_retorna_delta
+    def mutacao_2opt_vizinhos(self, individuo, rng=None, k=10):
+        """Mutação 2-opt que liga uma cidade a um dos seus vizinhos candidatos.
+
+        Uma cidade é sorteada e o trecho que a separa de um dos seus `k`
+        vizinhos mais próximos é invertido, de forma que as duas passam a ser
+        vizinhas no caminho. Movimentos entre cidades próximas têm muito mais
+        chance de melhorar o caminho do que os movimentos entre duas posições
+        quaisquer.
+
+        Returns:
+          O indivíduo com um trecho invertido e a variação da distância
+          percorrida causada pela inversão.
+        """
+        rng = _gerador(rng)
+        indices, _ = self.vizinhos(k)
+        n = len(individuo)
+        a = rng.integers(n)
+        c = indices[a, rng.integers(indices.shape[1])]
+        posicao_a = int(np.flatnonzero(individuo == a)[0])
+        posicao_c = int(np.flatnonzero(individuo == c)[0])
+        # inverte o trecho depois de a até c, criando a aresta (a, c)
+        i, j = sorted((posicao_a, posicao_c))
+        i += 1
+        if i > j:
+            return individuo, 0.0
+        delta = self.delta_2opt(individuo, i, j)
+        individuo[i : j + 1] = individuo[i : j + 1][::-1].copy()
+        return individuo, delta
+
+    def busca_local_2opt(self, individuo, prazo=None, k=10):
+        """Melhora um caminho com 2-opt restrito aos `k` vizinhos mais próximos.
+
+        Args:
+          individuo: array de índices representando um caminho.
+          prazo: instante (`time.perf_counter()`) em que a busca deve parar.
+          k: número de vizinhos candidatos de cada cidade.
+
+        Returns:
+          O caminho melhorado e a variação da distância percorrida.
+        """
+        indices, distancias = self.vizinhos(k)
+        return dois_opt_vizinhos(individuo, self.distancia, indices, prazo, distancias)
+
+    @_retorna_delta
+    def mutacao_de_troca(self, individuo, rng=None):
+        """Troca duas cidades de posição e calcula a variação da distância.
+
+        Args:
+          individuo: array de índices representando um caminho.
+          rng: gerador `numpy.random.Generator` (opcional).
+
+        Returns:
+          O indivíduo com duas cidades trocadas e a variação da distância
+          percorrida causada pela troca.
+        """
+        rng = _gerador(rng)
+        i, j = rng.choice(len(individuo), size=2, replace=False)
+        delta = self.delta_troca(individuo, i, j)
+        individuo[i], individuo[j] = individuo[j], individuo[i]
+        return individuo, delta
+
+    @_retorna_delta
+    def mutacao_2opt(self, individuo, rng=None):
+        """Inverte um trecho do caminho e calcula a variação da distância.
+
+        Args:
+          individuo: array de índices representando um caminho.
+          rng: gerador `numpy.random.Generator` (opcional).
+
+        Returns:
+          O indivíduo com um trecho invertido e a variação da distância
+          percorrida causada pela inversão.
+        """
+        rng = _gerador(rng)
+        i, j = sorted(rng.choice(len(individuo), size=2, replace=False))
+        delta = self.delta_2opt(individuo, i, j)
+        individuo[i : j + 1] = individuo[i : j + 1][::-1].copy()
+        return individuo, delta
+
+    @_retorna_delta
+    def mutacao_de_troca_pop(self, populacao, chance_mutacao, rng=None):
+        """Mutação de troca aplicada na população toda, com variação da distância.
+
+        Args:
+          populacao: array (tamanho, num_cidades) de caminhos.
+          chance_mutacao: probabilidade de cada indivíduo sofrer mutação.
+          rng: gerador `numpy.random.Generator` (opcional).
+
+        Returns:
+          A população mutada, um array booleano indicando quais indivíduos
+          foram alterados e um array com a variação da distância de cada
+          indivíduo (zero para quem não foi mutado).
+        """
+        rng = _gerador(rng)
+        n = populacao.shape[1]
+        linhas = np.flatnonzero(rng.random(len(populacao)) <= chance_mutacao)
+        i = rng.integers(0, n, size=len(linhas))
+        j = (i + rng.integers(1, n, size=len(linhas))) % n
+
+        # arestas afetadas, identificadas pela posição de onde saem; arestas
+        # repetidas (cidades vizinhas) recebem peso zero para contar uma vez
+        arestas = np.sort(np.stack((i - 1, i, j - 1, j), axis=1) % n, axis=1)
+        peso = np.ones(arestas.shape)
+        peso[:, 1:] = arestas[:, 1:] != arestas[:, :-1]
+        coluna = linhas[:, None]
+
+        def custo():
+            partida = populacao[coluna, arestas]
+            chegada = populacao[coluna, (arestas + 1) % n]
+            return (self.distancia(partida, chegada) * peso).sum(axis=1)
+
+        antes = custo()
+        populacao[linhas, i], populacao[linhas, j] = populacao[linhas, j], populacao[linhas, i]
+        depois = custo()
+
+        alterados = np.zeros(len(populacao), dtype=bool)
+        alterados[linhas] = True
+        deltas = np.zeros(len(populacao))
+        deltas[linhas] = depois - antes
+        return populacao, alterados, deltas
+
+
+###############################################################################
+#                        Experimento mochila A.07                             #
+###############################################################################
+
+
+class ProblemaMochila:
+    """Problema da mochila com valores e pesos em vetores NumPy.
+
+    O dicionário `objetos` é convertido uma única vez em dois vetores
+    alinhados com `ordem_dos_nomes`. Assim o valor e o peso de todas as
+    mochilas da população saem de dois produtos matriz-vetor, no lugar de
+    consultar o dicionário item por item.
+
+    Args:
+      objetos: dicionário onde as chaves são os nomes dos objetos e os valores
+        são dicionários com a informação do peso e valor.
+      limite: número indicando o limite de peso que a mochila aguenta.
+      ordem_dos_nomes: lista contendo a ordem dos nomes dos objetos. Por
+        padrão, a ordem das chaves de `objetos`.
+    """
+
+    def __init__(self, objetos, limite, ordem_dos_nomes=None):
+        if ordem_dos_nomes is None:
+            ordem_dos_nomes = list(objetos.keys())
+        self.ordem_dos_nomes = list(ordem_dos_nomes)
+        self.limite = limite
+        self.num_objetos = len(self.ordem_dos_nomes)
+        self.valores = np.array([objetos[nome]["valor"] for nome in self.ordem_dos_nomes], dtype=float)
+        self.pesos = np.array([objetos[nome]["peso"] for nome in self.ordem_dos_nomes], dtype=float)
+
+    def populacao_inicial(self, tamanho, rng=None):
+        """Cria a população inicial como um array binário (tamanho, num_objetos)."""
+        return populacao_cb_np(tamanho, self.num_objetos, rng)
+
+    def computa_mochila_pop(self, populacao):
+        """Computa o valor total e o peso total de todas as mochilas.
+
+        Args:
+          populacao: array binário (tamanho, num_objetos) ou lista de
+            indivíduos.
+
+        Returns:
+          Dois arrays: o valor total e o peso total de cada mochila.
+        """
+        populacao = np.asarray(populacao)
+        return populacao @ self.valores, populacao @ self.pesos
+
+    def funcao_objetivo_pop(self, populacao):
+        """Computa a função objetivo de todas as mochilas da população.
+
+        Mochilas que passam do limite de peso recebem o valor 0.01, como em
+        `funcao_objetivo_mochila`.
+
+        Returns:
+          Array com o valor de cada mochila considerando a penalidade.
+        """
+        valor, peso = self.computa_mochila_pop(populacao)
+        return np.where(peso > self.limite, 0.01, valor)
+
+    def funcao_objetivo(self, individuo):
+        """Computa a função objetivo de uma única mochila."""
+        return float(self.funcao_objetivo_pop(np.asarray(individuo)[None, :])[0])
+
+
+###############################################################################
+#                          Experimento liga ternária                          #
+###############################################################################
+
+
+class ProblemaLigaTernaria:
+    """Problema da liga ternária mais cara com representação esparsa.
+
+    No lugar de uma lista com 92 massas onde apenas três são diferentes de
+    zero, cada indivíduo guarda só os índices dos três elementos da liga e as
+    suas três massas. A população é um array estruturado do NumPy com os
+    campos `elementos` (tamanho, 3) e `massas` (tamanho, 3), então o preço de
+    todas as ligas sai de uma única indexação do vetor de preços.
+
+    Todos os indivíduos respeitam as restrições do problema: três elementos
+    diferentes, cada um com pelo menos `massa_minima` gramas e massa total de
+    `massa_total` gramas. O cruzamento e a mutação preservam essas restrições.
+
+    Args:
+      preco: dicionário que relaciona o elemento e o seu preço ($/kg). Por
+        padrão, o dicionário `preco` de `constantes.py`.
+      massa_total: massa total da liga, em gramas.
+      massa_minima: massa mínima de cada elemento da liga, em gramas.
+    """
+
+    NUM_ELEMENTOS = 3
+
+    def __init__(self, preco=None, massa_total=100, massa_minima=5):
+        if preco is None:
+            preco = PRECO
+        self.simbolos = list(preco.keys())
+        self.precos = np.array(list(preco.values()), dtype=float)
+        self.massa_total = massa_total
+        self.massa_minima = massa_minima
+        self.tipo = np.dtype(
+            [
+                ("elementos", np.intp, (self.NUM_ELEMENTOS,)),
+                ("massas", float, (self.NUM_ELEMENTOS,)),
+            ]
+        )
+
+    def populacao_inicial(self, tamanho, rng=None):
+        """Cria a população inicial de ligas válidas.
+
+        Os três elementos são sorteados sem repetição e a massa que sobra
+        depois de garantir a massa mínima é dividida aleatoriamente entre eles.
+
+        Args:
+          tamanho: número de indivíduos da população.
+          rng: gerador `numpy.random.Generator` (opcional).
+
+        Returns:
+          Array estruturado com `tamanho` ligas.
+        """
+        rng = _gerador(rng)
+        populacao = np.empty(tamanho, dtype=self.tipo)
+        sorteio = rng.random((tamanho, len(self.precos)))
+        populacao["elementos"] = np.argpartition(sorteio, self.NUM_ELEMENTOS, axis=1)[
+            :, : self.NUM_ELEMENTOS
+        ]
+        livre = self.massa_total - self.NUM_ELEMENTOS * self.massa_minima
+        proporcoes = rng.dirichlet(np.ones(self.NUM_ELEMENTOS), size=tamanho)
+        populacao["massas"] = self.massa_minima + livre * proporcoes
+        return populacao
+
+    def funcao_objetivo_pop(self, populacao):
+        """Calcula o preço de todas as ligas da população.
+
+        Returns:
+          Array com o preço de cada liga, usando a massa em gramas e o preço
+          em $/kg (como em `funcao_objetivo_lt`).
+        """
+        precos = self.precos[populacao["elementos"]]
+        return (populacao["massas"] * precos).sum(axis=1) / 1000
+
+    def decodifica(self, individuo):
+        """Retorna um dicionário com a massa de cada elemento da liga."""
+        return {
+            self.simbolos[elemento]: float(massa)
+            for elemento, massa in zip(individuo["elementos"], individuo["massas"])
+        }
+
+    def cruzamento_pop(self, populacao, chance_cruzamento, rng=None):
+        """Cruzamento de todos os pares (0, 1), (2, 3), ... da população.
+
+        As massas dos filhos são uma média ponderada das massas dos pais, o que
+        mantém a massa total e a massa mínima. Cada posição de elemento é
+        trocada entre os pais com chance de 50%; se a troca repetir um elemento
+        que o filho já tem, aquela posição fica com o elemento original.
+
+        Args:
+          populacao: array estruturado de ligas.
+          chance_cruzamento: probabilidade de cada par cruzar.
+          rng: gerador `numpy.random.Generator` (opcional).
+
+        Returns:
+          A população com os filhos no lugar dos pais e um array booleano
+          indicando quais indivíduos foram alterados.
+        """
+        rng = _gerador(rng)
+        cruza = np.flatnonzero(rng.random(len(populacao) // 2) <= chance_cruzamento)
+        pais = populacao[2 * cruza]
+        maes = populacao[2 * cruza + 1]
+
+        peso = rng.random((len(cruza), 1))
+        troca = rng.random((len(cruza), self.NUM_ELEMENTOS)) < 0.5
+
+        def gera_filho(doador, outro, troca):
+            troca = troca.copy()
+            for _ in range(self.NUM_ELEMENTOS):
+                elementos = np.where(troca, outro["elementos"], doador["elementos"])
+                # um elemento vindo do outro pai que já aparece em uma posição
+                # não trocada do filho é uma repetição
+                repetido = troca & (
+                    (elementos[:, :, None] == elementos[:, None, :]).sum(axis=2) > 1
+                )
+                if not repetido.any():
+                    break
+                troca &= ~repetido
+            filho = doador.copy()
+            filho["elementos"] = elementos
+            return filho
+
+        filhos1 = gera_filho(pais, maes, troca)
+        filhos2 = gera_filho(maes, pais, troca)
+        filhos1["massas"] = peso * pais["massas"] + (1 - peso) * maes["massas"]
+        filhos2["massas"] = peso * maes["massas"] + (1 - peso) * pais["massas"]
+        populacao[2 * cruza] = filhos1
+        populacao[2 * cruza + 1] = filhos2
+
+        alterados = np.zeros(len(populacao), dtype=bool)
+        alterados[2 * cruza] = True
+        alterados[2 * cruza + 1] = True
+        return populacao, alterados
+
+    def mutacao_pop(self, populacao, chance_mutacao, rng=None):
+        """Mutação de todas as ligas da população, preservando as restrições.
+
+        Metade das ligas mutadas troca um dos seus elementos por outro que
+        ainda não está na liga (mantendo a massa). A outra metade transfere
+        parte da massa de um elemento para outro, sem deixar nenhum abaixo da
+        massa mínima.
+
+        Args:
+          populacao: array estruturado de ligas.
+          chance_mutacao: probabilidade de cada indivíduo sofrer mutação.
+          rng: gerador `numpy.random.Generator` (opcional).
+
+        Returns:
+          A população mutada e um array booleano indicando quais indivíduos
+          foram alterados.
+        """
+        rng = _gerador(rng)
+        n = self.NUM_ELEMENTOS
+        linhas = np.flatnonzero(rng.random(len(populacao)) <= chance_mutacao)
+        troca_elemento = rng.random(len(linhas)) < 0.5
+
+        # troca de elemento: sorteia entre os elementos que não estão na liga,
+        # pulando os já presentes (em ordem crescente)
+        linhas_e = linhas[troca_elemento]
+        elementos = populacao["elementos"][linhas_e]
+        novo = rng.integers(0, len(self.precos) - n, size=len(linhas_e))
+        for presente in np.sort(elementos, axis=1).T:
+            novo += novo >= presente
+        posicao = rng.integers(0, n, size=len(linhas_e))
+        elementos[np.arange(len(linhas_e)), posicao] = novo
+        populacao["elementos"][linhas_e] = elementos
+
+        # transferência de massa entre duas posições diferentes
+        linhas_m = linhas[~troca_elemento]
+        massas = populacao["massas"][linhas_m]
+        origem = rng.integers(0, n, size=len(linhas_m))
+        destino = (origem + rng.integers(1, n, size=len(linhas_m))) % n
+        indices = np.arange(len(linhas_m))
+        quantidade = rng.random(len(linhas_m)) * (massas[indices, origem] - self.massa_minima)
+        massas[indices, origem] -= quantidade
+        massas[indices, destino] += quantidade
+        populacao["massas"][linhas_m] = massas
+
+        alterados = np.zeros(len(populacao), dtype=bool)
+        alterados[linhas] = True
+        return populacao, alterados
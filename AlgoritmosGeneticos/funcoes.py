@@ -33,7 +33,7 @@ def distancia_entre_dois_pontos(a, b):
 
 
 
-def cria_cidades(n):
+def cria_cidades(n, rng=random):
     """Cria um dicionário aleatório de cidades com suas posições (x,y).
     
     Args:
@@ -48,28 +48,53 @@ def cria_cidades(n):
     cidades = {}
 
     for i in range(n):
-        cidades[f"Cidade {i}"] = (random.random(), random.random())
+        cidades[f"Cidade {i}"] = (rng.random(), rng.random())
 
     return cidades
 
 
+
+# Todas as funções que sorteiam alguma coisa aceitam um argumento opcional `rng`.
+# Nas funções que trabalham com listas, `rng` é qualquer objeto com a interface do
+# módulo `random` (o próprio módulo, que é o padrão, um `random.Random(semente)` ou
+# um `ContextoOperadores` de classes.py). Nas funções com NumPy, `rng` é um
+# `numpy.random.Generator` ou um `ContextoOperadores`.
+
+_GERADOR = np.random.default_rng()
+
+
+def _gerador(rng):
+    """Retorna o gerador de números aleatórios do NumPy a ser utilizado.
+    
+    Args:
+      rng: um `numpy.random.Generator`, um `ContextoOperadores` ou None. Quando
+        None, é utilizado o gerador padrão deste módulo.
+        
+    Returns:
+      O gerador recebido, o gerador do contexto ou o gerador padrão do módulo.
+    """
+    if rng is None:
+        return _GERADOR
+    return getattr(rng, "gerador", rng)
+
+
 ###############################################################################
 #                           Experimento caixas binárias                       #
 #                                busca aleatória                              #
 ###############################################################################
 
-def gene_caixabinaria():
+def gene_caixabinaria(rng=random):
     """ gera um gene válido para o problema das caixas binarias
     Return:
      Um valor zero ou um.
      """
     lista = [0,1]
-    gene = random.choice(lista)
+    gene = rng.choice(lista)
     return gene
 
 
      
-def individuo_cb(n):
+def individuo_cb(n, rng=random):
     """ gera um indivíduo para o problema das caixas binárias. 
 
     Args: 
@@ -80,7 +105,7 @@ def individuo_cb(n):
      """
     individuo = []
     for i in range(n):
-        gene = gene_caixabinaria()
+        gene = gene_caixabinaria(rng)
         individuo.append(gene)
     return individuo
 
@@ -105,7 +130,7 @@ def funcao_objetivo_cb(individuo):
 ###############################################################################
 
 
-def populacao_cb(tamanho, n):
+def populacao_cb(tamanho, n, rng=random):
     """Cria uma população no problema das caixas binárias a partir de individuos
     
     Args: 
@@ -118,7 +143,7 @@ def populacao_cb(tamanho, n):
     """
     populacao = []
     for _ in range(tamanho):
-        populacao.append(individuo_cb(n))
+        populacao.append(individuo_cb(n, rng))
     return populacao
 
 
@@ -144,7 +169,7 @@ def funcao_objetivo_pop_cb(populacao):
 
 
 
-def selecao_roleta_max(populacao, fitness):
+def selecao_roleta_max(populacao, fitness, rng=random):
     """ Seleciona indivíduos de uma população usando o método da roleta.
     
     Nota: apenas funciona para problemas de maximização.
@@ -157,12 +182,12 @@ def selecao_roleta_max(populacao, fitness):
         População dos indivíduos selecionados.
     
     """
-    populacao_selecionada = random.choices(populacao, weights=fitness, k=len(populacao))
+    populacao_selecionada = rng.choices(populacao, weights=fitness, k=len(populacao))
     return populacao_selecionada
 
 
 
-def cruzamento_ponto_simples(pai, mae):
+def cruzamento_ponto_simples(pai, mae, rng=random):
     """ Operador de cruzamento de ponto simples.
     
     Args:
@@ -172,7 +197,7 @@ def cruzamento_ponto_simples(pai, mae):
         Duas listas,s sendo que cada uma representa um filho dos pais que foram os argumentos.
     """
 
-    ponto_de_corte = random.randint(1,len(pai)-1)
+    ponto_de_corte = rng.randint(1,len(pai)-1)
         
     filho1 = pai[:ponto_de_corte]+mae[ponto_de_corte:]
     filho2 = mae[:ponto_de_corte]+pai[ponto_de_corte:]
@@ -180,7 +205,7 @@ def cruzamento_ponto_simples(pai, mae):
     return filho1, filho2
 
 
-def mutacao_cb(individuo):
+def mutacao_cb(individuo, rng=random):
     """ Realiza a mutação de um gene no problema das caixas binárias.
     
     Args: 
@@ -190,8 +215,8 @@ def mutacao_cb(individuo):
         Um indivíduo com um gene mutado.
     """
     
-    gene_a_ser_mutado = random.randint(0, len(individuo) - 1)
-    individuo[gene_a_ser_mutado] = gene_caixabinaria()
+    gene_a_ser_mutado = rng.randint(0, len(individuo) - 1)
+    individuo[gene_a_ser_mutado] = gene_caixabinaria(rng)
     return individuo
 
 
@@ -200,7 +225,7 @@ def mutacao_cb(individuo):
 #                            algoritmos genéticos                             #
 ###############################################################################
 
-def gene_cnb(valor_max_caixa):
+def gene_cnb(valor_max_caixa, rng=random):
     """ Gera um gene válido para o problema das caixas não binárias.
     
     Arg:
@@ -209,11 +234,11 @@ def gene_cnb(valor_max_caixa):
     Return: 
         Um valor de 0 a "valor_max_caixa" incluso
     """
-    gene = random.randint(0, valor_max_caixa)
+    gene = rng.randint(0, valor_max_caixa)
     return gene
 
 
-def individuo_cnb(numero_gene, valor_max_caixa):
+def individuo_cnb(numero_gene, valor_max_caixa, rng=random):
     """ Gera um indivíduo válido para o problema das caixas não biárias. Com o número de genes e o valor m´ximo que cada gene assume.
     
     Args:
@@ -225,12 +250,12 @@ def individuo_cnb(numero_gene, valor_max_caixa):
     """
     individuo = []
     for _ in range(numero_gene):
-        gene = gene_cnb(valor_max_caixa)
+        gene = gene_cnb(valor_max_caixa, rng)
         individuo.append(gene)
     return individuo
 
 
-def populacao_cnb(tamanho_populacao, numero_gene, valor_max_caixa):
+def populacao_cnb(tamanho_populacao, numero_gene, valor_max_caixa, rng=random):
     """ Cria uma população de individuos para o problema das caixas não-binárias
     
     Args:
@@ -243,7 +268,7 @@ def populacao_cnb(tamanho_populacao, numero_gene, valor_max_caixa):
     """
     populacao = []
     for _ in range(tamanho_populacao):
-        populacao.append(individuo_cnb(numero_gene, valor_max_caixa))
+        populacao.append(individuo_cnb(numero_gene, valor_max_caixa, rng))
     return populacao
 
 
@@ -277,7 +302,7 @@ def funcao_objetivo_pop_cnb(populacao):
     return fitness
 
 
-def mutacao_cnb(individuo, valor_max_caixa):
+def mutacao_cnb(individuo, valor_max_caixa, rng=random):
     """Realiza a mutação de um gene no problema das caixas não-binárias
     
     Args:
@@ -291,17 +316,165 @@ def mutacao_cnb(individuo, valor_max_caixa):
       Um individuo com um gene mutado.
     """
     
-    gene_a_ser_mutado = random.randint(0, len(individuo) - 1)
-    individuo[gene_a_ser_mutado] = gene_cnb(valor_max_caixa)
+    gene_a_ser_mutado = rng.randint(0, len(individuo) - 1)
+    individuo[gene_a_ser_mutado] = gene_cnb(valor_max_caixa, rng)
     return individuo
 
+###############################################################################
+#                   Caixas binárias e não binárias com NumPy                  #
+###############################################################################
+# Nesta representação a população inteira é um único array de inteiros com
+# formato (tamanho_populacao, numero_genes). Os operadores trabalham sobre a
+# população toda de uma vez e retornam, junto com a população, um array
+# booleano indicando quais indivíduos foram alterados (ver AlgoritmoGenetico
+# com operadores_em_lote=True em classes.py).
+
+def populacao_cb_np(tamanho, n, rng=None):
+    """Cria uma população no problema das caixas binárias como um array NumPy.
+    
+    Args:
+      tamanho: número de indivíduos da população.
+      n: número de genes de um indivíduo.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      Array de inteiros com formato (tamanho, n) contendo zeros e uns.
+    """
+    return _gerador(rng).integers(0, 2, size=(tamanho, n), dtype=np.int8)
+
+
+def populacao_cnb_np(tamanho_populacao, numero_gene, valor_max_caixa, rng=None):
+    """Cria uma população no problema das caixas não binárias como um array NumPy.
+    
+    Args:
+      tamanho_populacao: número de indivíduos da população.
+      numero_gene: número de genes de um indivíduo.
+      valor_max_caixa: valor máximo que a caixa pode assumir.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      Array de inteiros com formato (tamanho_populacao, numero_gene) com
+      valores de 0 a `valor_max_caixa` incluso.
+    """
+    tipo = np.min_scalar_type(valor_max_caixa)
+    return _gerador(rng).integers(
+        0, valor_max_caixa, size=(tamanho_populacao, numero_gene), dtype=tipo,
+        endpoint=True,
+    )
+
+
+def funcao_objetivo_pop_cb_np(populacao):
+    """Calcula a função objetivo das caixas binárias para a população toda.
+    
+    Args:
+      populacao: array com formato (tamanho_populacao, numero_genes).
+      
+    Returns:
+      Array com a fitness de cada indivíduo (soma dos genes mais um).
+    """
+    return populacao.sum(axis=1) + 1
+
+
+def funcao_objetivo_pop_cnb_np(populacao):
+    """Calcula a função objetivo das caixas não binárias para a população toda.
+    
+    Args:
+      populacao: array com formato (tamanho_populacao, numero_genes).
+      
+    Returns:
+      Array com a fitness de cada indivíduo (soma dos genes).
+    """
+    return populacao.sum(axis=1)
+
+
+def cruzamento_ponto_simples_np(populacao, chance_cruzamento, rng=None):
+    """Cruzamento de ponto simples aplicado em todos os pares da população.
+    
+    Os pares são formados pelas linhas (0, 1), (2, 3), ... Cada par cruza com
+    probabilidade `chance_cruzamento` e tem seu próprio ponto de corte. Os
+    genes a partir do ponto de corte são trocados entre os pais de uma só vez
+    através de uma máscara. A população é alterada no próprio array.
+    
+    Args:
+      populacao: array com formato (tamanho_populacao, numero_genes).
+      chance_cruzamento: probabilidade de cada par cruzar.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      A população com os filhos no lugar dos pais e um array booleano
+      indicando quais indivíduos foram alterados.
+    """
+    rng = _gerador(rng)
+    num_pares = len(populacao) // 2
+    numero_genes = populacao.shape[1]
+
+    pais = populacao[0 : 2 * num_pares : 2]
+    maes = populacao[1 : 2 * num_pares : 2]
+
+    cruza = rng.random(num_pares) <= chance_cruzamento
+    cortes = rng.integers(1, numero_genes, size=num_pares)
+    troca = (np.arange(numero_genes) >= cortes[:, None]) & cruza[:, None]
+
+    pais[troca], maes[troca] = maes[troca], pais[troca]
+
+    alterados = np.zeros(len(populacao), dtype=bool)
+    alterados[0 : 2 * num_pares : 2] = cruza
+    alterados[1 : 2 * num_pares : 2] = cruza
+    return populacao, alterados
+
+
+def _mutacao_np(populacao, chance_mutacao, valor_max, rng):
+    """Sorteia um gene de cada indivíduo mutado e escreve um novo valor nele."""
+    linhas = np.flatnonzero(rng.random(len(populacao)) <= chance_mutacao)
+    genes = rng.integers(0, populacao.shape[1], size=len(linhas))
+    populacao[linhas, genes] = rng.integers(0, valor_max, size=len(linhas), endpoint=True)
+
+    alterados = np.zeros(len(populacao), dtype=bool)
+    alterados[linhas] = True
+    return populacao, alterados
+
+
+def mutacao_cb_np(populacao, chance_mutacao, rng=None):
+    """Mutação das caixas binárias aplicada na população toda.
+    
+    Cada indivíduo sofre mutação com probabilidade `chance_mutacao`; nesse
+    caso um de seus genes é sorteado e recebe um novo valor zero ou um. A
+    população é alterada no próprio array.
+    
+    Args:
+      populacao: array com formato (tamanho_populacao, numero_genes).
+      chance_mutacao: probabilidade de cada indivíduo sofrer mutação.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      A população mutada e um array booleano indicando quais indivíduos foram
+      alterados.
+    """
+    return _mutacao_np(populacao, chance_mutacao, 1, _gerador(rng))
+
+
+def mutacao_cnb_np(populacao, chance_mutacao, valor_max_caixa, rng=None):
+    """Mutação das caixas não binárias aplicada na população toda.
+    
+    Args:
+      populacao: array com formato (tamanho_populacao, numero_genes).
+      chance_mutacao: probabilidade de cada indivíduo sofrer mutação.
+      valor_max_caixa: maior número inteiro possível dentro de uma caixa.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      A população mutada e um array booleano indicando quais indivíduos foram
+      alterados.
+    """
+    return _mutacao_np(populacao, chance_mutacao, valor_max_caixa, _gerador(rng))
+
 ###############################################################################
 #                        Experimento descobrindo a senha                      #
 #                            algoritmos genéticos                             #
 ###############################################################################
 #Esse é um problema de minimização
 
-def gene_letra(letras): #agora os genes são as letras que podemos ter 
+def gene_letra(letras, rng=random): #agora os genes são as letras que podemos ter 
     """Sorteia uma letra.
     
     Args:
@@ -311,10 +484,10 @@ def gene_letra(letras): #agora os genes são as letras que podemos ter
       Retorna uma letra dentro das possíveis de serem sorteadas.
     """
     
-    letra = random.choice(letras)
+    letra = rng.choice(letras)
     return letra
 
-def individuo_senha(tamanho_senha, letras):
+def individuo_senha(tamanho_senha, letras, rng=random):
     """Cria um candidato para o problema da senha
     
     Args:
@@ -328,11 +501,11 @@ def individuo_senha(tamanho_senha, letras):
     candidato = []
 
     for n in range(tamanho_senha):
-        candidato.append(gene_letra(letras))
+        candidato.append(gene_letra(letras, rng))
 
     return candidato
 
-def populacao_inicial_senha(tamanho, tamanho_senha, letras):
+def populacao_inicial_senha(tamanho, tamanho_senha, letras, rng=random):
     """Cria população inicial no problema da senha
     
     Args
@@ -345,11 +518,11 @@ def populacao_inicial_senha(tamanho, tamanho_senha, letras):
     """
     populacao = []
     for n in range(tamanho):
-        populacao.append(individuo_senha(tamanho_senha, letras))
+        populacao.append(individuo_senha(tamanho_senha, letras, rng))
     return populacao
 
 
-def selecao_torneio_min(populacao, fitness, tamanho_torneio=3):
+def selecao_torneio_min(populacao, fitness, tamanho_torneio=3, rng=random):
     """Faz a seleção de uma população usando torneio.
     Nota: da forma que está implementada, só funciona em problemas de
     minimização. 
@@ -367,7 +540,7 @@ def selecao_torneio_min(populacao, fitness, tamanho_torneio=3):
     par_populacao_fitness = list(zip(populacao, fitness)) # zip lsta de tuplas, onde a i-ésima tupla contém o i-ésimo elemento de cada um dos argumentos
 
     for _ in range(len(populacao)): 
-        combatentes = random.sample(par_populacao_fitness, tamanho_torneio) 
+        combatentes = rng.sample(par_populacao_fitness, tamanho_torneio) 
         
         minimo_fitness = float("inf")
 
@@ -384,7 +557,7 @@ def selecao_torneio_min(populacao, fitness, tamanho_torneio=3):
 
     return selecionados 
 
-def mutacao_senha(individuo, letras): 
+def mutacao_senha(individuo, letras, rng=random): 
     """Realiza a mutação de um gene no problema da senha.
     
     Args:
@@ -394,8 +567,8 @@ def mutacao_senha(individuo, letras):
     Return:
       Um individuo (senha) com um gene mutado.
     """
-    gene = random.randint(0, len(individuo) - 1)
-    individuo[gene] = gene_letra(letras)
+    gene = rng.randint(0, len(individuo) - 1)
+    individuo[gene] = gene_letra(letras, rng)
     return individuo
 
 def funcao_objetivo_senha(individuo, senha_verdadeira):
@@ -433,13 +606,102 @@ def funcao_objetivo_pop_senha(populacao, senha_verdadeira):
 
     return resultado
 
+###############################################################################
+#                    Descobrindo a senha com NumPy                            #
+###############################################################################
+# Nesta representação cada letra é guardada pelo seu código (o valor de
+# `ord`) em um array de inteiros sem sinal, e a população é um array
+# (tamanho, tamanho_senha). Assim a distância de todos os candidatos até a
+# senha é calculada de uma só vez, sem chamar `ord` letra por letra.
+
+def codifica_senha(texto):
+    """Converte um texto (ou uma sequência de letras) em um array de códigos.
+    
+    Args:
+      texto: string ou lista de letras.
+      
+    Returns:
+      Array com o código (`ord`) de cada letra. O tipo é `uint8` quando todas
+      as letras cabem em um byte.
+    """
+    codigos = np.fromiter((ord(letra) for letra in texto), dtype=np.uint32)
+    if len(codigos) == 0 or codigos.max() < 256:
+        return codigos.astype(np.uint8)
+    return codigos
+
+
+def decodifica_senha(individuo):
+    """Converte um array de códigos de volta em uma string."""
+    return "".join(map(chr, individuo.tolist()))
+
+
+def populacao_inicial_senha_np(tamanho, tamanho_senha, letras, rng=None):
+    """Cria população inicial no problema da senha como um array de códigos.
+    
+    Args:
+      tamanho: tamanho da população.
+      tamanho_senha: inteiro representando o tamanho da senha.
+      letras: letras possíveis de serem sorteadas, já codificadas com
+        `codifica_senha` (a tabela de códigos é sorteada diretamente).
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      Array (tamanho, tamanho_senha) com os códigos das letras.
+    """
+    sorteios = _gerador(rng).integers(0, len(letras), size=(tamanho, tamanho_senha))
+    return letras[sorteios]
+
+
+def funcao_objetivo_pop_senha_np(populacao, senha_verdadeira):
+    """Computa a funcao objetivo de toda a população no problema da senha.
+    
+    Args:
+      populacao: array (tamanho, tamanho_senha) com os códigos das letras.
+      senha_verdadeira: a senha que você está tentando descobrir, codificada
+        com `codifica_senha`.
+      
+    Returns:
+      Array com a distância de cada candidato até a senha verdadeira.
+    """
+    # convertemos para inteiros com sinal para a subtração não dar a volta
+    diferenca = populacao.astype(np.int32) - senha_verdadeira.astype(np.int32)
+    return np.abs(diferenca).sum(axis=1)
+
+
+def mutacao_senha_np(populacao, chance_mutacao, letras, rng=None):
+    """Mutação do problema da senha aplicada na população toda.
+    
+    Cada indivíduo sofre mutação com probabilidade `chance_mutacao`; nesse
+    caso uma de suas letras é sorteada e trocada. A população é alterada no
+    próprio array.
+    
+    Args:
+      populacao: array (tamanho, tamanho_senha) com os códigos das letras.
+      chance_mutacao: probabilidade de cada indivíduo sofrer mutação.
+      letras: letras possíveis, codificadas com `codifica_senha`.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      A população mutada e um array booleano indicando quais indivíduos foram
+      alterados.
+    """
+    rng = _gerador(rng)
+    linhas = np.flatnonzero(rng.random(len(populacao)) <= chance_mutacao)
+    genes = rng.integers(0, populacao.shape[1], size=len(linhas))
+    populacao[linhas, genes] = letras[rng.integers(0, len(letras), size=len(linhas))]
+
+    alterados = np.zeros(len(populacao), dtype=bool)
+    alterados[linhas] = True
+    return populacao, alterados
+
+
 ###############################################################################
 #                          Experimento liga ternária                          #
 #                            algoritmos genéticos                             #
 ###############################################################################
 
 
-def gene_lt(valor_max_peso): #valor da massa
+def gene_lt(valor_max_peso, rng=random): #valor da massa
     """ gera um gene válido para o problema da liga ternária mais cara. 
     
     Args: 
@@ -449,27 +711,41 @@ def gene_lt(valor_max_peso): #valor da massa
         gene: um valor dentro das condições
      
      """
-    gene = random.uniform(5,valor_max_peso) #aqui é garantido que o valor minímo de cada gene seja 5
+    gene = rng.uniform(5,valor_max_peso) #aqui é garantido que o valor minímo de cada gene seja 5
     return gene
 
 
 
-def individuo_lt(numero_genes, preco):
+def individuo_lt(numero_genes, preco, massa_total=100, massa_minima=5, rng=random):
     """ gera um indivíduo válido para o problema da liga ternária mais cara. 
 
+    Três elementos diferentes são sorteados e cada um recebe pelo menos
+    `massa_minima`; o que sobra da massa total é dividido aleatoriamente entre
+    eles (a mesma regra da `ProblemaLigaTernaria.populacao_inicial`).
+
     Args: 
         numero_genes: numero de genes do individuo
+        preco: dicionário que relaciona o elemento e o seu preço ($/kg)
+        massa_total: massa total da liga, em gramas
+        massa_minima: massa mínima de cada elemento da liga, em gramas
 
     Return:
-        individuo: lista contendo um indivíduo dentro com 92 genes
+        individuo: lista com `numero_genes` massas, das quais só três são
+        diferentes de zero
         
      """
-    
-pass
+    elementos = rng.sample(range(numero_genes), 3)
+    livre = massa_total - 3 * massa_minima
+    cortes = sorted([rng.random(), rng.random()])
+    partes = [cortes[0], cortes[1] - cortes[0], 1 - cortes[1]]
+    individuo = [0] * numero_genes
+    for elemento, parte in zip(elementos, partes):
+        individuo[elemento] = massa_minima + livre * parte
+    return individuo
 
 
 
-def populacao_inicial_lt(tamanho_populacao, numero_genes, preco): 
+def populacao_inicial_lt(tamanho_populacao, numero_genes, preco, rng=random): 
     """Cria população inicial composta de indivíduos da liga ternária
     
     Args
@@ -481,7 +757,7 @@ def populacao_inicial_lt(tamanho_populacao, numero_genes, preco):
     """
     populacao = []
     for _ in range(tamanho_populacao):
-        populacao.append(individuo_lt(numero_genes, preco))
+        populacao.append(individuo_lt(numero_genes, preco, rng=rng))
     return populacao
 
 
@@ -524,7 +800,7 @@ def funcao_objetivo_pop_lt(populacao, preco): #Salva a lista de todos os fitness
 
 
 
-def selecao_torneio_max(populacao, fitness, tamanho_torneio=3):
+def selecao_torneio_max(populacao, fitness, tamanho_torneio=3, rng=random):
     """Faz a seleção de uma população usando torneio.
     
     Nota: da forma que está implementada, só funciona em problemas de
@@ -542,7 +818,7 @@ def selecao_torneio_max(populacao, fitness, tamanho_torneio=3):
     selecionados = []
     par_populacao_fitness = list(zip(populacao, fitness))
     for _ in range(len(populacao)):
-        combatentes = random.sample(par_populacao_fitness, tamanho_torneio)
+        combatentes = rng.sample(par_populacao_fitness, tamanho_torneio)
         maximo_fitness = 0
         for par_individuo_fitness in combatentes:
             individuo = par_individuo_fitness[0]
@@ -554,41 +830,83 @@ def selecao_torneio_max(populacao, fitness, tamanho_torneio=3):
     return selecionados
 
 
-def cruzamento_ordenado_lt(pai, mae, numero_genes): 
-    """Operador de cruzamento que .
+def _elementos_lt(individuo):
+    """Índices dos elementos presentes (massa diferente de zero) em uma liga."""
+    return [i for i, massa in enumerate(individuo) if massa != 0]
+
+
+def cruzamento_ordenado_lt(pai, mae, numero_genes, rng=random): 
+    """Operador de cruzamento que preserva as restrições da liga ternária.
+
+    É a versão em lista do `ProblemaLigaTernaria.cruzamento_pop`: as massas
+    dos filhos são uma média ponderada das massas dos pais (posição a posição
+    entre os três elementos de cada um), o que mantém a massa total e a massa
+    mínima. Cada posição de elemento é trocada entre os pais com chance de
+    50%, a não ser que a troca repita um elemento que o filho já tem.
     
     Args:
       pai: uma lista representando um individuo
       mae: uma lista representando um individuo
+      numero_genes: numero de genes do individuo
       
     Returns:
       Duas listas, sendo que cada uma representa um filho dos pais que foram os
       argumentos. 
     """
-    pass
+    elementos_pai = _elementos_lt(pai)
+    elementos_mae = _elementos_lt(mae)
+    massas_pai = [pai[i] for i in elementos_pai]
+    massas_mae = [mae[i] for i in elementos_mae]
+    peso = rng.random()
+    troca = [rng.random() < 0.5 for _ in elementos_pai]
+
+    def gera_filho(doador, outro, massas_doador, massas_outro):
+        elementos = list(doador)
+        for k, trocar in enumerate(troca):
+            if trocar and outro[k] not in elementos:
+                elementos[k] = outro[k]
+        filho = [0] * numero_genes
+        for elemento, massa_d, massa_o in zip(elementos, massas_doador, massas_outro):
+            filho[elemento] = peso * massa_d + (1 - peso) * massa_o
+        return filho
+
+    filho1 = gera_filho(elementos_pai, elementos_mae, massas_pai, massas_mae)
+    filho2 = gera_filho(elementos_mae, elementos_pai, massas_mae, massas_pai)
+    return filho1, filho2
 
-def mutacao_troca_lt(individuo):
+def mutacao_troca_lt(individuo, massa_minima=5, rng=random):
     """ Realiza a mutação de um gene no problema das ligas ternárias.
+
+    Como na `ProblemaLigaTernaria.mutacao_pop`, metade das mutações troca um
+    dos elementos da liga por outro que ainda não está nela (levando a sua
+    massa) e a outra metade transfere parte da massa de um elemento para
+    outro, sem deixar nenhum abaixo de `massa_minima`. A massa total não muda.
     
     Args: 
         individuo: uma lista representando um indivíduo no problema das ligas ternárias
+        massa_minima: massa mínima de cada elemento da liga, em gramas
     
     Return:
         Um indivíduo com um gene mutado.
     """
-    #garantir que a soma continua em 100 
-    #troca -> pega um valor e troca em um local onde é 0
-    
-    gene_a_ser_mutado = random.randint(0, len(individuo) - 1) #aqui tem que ser onde o gene =! 0.
-    individuo[gene_a_ser_mutado] = gene_caixabinaria()
-    gene = np.countnonzero
+    elementos = _elementos_lt(individuo)
+    origem = rng.choice(elementos)
+    if rng.random() < 0.5:
+        ausentes = [i for i in range(len(individuo)) if individuo[i] == 0]
+        destino = rng.choice(ausentes)
+        quantidade = individuo[origem]
+    else:
+        destino = rng.choice([i for i in elementos if i != origem])
+        quantidade = rng.random() * (individuo[origem] - massa_minima)
+    individuo[origem] -= quantidade
+    individuo[destino] += quantidade
     return individuo
 
 ###############################################################################
 #                        Experimento caixeiro viajante                        #
 ###############################################################################
 
-def individuo_cv(cidades):
+def individuo_cv(cidades, rng=random):
     """Sorteia um caminho possível no problema do caixeiro viajante
     
     Args:
@@ -601,12 +919,12 @@ def individuo_cv(cidades):
       cada cidade apenas uma vez.
     """
     nomes = list(cidades.keys()) # pega as chaves(os nomes) do dicionário
-    random.shuffle(nomes) #embaralha os nomes (as chaves) das cidades geradas
+    rng.shuffle(nomes) #embaralha os nomes (as chaves) das cidades geradas
     return nomes
 
 
 
-def populacao_inicial_cv(tamanho, cidades):
+def populacao_inicial_cv(tamanho, cidades, rng=random):
     """Cria população inicial no problema do caixeiro viajante.
     Args
       tamanho:
@@ -620,12 +938,12 @@ def populacao_inicial_cv(tamanho, cidades):
     """
     populacao = []
     for _ in range(tamanho):
-        populacao.append(individuo_cv(cidades))
+        populacao.append(individuo_cv(cidades, rng))
     return populacao
 
 
 
-def cruzamento_ordenado(pai, mae):
+def cruzamento_ordenado(pai, mae, rng=random):
     """Operador de cruzamento ordenado.
     
     Neste cruzamento, os filhos mantém os mesmos genes que seus pais tinham,
@@ -644,8 +962,8 @@ def cruzamento_ordenado(pai, mae):
       argumentos. Estas listas mantém os genes originais dos pais, porém altera
       a ordem deles
     """
-    corte1 = random.randint(0, len(pai) - 2) #definir o corte 1, pode ir do começo até 
-    corte2 = random.randint(corte1 + 1, len(pai) - 1) # sendo a partir do corte 1 a gente garante que não vão ser iguais
+    corte1 = rng.randint(0, len(pai) - 2) #definir o corte 1, pode ir do começo até 
+    corte2 = rng.randint(corte1 + 1, len(pai) - 1) # sendo a partir do corte 1 a gente garante que não vão ser iguais
     
     filho1 = pai[corte1:corte2]
     for gene in mae: #navegar os genes da mãe e quando não está, a gente adiciona o gene no individuo
@@ -660,7 +978,179 @@ def cruzamento_ordenado(pai, mae):
     return filho1, filho2
 
 
-def mutacao_de_troca(individuo):
+def cruzamento_ordenado_np(pai, mae, rng=None):
+    """Operador de cruzamento ordenado em tempo linear.
+    
+    Faz o mesmo que `cruzamento_ordenado`, porém para caminhos codificados
+    como arrays de inteiros de 0 a n-1 (ver `ProblemaCaixeiro`). No lugar de
+    procurar cada gene dentro do filho que está sendo construído (o que custa
+    O(n) por gene), marcamos em um array booleano quais genes já estão no
+    trecho copiado do pai, então cada filho é construído em O(n).
+    
+    Args:
+      pai: array de inteiros representando um indivíduo.
+      mae: array de inteiros representando um indivíduo.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      Dois arrays, cada um representando um filho dos pais que foram os
+      argumentos.
+    """
+    rng = _gerador(rng)
+    pai = np.asarray(pai)
+    mae = np.asarray(mae)
+
+    corte1 = rng.integers(0, len(pai) - 1)
+    corte2 = rng.integers(corte1 + 1, len(pai))
+
+    def gera_filho(doador, outro):
+        trecho = doador[corte1:corte2]
+        presente = np.zeros(len(doador), dtype=bool)
+        presente[trecho] = True
+        return np.concatenate((trecho, outro[~presente[outro]]))
+
+    return gera_filho(pai, mae), gera_filho(mae, pai)
+
+
+def cruzamento_ordenado_pop(populacao, chance_cruzamento, rng=None):
+    """Cruzamento ordenado aplicado em todos os pares da população de uma vez.
+    
+    Os pares são formados pelas linhas (0, 1), (2, 3), ... Cada par cruza com
+    probabilidade `chance_cruzamento` e tem seus próprios pontos de corte. O
+    resultado de cada filho é o mesmo de `cruzamento_ordenado_np`: o trecho do
+    primeiro pai seguido dos genes restantes do segundo pai na ordem em que
+    aparecem nele.
+    
+    Args:
+      populacao: array (tamanho_populacao, numero_genes) de permutações.
+      chance_cruzamento: probabilidade de cada par cruzar.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      A população com os filhos no lugar dos pais e um array booleano
+      indicando quais indivíduos foram alterados.
+    """
+    rng = _gerador(rng)
+    num_pares = len(populacao) // 2
+    numero_genes = populacao.shape[1]
+
+    cruza = np.flatnonzero(rng.random(num_pares) <= chance_cruzamento)
+    pais = populacao[2 * cruza]
+    maes = populacao[2 * cruza + 1]
+
+    corte1 = rng.integers(0, numero_genes - 1, size=len(cruza))
+    corte2 = rng.integers(corte1 + 1, numero_genes)
+    posicoes = np.arange(numero_genes)
+    no_trecho = (posicoes >= corte1[:, None]) & (posicoes < corte2[:, None])
+    deslocamento = (np.arange(len(cruza)) * numero_genes)[:, None]
+
+    def gera_filhos(doadores, outros):
+        # presente[i * numero_genes + g] diz se o gene g está no trecho
+        # copiado do doador i (índices planos são mais rápidos que 2D)
+        presente = np.zeros(doadores.size, dtype=bool)
+        presente[(doadores + deslocamento).ravel()] = no_trecho.ravel()
+        ausente = ~presente[outros + deslocamento]
+        # cada linha escolhe exatamente numero_genes elementos, em ordem
+        escolhidos = np.concatenate((no_trecho, ausente), axis=1)
+        candidatos = np.concatenate((doadores, outros), axis=1)
+        return candidatos[escolhidos].reshape(doadores.shape)
+
+    populacao[2 * cruza] = gera_filhos(pais, maes)
+    populacao[2 * cruza + 1] = gera_filhos(maes, pais)
+
+    alterados = np.zeros(len(populacao), dtype=bool)
+    alterados[2 * cruza] = True
+    alterados[2 * cruza + 1] = True
+    return populacao, alterados
+
+
+def cruzamento_pmx(pai, mae, rng=None):
+    """Operador de cruzamento parcialmente mapeado (PMX).
+    
+    Cada filho recebe o trecho entre os dois cortes de um dos pais e o
+    restante do outro pai. Genes repetidos fora do trecho são trocados
+    seguindo o mapeamento definido pelo trecho. A posição de cada gene nos
+    pais é guardada em um array, então não há buscas em listas.
+    
+    Args:
+      pai: array de inteiros de 0 a n-1 representando um indivíduo.
+      mae: array de inteiros de 0 a n-1 representando um indivíduo.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      Dois arrays, cada um representando um filho dos pais que foram os
+      argumentos.
+    """
+    rng = _gerador(rng)
+    pai = np.asarray(pai)
+    mae = np.asarray(mae)
+
+    corte1 = rng.integers(0, len(pai) - 1)
+    corte2 = rng.integers(corte1 + 1, len(pai))
+
+    def gera_filho(doador, outro):
+        filho = outro.copy()
+        filho[corte1:corte2] = doador[corte1:corte2]
+
+        posicao_no_doador = np.empty(len(doador), dtype=np.intp)
+        posicao_no_doador[doador] = np.arange(len(doador))
+        no_trecho = np.zeros(len(doador), dtype=bool)
+        no_trecho[doador[corte1:corte2]] = True
+
+        repetidos = np.flatnonzero(no_trecho[outro])
+        for i in repetidos[(repetidos < corte1) | (repetidos >= corte2)].tolist():
+            gene = outro[i]
+            while no_trecho[gene]:
+                gene = outro[posicao_no_doador[gene]]
+            filho[i] = gene
+        return filho
+
+    return gera_filho(pai, mae), gera_filho(mae, pai)
+
+
+def cruzamento_ciclico(pai, mae, rng=None):
+    """Operador de cruzamento cíclico (CX).
+    
+    As posições são divididas em ciclos: partindo de uma posição, olhamos o
+    gene da mãe nessa posição e vamos para a posição em que esse gene está no
+    pai, até voltar ao início. Os filhos herdam ciclos alternados de cada pai,
+    então cada gene permanece em uma posição que ele ocupava em um dos pais.
+    
+    Args:
+      pai: array de inteiros de 0 a n-1 representando um indivíduo.
+      mae: array de inteiros de 0 a n-1 representando um indivíduo.
+      rng: não é utilizado (o operador é determinístico); existe para manter
+        a mesma assinatura dos outros cruzamentos.
+      
+    Returns:
+      Dois arrays, cada um representando um filho dos pais que foram os
+      argumentos.
+    """
+    pai = np.asarray(pai)
+    mae = np.asarray(mae)
+
+    posicao_no_pai = np.empty(len(pai), dtype=np.intp)
+    posicao_no_pai[pai] = np.arange(len(pai))
+
+    ciclo = np.full(len(pai), -1)
+    proxima = posicao_no_pai[mae].tolist()
+    numero_ciclo = 0
+    for inicio in range(len(pai)):
+        if ciclo[inicio] != -1:
+            continue
+        posicao = inicio
+        while ciclo[posicao] == -1:
+            ciclo[posicao] = numero_ciclo
+            posicao = proxima[posicao]
+        numero_ciclo += 1
+
+    do_pai = ciclo % 2 == 0
+    filho1 = np.where(do_pai, pai, mae)
+    filho2 = np.where(do_pai, mae, pai)
+    return filho1, filho2
+
+
+def mutacao_de_troca(individuo, rng=random):
     """Troca o valor de dois genes.
     
     Args:
@@ -671,7 +1161,7 @@ def mutacao_de_troca(individuo):
       trocados de posição.
     """
     indices = list(range(len(individuo))) #lista com o range que vai de 0 até o tamanho da lista.
-    lista_sorteada = random.sample(indices, k=2) #sorteia dois indices aleatórios do indivíduo
+    lista_sorteada = rng.sample(indices, k=2) #sorteia dois indices aleatórios do indivíduo
     indice1 = lista_sorteada[0]    #primeiro indice sorteado na função acima, posição na lista
     indice2 = lista_sorteada[1]
     
@@ -824,3 +1314,125 @@ def funcao_objetivo_pop_mochila(populacao, objetos, limite, ordem_dos_nomes):
         )
 
     return resultado
+
+
+###############################################################################
+#                        Seleção vetorizada (NumPy)                           #
+###############################################################################
+# As funções abaixo recebem a fitness da população como um array e retornam um
+# array com as posições dos indivíduos selecionados (use `populacao[indices]`).
+# No AlgoritmoGenetico, use selecao_por_indices=True.
+
+def selecao_torneio_min_np(fitness, tamanho_torneio=3, rng=None):
+    """Seleção por torneio para problemas de minimização.
+    
+    Todos os torneios são sorteados de uma vez como uma matriz
+    (tamanho_populacao, tamanho_torneio) de posições; o vencedor de cada
+    torneio é o combatente de menor fitness.
+    
+    Args:
+      fitness: array com a fitness de cada indivíduo da população.
+      tamanho_torneio: quantidade de indivíduos que batalham entre si.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      Array com as posições dos indivíduos selecionados, com o mesmo tamanho
+      da população.
+    """
+    fitness = np.asarray(fitness)
+    combatentes = _gerador(rng).integers(0, len(fitness), size=(len(fitness), tamanho_torneio))
+    vencedores = np.argmin(fitness[combatentes], axis=1)
+    return np.take_along_axis(combatentes, vencedores[:, None], axis=1)[:, 0]
+
+
+def selecao_torneio_max_np(fitness, tamanho_torneio=3, rng=None):
+    """Seleção por torneio para problemas de maximização.
+    
+    Args:
+      fitness: array com a fitness de cada indivíduo da população.
+      tamanho_torneio: quantidade de indivíduos que batalham entre si.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      Array com as posições dos indivíduos selecionados, com o mesmo tamanho
+      da população.
+    """
+    fitness = np.asarray(fitness)
+    combatentes = _gerador(rng).integers(0, len(fitness), size=(len(fitness), tamanho_torneio))
+    vencedores = np.argmax(fitness[combatentes], axis=1)
+    return np.take_along_axis(combatentes, vencedores[:, None], axis=1)[:, 0]
+
+
+def _sorteia_pela_soma_acumulada(pesos, pontos):
+    """Encontra a posição de cada ponto na soma acumulada dos pesos."""
+    acumulado = np.cumsum(pesos)
+    indices = np.searchsorted(acumulado, pontos * acumulado[-1], side="right")
+    return np.minimum(indices, len(pesos) - 1)
+
+
+def selecao_roleta_max_np(fitness, rng=None):
+    """Seleção pelo método da roleta.
+    
+    Nota: apenas funciona para problemas de maximização (fitness não
+    negativa).
+    
+    Args:
+      fitness: array com a fitness de cada indivíduo da população.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      Array com as posições dos indivíduos selecionados.
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    return _sorteia_pela_soma_acumulada(fitness, _gerador(rng).random(len(fitness)))
+
+
+def selecao_amostragem_universal(fitness, rng=None):
+    """Seleção por amostragem universal estocástica (SUS).
+    
+    Parecida com a roleta, mas a roleta gira uma única vez e os ponteiros são
+    igualmente espaçados, o que diminui a variância de quantas cópias cada
+    indivíduo recebe. A ordem dos selecionados é embaralhada no final para
+    que os pares do cruzamento não sejam formados por vizinhos na roleta.
+    
+    Nota: apenas funciona para problemas de maximização (fitness não
+    negativa).
+    
+    Args:
+      fitness: array com a fitness de cada indivíduo da população.
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      Array com as posições dos indivíduos selecionados.
+    """
+    rng = _gerador(rng)
+    fitness = np.asarray(fitness, dtype=float)
+    n = len(fitness)
+    pontos = (rng.random() + np.arange(n)) / n
+    return rng.permutation(_sorteia_pela_soma_acumulada(fitness, pontos))
+
+
+def selecao_ranking(fitness, minimizacao=False, pressao=1.5, rng=None):
+    """Seleção por ranking linear.
+    
+    A chance de cada indivíduo depende apenas da sua posição no ranking e não
+    do valor da fitness, então funciona tanto para minimização quanto para
+    maximização e com fitness negativa.
+    
+    Args:
+      fitness: array com a fitness de cada indivíduo da população.
+      minimizacao: `True` se a menor fitness é a melhor.
+      pressao: pressão seletiva entre 1 (todos com a mesma chance) e 2 (o pior
+        indivíduo nunca é escolhido).
+      rng: gerador `numpy.random.Generator` (opcional).
+      
+    Returns:
+      Array com as posições dos indivíduos selecionados.
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    n = len(fitness)
+    ordem = np.argsort(-fitness if minimizacao else fitness)  # do pior ao melhor
+    ranking = np.empty(n)
+    ranking[ordem] = np.arange(n)
+    pesos = (2 - pressao) + 2 * (pressao - 1) * ranking / max(n - 1, 1)
+    return _sorteia_pela_soma_acumulada(pesos, _gerador(rng).random(n))
@@ -0,0 +1,395 @@
+# Esse arquivo contém soluções de referência para o problema do caixeiro viajante
+# Elas servem para conferir o resultado do algoritmo genético (no lugar de testar
+# todas as permutações com itertools) e para gerar bons indivíduos iniciais.
+# As funções recebem a matriz de distâncias (ou a função de distância) de um
+# ProblemaCaixeiro (ver classes.py) e trabalham com caminhos codificados como
+# arrays de índices das cidades.
+
+#---------------------------------
+import time
+
+import numpy as np
+#---------------------------------
+
+###############################################################################
+#                           Solução exata (Held-Karp)                         #
+###############################################################################
+
+def held_karp(distancias):
+    """Resolve o caixeiro viajante de forma exata por programação dinâmica.
+
+    O algoritmo de Held-Karp calcula, para cada subconjunto de cidades e cada
+    cidade final, o menor caminho que sai da cidade 0, passa por todas as
+    cidades do subconjunto e termina na cidade final. Os subconjuntos são
+    representados por máscaras de bits e processados em camadas (todos os
+    subconjuntos com o mesmo número de cidades de uma vez), com o NumPy.
+
+    O custo é O(2^n n^2) em tempo e O(2^n n) em memória, então é viável até
+    cerca de 20 cidades (bem além das ~10 cidades do teste por permutações,
+    que custa O(n!)).
+
+    Args:
+      distancias: matriz n x n com a distância entre cada par de cidades.
+
+    Returns:
+      O caminho ótimo (array de índices começando na cidade 0) e a distância
+      percorrida nele, incluindo a volta para a cidade inicial.
+    """
+    distancias = np.asarray(distancias, dtype=float)
+    n = len(distancias)
+    if n == 1:
+        return np.zeros(1, dtype=np.intp), 0.0
+
+    # a cidade 0 é o início; as cidades 1..n-1 viram os bits 0..m-1
+    m = n - 1
+    num_mascaras = 1 << m
+    custo = np.full((num_mascaras, m), np.inf)
+    anterior = np.full((num_mascaras, m), -1, dtype=np.int8)
+    bits = 1 << np.arange(m)
+    custo[bits, np.arange(m)] = distancias[0, 1:]
+
+    mascaras = np.arange(num_mascaras)
+    num_cidades = ((mascaras[:, None] & bits) != 0).sum(axis=1)
+    ate_cidade = distancias[1:, 1:]
+
+    for tamanho in range(2, m + 1):
+        camada = mascaras[num_cidades == tamanho]
+        for j in range(m):
+            com_j = camada[(camada & bits[j]) != 0]
+            candidatos = custo[com_j ^ bits[j]] + ate_cidade[:, j]
+            melhor = np.argmin(candidatos, axis=1)
+            custo[com_j, j] = candidatos[np.arange(len(com_j)), melhor]
+            anterior[com_j, j] = melhor
+
+    completa = num_mascaras - 1
+    total = custo[completa] + distancias[1:, 0]
+    j = int(np.argmin(total))
+    melhor_custo = float(total[j])
+
+    caminho = []
+    mascara = completa
+    while j != -1:
+        caminho.append(j + 1)
+        proxima = int(anterior[mascara, j])
+        mascara ^= 1 << j
+        j = proxima
+    caminho.append(0)
+
+    return np.array(caminho[::-1], dtype=np.intp), melhor_custo
+
+
+###############################################################################
+#                           Heurísticas construtivas                          #
+###############################################################################
+
+def comprimento_caminho(caminho, distancias):
+    """Distância percorrida no caminho, incluindo a volta para o início."""
+    caminho = np.asarray(caminho)
+    return float(distancias[caminho, np.roll(caminho, -1)].sum())
+
+
+def vizinho_mais_proximo(distancias, inicio=0):
+    """Constrói um caminho indo sempre para a cidade mais próxima ainda não visitada.
+
+    Args:
+      distancias: matriz n x n com a distância entre cada par de cidades.
+      inicio: índice da cidade de partida.
+
+    Returns:
+      Array com o caminho construído.
+    """
+    n = len(distancias)
+    visitada = np.zeros(n, dtype=bool)
+    caminho = np.empty(n, dtype=np.intp)
+    atual = inicio
+    for posicao in range(n):
+        caminho[posicao] = atual
+        visitada[atual] = True
+        if posicao == n - 1:
+            break
+        candidatas = np.where(visitada, np.inf, distancias[atual])
+        atual = int(np.argmin(candidatas))
+    return caminho
+
+
+def vizinho_mais_proximo_candidatos(coordenadas, vizinhos, distancias_vizinhos, inicio=0):
+    """Vizinho mais próximo sem a matriz de distâncias, usando listas de candidatos.
+
+    A próxima cidade é a mais próxima entre os vizinhos candidatos da cidade
+    atual que ainda não foram visitados. Só quando todos os candidatos já
+    foram visitados é feita uma busca entre todas as cidades restantes,
+    calculando as distâncias a partir das coordenadas.
+
+    Args:
+      coordenadas: array (n, dimensões) com as coordenadas das cidades.
+      vizinhos: array (n, k) com os vizinhos candidatos de cada cidade.
+      distancias_vizinhos: array (n, k) com a distância até cada candidato.
+      inicio: índice da cidade de partida.
+
+    Returns:
+      Array com o caminho construído.
+    """
+    n = len(coordenadas)
+    visitada = np.zeros(n, dtype=bool)
+    caminho = np.empty(n, dtype=np.intp)
+    atual = inicio
+    for posicao in range(n):
+        caminho[posicao] = atual
+        visitada[atual] = True
+        if posicao == n - 1:
+            break
+        livres = ~visitada[vizinhos[atual]]
+        if livres.any():
+            # os candidatos estão em ordem de distância
+            atual = int(vizinhos[atual][np.argmax(livres)])
+        else:
+            restantes = np.flatnonzero(~visitada)
+            diferenca = coordenadas[restantes] - coordenadas[atual]
+            atual = int(restantes[np.argmin((diferenca**2).sum(axis=1))])
+    return caminho
+
+
+###############################################################################
+#                              Busca local                                    #
+###############################################################################
+
+def dois_opt(caminho, distancias, tolerancia=1e-12):
+    """Melhora um caminho com movimentos 2-opt até não haver mais ganho.
+
+    Um movimento 2-opt remove duas arestas (a, b) e (c, d) e reconecta o
+    caminho como (a, c) e (b, d), invertendo o trecho entre elas. Para cada
+    aresta (a, b), o ganho de todas as escolhas de (c, d) é calculado de uma
+    vez com o NumPy e o melhor movimento é aplicado.
+
+    Args:
+      caminho: array com o caminho inicial.
+      distancias: matriz n x n com a distância entre cada par de cidades.
+      tolerancia: ganho mínimo para um movimento ser aplicado.
+
+    Returns:
+      Array com o caminho melhorado.
+    """
+    caminho = np.array(caminho, dtype=np.intp)
+    n = len(caminho)
+    melhorou = True
+    while melhorou:
+        melhorou = False
+        for i in range(n - 2):
+            a, b = caminho[i], caminho[i + 1]
+            # com i = 0, a aresta final (n-1, 0) é vizinha de (0, 1)
+            fim = n if i > 0 else n - 1
+            c = caminho[i + 2 : fim]
+            d = caminho[(np.arange(i + 2, fim) + 1) % n]
+            ganho = distancias[a, b] + distancias[c, d] - distancias[a, c] - distancias[b, d]
+            if len(ganho) == 0:
+                continue
+            melhor = int(np.argmax(ganho))
+            if ganho[melhor] > tolerancia:
+                j = i + 2 + melhor
+                caminho[i + 1 : j + 1] = caminho[i + 1 : j + 1][::-1].copy()
+                melhorou = True
+    return caminho
+
+
+def or_opt(caminho, distancias, tamanhos=(1, 2, 3), tolerancia=1e-12):
+    """Melhora um caminho movendo trechos curtos para outras posições.
+
+    Trechos de 1, 2 ou 3 cidades consecutivas são retirados do caminho e
+    reinseridos (na mesma ordem ou invertidos) entre outras duas cidades
+    vizinhas, quando isso diminui a distância. Todas as posições de
+    reinserção de um trecho são avaliadas de uma vez com o NumPy.
+
+    Args:
+      caminho: array com o caminho inicial.
+      distancias: matriz n x n com a distância entre cada par de cidades.
+      tamanhos: tamanhos de trecho a serem testados.
+      tolerancia: ganho mínimo para um movimento ser aplicado.
+
+    Returns:
+      Array com o caminho melhorado.
+    """
+    caminho = np.array(caminho, dtype=np.intp)
+    n = len(caminho)
+    melhorou = True
+    while melhorou:
+        melhorou = False
+        for tamanho in tamanhos:
+            if tamanho > n - 3:
+                continue
+            i = 0
+            while i + tamanho <= n:
+                trecho = caminho[i : i + tamanho]
+                antes, depois = caminho[i - 1], caminho[(i + tamanho) % n]
+                primeira, ultima = trecho[0], trecho[-1]
+                ganho_retirada = (
+                    distancias[antes, primeira]
+                    + distancias[ultima, depois]
+                    - distancias[antes, depois]
+                )
+
+                resto = np.concatenate((caminho[:i], caminho[i + tamanho :]))
+                u = resto
+                v = np.roll(resto, -1)
+                custo_direto = distancias[u, primeira] + distancias[ultima, v] - distancias[u, v]
+                custo_invertido = distancias[u, ultima] + distancias[primeira, v] - distancias[u, v]
+                custo = np.minimum(custo_direto, custo_invertido)
+                # reinserir no mesmo lugar não é um movimento
+                custo[i - 1] = np.inf
+
+                melhor = int(np.argmin(custo))
+                if ganho_retirada - custo[melhor] > tolerancia:
+                    if custo_invertido[melhor] < custo_direto[melhor]:
+                        trecho = trecho[::-1]
+                    caminho = np.concatenate((resto[: melhor + 1], trecho, resto[melhor + 1 :]))
+                    melhorou = True
+                i += 1
+    return caminho
+
+
+def busca_local(caminho, distancias):
+    """Aplica 2-opt e Or-opt alternadamente até nenhum dos dois melhorar o caminho.
+
+    Args:
+      caminho: array com o caminho inicial.
+      distancias: matriz n x n com a distância entre cada par de cidades.
+
+    Returns:
+      Array com o caminho melhorado.
+    """
+    comprimento = comprimento_caminho(caminho, distancias)
+    while True:
+        caminho = or_opt(dois_opt(caminho, distancias), distancias)
+        novo_comprimento = comprimento_caminho(caminho, distancias)
+        if novo_comprimento >= comprimento - 1e-12:
+            return caminho
+        comprimento = novo_comprimento
+
+
+###############################################################################
+#                    2-opt com listas de vizinhos candidatos                  #
+###############################################################################
+
+def vizinhos_mais_proximos(distancias, k=10):
+    """Lista, para cada cidade, as `k` cidades mais próximas dela.
+
+    Args:
+      distancias: matriz n x n com a distância entre cada par de cidades.
+      k: número de vizinhos de cada cidade.
+
+    Returns:
+      Array (n, k) com os índices dos vizinhos, do mais próximo ao mais
+      distante.
+    """
+    distancias = np.array(distancias, dtype=float)
+    n = len(distancias)
+    k = min(k, n - 1)
+    if k <= 0:  # uma única cidade (ou nenhuma) não tem vizinhos
+        return np.empty((n, 0), dtype=np.intp)
+    np.fill_diagonal(distancias, np.inf)
+    vizinhos = np.argpartition(distancias, k - 1, axis=1)[:, :k]
+    ordem = np.argsort(np.take_along_axis(distancias, vizinhos, axis=1), axis=1)
+    return np.take_along_axis(vizinhos, ordem, axis=1)
+
+
+def _inverte(caminho, posicao, i, j):
+    """Inverte o trecho caminho[i..j] (i <= j) e atualiza as posições."""
+    trecho = caminho[i : j + 1][::-1].copy()
+    caminho[i : j + 1] = trecho
+    posicao[trecho] = np.arange(i, j + 1)
+
+
+def dois_opt_vizinhos(caminho, distancia, vizinhos, prazo=None, distancias_vizinhos=None):
+    """2-opt restrito a vizinhos candidatos, com bits de "não olhe".
+
+    Para cada cidade `a`, apenas os movimentos que ligam `a` a uma das suas
+    cidades vizinhas são avaliados, todos de uma vez com o NumPy. Uma cidade
+    só volta a ser examinada quando uma das arestas que tocam nela muda (bits
+    de "não olhe"), então cada passada custa O(n k) e não O(n^2).
+
+    Args:
+      caminho: array com o caminho inicial (não é alterado).
+      distancia: função `f(a, b)` que retorna a distância entre as cidades
+        `a` e `b` e aceita arrays (por exemplo `ProblemaCaixeiro.distancia`).
+      vizinhos: array (n, k) com os vizinhos candidatos de cada cidade (ver
+        `vizinhos_mais_proximos`).
+      prazo: instante (`time.perf_counter()`) em que a busca deve parar, mesmo
+        que ainda haja movimentos de melhora. None para não ter prazo.
+      distancias_vizinhos: array (n, k) opcional com a distância de cada
+        cidade até os seus vizinhos, para não recalcular essas distâncias.
+
+    Returns:
+      O caminho melhorado e a variação da distância percorrida (negativa ou
+      zero).
+    """
+    caminho = np.array(caminho, dtype=np.intp)
+    n = len(caminho)
+    if n < 4:
+        return caminho, 0.0
+    posicao = np.empty(n, dtype=np.intp)
+    posicao[caminho] = np.arange(n)
+
+    variacao = 0.0
+    fila = list(caminho[::-1])
+    na_fila = np.ones(n, dtype=bool)
+
+    while fila:
+        if prazo is not None and time.perf_counter() > prazo:
+            break
+        a = fila.pop()
+        na_fila[a] = False
+        i = posicao[a]
+        candidatos = vizinhos[a]
+        j = posicao[candidatos]
+        if distancias_vizinhos is None:
+            ate_candidatos = distancia(a, candidatos)
+        else:
+            ate_candidatos = distancias_vizinhos[a]
+
+        # sentido 1: arestas (a, seguinte de a) e (c, seguinte de c)
+        seguinte_a = caminho[(i + 1) % n]
+        seguinte_c = caminho[(j + 1) % n]
+        ganho_seg = (
+            distancia(a, seguinte_a)
+            + distancia(candidatos, seguinte_c)
+            - ate_candidatos
+            - distancia(seguinte_a, seguinte_c)
+        )
+        # sentido 2: arestas (anterior de a, a) e (anterior de c, c)
+        anterior_a = caminho[i - 1]
+        anterior_c = caminho[j - 1]
+        ganho_ant = (
+            distancia(anterior_a, a)
+            + distancia(anterior_c, candidatos)
+            - ate_candidatos
+            - distancia(anterior_a, anterior_c)
+        )
+
+        melhor_seg = int(np.argmax(ganho_seg))
+        melhor_ant = int(np.argmax(ganho_ant))
+        if max(ganho_seg[melhor_seg], ganho_ant[melhor_ant]) <= 1e-12:
+            continue
+
+        if ganho_seg[melhor_seg] >= ganho_ant[melhor_ant]:
+            c, jc, ganho = candidatos[melhor_seg], j[melhor_seg], ganho_seg[melhor_seg]
+            tocadas = (a, seguinte_a, c, seguinte_c[melhor_seg])
+            # novas arestas (a, c) e (seguinte de a, seguinte de c)
+            if i < jc:
+                _inverte(caminho, posicao, i + 1, jc)
+            else:
+                _inverte(caminho, posicao, jc + 1, i)
+        else:
+            c, jc, ganho = candidatos[melhor_ant], j[melhor_ant], ganho_ant[melhor_ant]
+            tocadas = (a, anterior_a, c, anterior_c[melhor_ant])
+            # novas arestas (a, c) e (anterior de a, anterior de c)
+            if i < jc:
+                _inverte(caminho, posicao, i, jc - 1)
+            else:
+                _inverte(caminho, posicao, jc, i - 1)
+
+        variacao -= float(ganho)
+        for cidade in tocadas:
+            if not na_fila[cidade]:
+                na_fila[cidade] = True
+                fila.append(cidade)
+
+    return caminho, variacao
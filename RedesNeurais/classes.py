@@ -1 +1,910 @@
- 
+# Esse arquivo contém as classes utilizadas nos experimentos de redes neurais
+# A classe Valor é a versão "de produção" da classe construída nos notebooks R.02 a R.04;
+# a ValorTensor faz o mesmo com arrays do NumPy no lugar de números. As classes
+# de redes neurais, otimizadores e dados são construídas sobre a ValorTensor.
+
+#---------------------------------
+import math
+
+import numpy as np
+#---------------------------------
+
+###############################################################################
+#                                   Valor                                     #
+###############################################################################
+# Cada vértice do grafo guarda um código de operação no lugar de uma função
+# `propagar` própria. Os gradientes locais de todas as operações ficam em um
+# único laço em `propagar_tudo`, o que economiza uma closure por vértice.
+
+OP_FOLHA = 0
+OP_SOMA = 1
+OP_MULTIPLICACAO = 2
+OP_POTENCIA = 3
+OP_TANH = 4
+OP_EXP = 5
+OP_RELU = 6
+OP_MATMUL = 7
+OP_SOMATORIO = 8
+OP_LOG = 9
+OP_SIGMOIDE = 10
+
+SIMBOLOS = {
+    OP_FOLHA: "",
+    OP_SOMA: "+",
+    OP_MULTIPLICACAO: "*",
+    OP_POTENCIA: "**",
+    OP_TANH: "tanh",
+    OP_EXP: "exp",
+    OP_RELU: "ReLU",
+    OP_MATMUL: "@",
+    OP_SOMATORIO: "soma",
+    OP_LOG: "log",
+    OP_SIGMOIDE: "sigmoide",
+}
+CODIGOS = {simbolo: codigo for codigo, simbolo in SIMBOLOS.items()}
+
+
+class Valor:
+    """Número que lembra de onde veio e sabe calcular o próprio gradiente.
+
+    Funciona como o `Valor` dos notebooks, mas usa `__slots__` (nada de
+    `__dict__` por vértice) e guarda o código da operação que o criou no
+    lugar de uma closure `propagar`. A ordem topológica é construída com uma
+    pilha explícita, então grafos com milhões de vértices encadeados não
+    estouram o limite de recursão do Python.
+
+    Exemplo:
+      a = Valor(-2, rotulo="a")
+      b = Valor(3, rotulo="b")
+      e = (a + b) * a.tanh()
+      e.propagar_tudo()
+      a.grad, b.grad
+
+    Args:
+      data: valor numérico do vértice.
+      progenitor: tupla com os vértices que deram origem a este.
+      operador_mae: símbolo ("+", "*", ...) ou código (`OP_SOMA`, ...) da
+        operação que deu origem a este vértice.
+      rotulo: nome do vértice, usado no desenho do grafo.
+      expoente: expoente da operação `OP_POTENCIA`.
+    """
+
+    __slots__ = ("data", "grad", "progenitor", "op", "rotulo", "expoente")
+
+    def __init__(self, data, progenitor=(), operador_mae=OP_FOLHA, rotulo="", expoente=None):
+        self.data = data
+        self.grad = 0
+        self.progenitor = progenitor
+        self.op = CODIGOS[operador_mae] if isinstance(operador_mae, str) else operador_mae
+        self.rotulo = rotulo
+        self.expoente = expoente
+
+    @property
+    def operador_mae(self):
+        """Símbolo da operação que deu origem ao vértice ("" para folhas)."""
+        if self.op == OP_POTENCIA:
+            return f"**{self.expoente}"
+        return SIMBOLOS[self.op]
+
+    def __repr__(self):
+        return f"Valor(data={self.data})"
+
+    ###########################################################################
+    #                               Operações                                 #
+    ###########################################################################
+
+    def __add__(self, outro_valor):
+        if not isinstance(outro_valor, Valor):
+            outro_valor = Valor(outro_valor)
+        return Valor(self.data + outro_valor.data, (self, outro_valor), OP_SOMA)
+
+    def __mul__(self, outro_valor):
+        if not isinstance(outro_valor, Valor):
+            outro_valor = Valor(outro_valor)
+        return Valor(self.data * outro_valor.data, (self, outro_valor), OP_MULTIPLICACAO)
+
+    def __pow__(self, expoente):
+        if not isinstance(expoente, (int, float)):
+            raise TypeError("O expoente deve ser um int ou um float")
+        return Valor(self.data**expoente, (self,), OP_POTENCIA, expoente=expoente)
+
+    def __neg__(self):
+        return self * -1
+
+    def __sub__(self, outro_valor):
+        return self + (-outro_valor)
+
+    def __truediv__(self, outro_valor):
+        if not isinstance(outro_valor, Valor):
+            outro_valor = Valor(outro_valor)
+        return self * outro_valor**-1
+
+    def __radd__(self, outro_valor):
+        return self + outro_valor
+
+    def __rmul__(self, outro_valor):
+        return self * outro_valor
+
+    def __rsub__(self, outro_valor):
+        return Valor(outro_valor) - self
+
+    def __rtruediv__(self, outro_valor):
+        return Valor(outro_valor) / self
+
+    def tanh(self):
+        return Valor(math.tanh(self.data), (self,), OP_TANH)
+
+    def exp(self):
+        return Valor(math.exp(self.data), (self,), OP_EXP)
+
+    def relu(self):
+        return Valor(self.data if self.data > 0 else 0, (self,), OP_RELU)
+
+    ###########################################################################
+    #                             Retropropagação                             #
+    ###########################################################################
+
+    def ordem_topologica(self):
+        """Lista com os vértices do grafo, cada um depois dos seus progenitores."""
+        return _ordem_topologica(self)
+
+    def propagar(self):
+        """Soma nos progenitores o gradiente local deste vértice."""
+        _propaga((self,))
+
+    def propagar_tudo(self):
+        """Calcula o gradiente de todos os vértices em relação a este."""
+        ordem = self.ordem_topologica()
+        self.grad = 1  # o gradiente do vértice folha deve ser 1
+        ordem.reverse()
+        _propaga(ordem)
+
+    def zera_grad(self):
+        """Zera o gradiente de todos os vértices do grafo."""
+        for v in self.ordem_topologica():
+            v.grad = 0
+
+
+def _ordem_topologica(raiz):
+    """Lista com os vértices do grafo de `raiz`, cada um depois dos seus progenitores.
+
+    Busca em profundidade com uma pilha explícita: cada vértice entra na
+    pilha uma vez para ser expandido e outra para ser colocado na ordem,
+    depois que todos os seus progenitores já foram.
+    """
+    ordem = []
+    visitados = set()
+    pilha = [(raiz, False)]
+    while pilha:
+        v, expandido = pilha.pop()
+        if expandido:
+            ordem.append(v)
+            continue
+        if v in visitados:
+            continue
+        visitados.add(v)
+        pilha.append((v, True))
+        for progenitor in v.progenitor:
+            if progenitor not in visitados:
+                pilha.append((progenitor, False))
+    return ordem
+
+
+def _propaga(vertices):
+    """Aplica a regra da cadeia em cada vértice de `vertices`, nesta ordem."""
+    for v in vertices:
+        op = v.op
+        if op == OP_FOLHA:
+            continue
+        grad = v.grad
+        if op == OP_SOMA:
+            a, b = v.progenitor
+            a.grad += grad
+            b.grad += grad
+        elif op == OP_MULTIPLICACAO:
+            a, b = v.progenitor
+            a.grad += grad * b.data
+            b.grad += grad * a.data
+        elif op == OP_POTENCIA:
+            a = v.progenitor[0]
+            a.grad += grad * v.expoente * a.data ** (v.expoente - 1)
+        elif op == OP_TANH:
+            v.progenitor[0].grad += grad * (1 - v.data**2)
+        elif op == OP_EXP:
+            v.progenitor[0].grad += grad * v.data
+        elif op == OP_RELU:
+            if v.data > 0:
+                v.progenitor[0].grad += grad
+
+
+###############################################################################
+#                                ValorTensor                                  #
+###############################################################################
+
+
+class ValorTensor:
+    """Versão do `Valor` em que `data` e `grad` são arrays do NumPy.
+
+    Uma camada inteira de uma rede neural vira um único vértice
+    (`x @ pesos + vies`) no lugar de um vértice por peso, e a regra da cadeia
+    de cada operação é aplicada no array inteiro de uma vez. As operações
+    seguem o broadcasting do NumPy; na retropropagação, o gradiente de um
+    operando que foi "esticado" pelo broadcasting é somado de volta até a
+    forma original do operando.
+
+    O gradiente começa como 0 (um escalar) e vira um array da mesma forma de
+    `data` quando a retropropagação chega ao vértice.
+
+    Exemplo:
+      x = ValorTensor(np.random.randn(32, 3))
+      w = ValorTensor(np.random.randn(3, 4), rotulo="w")
+      b = ValorTensor(np.zeros(4), rotulo="b")
+      perda = ((x @ w + b).tanh() ** 2).media()
+      perda.propagar_tudo()
+      w.grad.shape  # (3, 4)
+
+    Args:
+      data: array (ou qualquer coisa que o NumPy converta em array). Arrays de
+        inteiros são convertidos para float.
+      progenitor: tupla com os vértices que deram origem a este.
+      operador_mae: símbolo ou código da operação que deu origem ao vértice.
+      rotulo: nome do vértice, usado no desenho do grafo.
+      argumento: parâmetro da operação (o expoente de `OP_POTENCIA` ou o eixo
+        e o `mantem_dims` de `OP_SOMATORIO`).
+    """
+
+    __slots__ = ("data", "grad", "progenitor", "op", "rotulo", "argumento")
+
+    # faz o NumPy delegar `array + ValorTensor` para os métodos reflexos
+    __array_ufunc__ = None
+
+    def __init__(self, data, progenitor=(), operador_mae=OP_FOLHA, rotulo="", argumento=None):
+        data = np.asarray(data)
+        if data.dtype.kind != "f":
+            data = data.astype(float)
+        self.data = data
+        self.grad = 0.0
+        self.progenitor = progenitor
+        self.op = CODIGOS[operador_mae] if isinstance(operador_mae, str) else operador_mae
+        self.rotulo = rotulo
+        self.argumento = argumento
+
+    @property
+    def operador_mae(self):
+        """Símbolo da operação que deu origem ao vértice ("" para folhas)."""
+        if self.op == OP_POTENCIA:
+            return f"**{self.argumento}"
+        return SIMBOLOS[self.op]
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def __repr__(self):
+        return f"ValorTensor(shape={self.data.shape}, data={self.data})"
+
+    ###########################################################################
+    #                               Operações                                 #
+    ###########################################################################
+
+    def __add__(self, outro_valor):
+        if not isinstance(outro_valor, ValorTensor):
+            outro_valor = ValorTensor(outro_valor)
+        return ValorTensor(self.data + outro_valor.data, (self, outro_valor), OP_SOMA)
+
+    def __mul__(self, outro_valor):
+        if not isinstance(outro_valor, ValorTensor):
+            outro_valor = ValorTensor(outro_valor)
+        return ValorTensor(self.data * outro_valor.data, (self, outro_valor), OP_MULTIPLICACAO)
+
+    def __matmul__(self, outro_valor):
+        if not isinstance(outro_valor, ValorTensor):
+            outro_valor = ValorTensor(outro_valor)
+        return ValorTensor(self.data @ outro_valor.data, (self, outro_valor), OP_MATMUL)
+
+    def __pow__(self, expoente):
+        if not isinstance(expoente, (int, float)):
+            raise TypeError("O expoente deve ser um int ou um float")
+        return ValorTensor(self.data**expoente, (self,), OP_POTENCIA, argumento=expoente)
+
+    def __neg__(self):
+        return self * -1.0
+
+    def __sub__(self, outro_valor):
+        return self + (-outro_valor)
+
+    def __truediv__(self, outro_valor):
+        if not isinstance(outro_valor, ValorTensor):
+            return self * (1.0 / np.asarray(outro_valor, dtype=float))
+        return self * outro_valor**-1
+
+    def __radd__(self, outro_valor):
+        return self + outro_valor
+
+    def __rmul__(self, outro_valor):
+        return self * outro_valor
+
+    def __rsub__(self, outro_valor):
+        return ValorTensor(outro_valor) - self
+
+    def __rtruediv__(self, outro_valor):
+        return ValorTensor(outro_valor) / self
+
+    def __rmatmul__(self, outro_valor):
+        return ValorTensor(outro_valor) @ self
+
+    def soma(self, eixo=None, mantem_dims=False):
+        """Soma dos elementos, como `np.sum(data, axis=eixo, keepdims=mantem_dims)`."""
+        data = self.data.sum(axis=eixo, keepdims=mantem_dims)
+        return ValorTensor(data, (self,), OP_SOMATORIO, argumento=(eixo, mantem_dims))
+
+    def media(self, eixo=None, mantem_dims=False):
+        """Média dos elementos, como `np.mean(data, axis=eixo, keepdims=mantem_dims)`."""
+        soma = self.soma(eixo, mantem_dims)
+        return soma * (soma.data.size / self.data.size)
+
+    def tanh(self):
+        return ValorTensor(np.tanh(self.data), (self,), OP_TANH)
+
+    def exp(self):
+        return ValorTensor(np.exp(self.data), (self,), OP_EXP)
+
+    def log(self):
+        return ValorTensor(np.log(self.data), (self,), OP_LOG)
+
+    def relu(self):
+        return ValorTensor(np.maximum(self.data, 0), (self,), OP_RELU)
+
+    def sigmoide(self):
+        return ValorTensor(1 / (1 + np.exp(-self.data)), (self,), OP_SIGMOIDE)
+
+    ###########################################################################
+    #                             Retropropagação                             #
+    ###########################################################################
+
+    def ordem_topologica(self):
+        """Lista com os vértices do grafo, cada um depois dos seus progenitores."""
+        return _ordem_topologica(self)
+
+    def propagar(self):
+        """Soma nos progenitores o gradiente local deste vértice."""
+        _propaga_tensores((self,))
+
+    def propagar_tudo(self):
+        """Calcula o gradiente de todos os vértices em relação a este.
+
+        Quando este vértice não é um escalar, o seu gradiente inicial é um
+        array de uns (o gradiente da soma dos seus elementos).
+        """
+        ordem = self.ordem_topologica()
+        self.grad = np.ones_like(self.data)
+        ordem.reverse()
+        _propaga_tensores(ordem)
+
+    def zera_grad(self):
+        """Zera o gradiente de todos os vértices do grafo."""
+        for v in self.ordem_topologica():
+            v.grad = 0.0
+
+
+def _reduz_para_forma(grad, forma):
+    """Soma os eixos de `grad` que o broadcasting criou ou esticou a partir de `forma`."""
+    if grad.shape == forma:
+        return grad
+    novos_eixos = grad.ndim - len(forma)
+    if novos_eixos > 0:
+        grad = grad.sum(axis=tuple(range(novos_eixos)))
+    esticados = tuple(i for i, n in enumerate(forma) if n == 1 and grad.shape[i] != 1)
+    if esticados:
+        grad = grad.sum(axis=esticados, keepdims=True)
+    return grad
+
+
+def _grad_matmul(grad, a, b):
+    """Gradientes de `a @ b` em relação a `a` e a `b`, para qualquer número de dimensões.
+
+    Vetores são tratados como matrizes de uma linha (`a`) ou de uma coluna
+    (`b`), como faz o próprio `np.matmul`.
+    """
+    a2 = a[np.newaxis, :] if a.ndim == 1 else a
+    b2 = b[:, np.newaxis] if b.ndim == 1 else b
+    grad2 = grad
+    if b.ndim == 1:
+        grad2 = np.expand_dims(grad2, -1)
+    if a.ndim == 1:
+        grad2 = np.expand_dims(grad2, -2)
+    grad_a = _reduz_para_forma(grad2 @ np.swapaxes(b2, -1, -2), a2.shape).reshape(a.shape)
+    grad_b = _reduz_para_forma(np.swapaxes(a2, -1, -2) @ grad2, b2.shape).reshape(b.shape)
+    return grad_a, grad_b
+
+
+def _propaga_tensores(vertices):
+    """Aplica a regra da cadeia (vetorizada) em cada vértice de `vertices`, nesta ordem.
+
+    Os gradientes são sempre somados com `+` (e não `+=`): o mesmo array de
+    gradiente pode ser entregue a mais de um progenitor.
+    """
+    for v in vertices:
+        op = v.op
+        if op == OP_FOLHA:
+            continue
+        grad = v.grad
+        if op == OP_SOMA:
+            a, b = v.progenitor
+            a.grad = a.grad + _reduz_para_forma(grad, a.data.shape)
+            b.grad = b.grad + _reduz_para_forma(grad, b.data.shape)
+        elif op == OP_MULTIPLICACAO:
+            a, b = v.progenitor
+            a.grad = a.grad + _reduz_para_forma(grad * b.data, a.data.shape)
+            b.grad = b.grad + _reduz_para_forma(grad * a.data, b.data.shape)
+        elif op == OP_MATMUL:
+            a, b = v.progenitor
+            grad_a, grad_b = _grad_matmul(grad, a.data, b.data)
+            a.grad = a.grad + grad_a
+            b.grad = b.grad + grad_b
+        else:
+            a = v.progenitor[0]
+            if op == OP_POTENCIA:
+                local = v.argumento * a.data ** (v.argumento - 1)
+            elif op == OP_TANH:
+                local = 1 - v.data**2
+            elif op == OP_EXP:
+                local = v.data
+            elif op == OP_LOG:
+                local = 1 / a.data
+            elif op == OP_RELU:
+                local = a.data > 0
+            elif op == OP_SIGMOIDE:
+                local = v.data * (1 - v.data)
+            elif op == OP_SOMATORIO:
+                eixo, mantem_dims = v.argumento
+                if eixo is not None and not mantem_dims:
+                    grad = np.expand_dims(grad, eixo)
+                a.grad = a.grad + np.broadcast_to(grad, a.data.shape)
+                continue
+            a.grad = a.grad + grad * local
+
+
+###############################################################################
+#                                    Fita                                     #
+###############################################################################
+
+
+class Fita:
+    """Grafo de `Valor` gravado uma vez em arrays para ser executado várias vezes.
+
+    No laço de treino dos notebooks o grafo inteiro é reconstruído a cada
+    passo (um objeto `Valor` novo por operação) só porque os pesos mudaram um
+    pouco. A fita grava o grafo de uma passagem em arrays planos: cada
+    vértice vira uma posição nos buffers `valores` e `grads`, e cada operação
+    vira uma instrução (código da operação, posições das entradas e posição
+    da saída). Depois disso, a ida e a volta são refeitas sobre os buffers
+    sem criar nenhum objeto.
+
+    As instruções são agrupadas por nível (a distância até as folhas) e por
+    operação; todas as instruções de um grupo são executadas por uma única
+    operação do NumPy. Na volta, os gradientes de entradas repetidas dentro
+    de um grupo são acumulados com `np.add.at`.
+
+    A estrutura do grafo fica fixa: só os valores das folhas podem mudar.
+    Grafos com desvios que dependem dos dados (um `if` sobre `v.data`) devem
+    ser gravados de novo quando o desvio muda. Os desvios internos da ReLU
+    não têm esse problema, pois ela é recalculada na fita.
+
+    Exemplo:
+      fita = Fita(perda)
+      i = fita.indices(pesos)
+      for _ in range(1000):
+          fita.avanca()
+          fita.retropropaga()
+          fita.valores[i] -= 0.01 * fita.grads[i]
+      fita.escreve()  # copia valores e gradientes de volta para os objetos
+
+    Args:
+      raiz: vértice final do grafo (normalmente a perda).
+    """
+
+    def __init__(self, raiz):
+        vertices = raiz.ordem_topologica()
+        posicao = {v: i for i, v in enumerate(vertices)}
+        n = len(vertices)
+
+        op = np.fromiter((v.op for v in vertices), dtype=np.int8, count=n)
+        entrada_a = np.full(n, -1, dtype=np.intp)
+        entrada_b = np.full(n, -1, dtype=np.intp)
+        expoente = np.zeros(n)
+        nivel = np.zeros(n, dtype=np.intp)
+        for i, v in enumerate(vertices):
+            if not v.progenitor:
+                continue
+            entrada_a[i] = posicao[v.progenitor[0]]
+            nivel_entradas = nivel[entrada_a[i]]
+            if len(v.progenitor) == 2:
+                entrada_b[i] = posicao[v.progenitor[1]]
+                nivel_entradas = max(nivel_entradas, nivel[entrada_b[i]])
+            nivel[i] = nivel_entradas + 1
+            if v.op == OP_POTENCIA:
+                expoente[i] = v.expoente
+
+        self.vertices = vertices
+        self.posicao = posicao
+        self.raiz = posicao[raiz]
+        self.op = op
+        self.entrada_a = entrada_a
+        self.entrada_b = entrada_b
+        self.expoente = expoente
+        self.folhas = np.flatnonzero(op == OP_FOLHA)
+        self.valores = np.zeros(n)
+        self.grads = np.zeros(n)
+
+        # instruções ordenadas por nível e operação; cada grupo é uma fatia
+        instrucoes = np.flatnonzero(op != OP_FOLHA)
+        instrucoes = instrucoes[np.lexsort((op[instrucoes], nivel[instrucoes]))]
+        chave = nivel[instrucoes] * (max(SIMBOLOS) + 1) + op[instrucoes]
+        inicios = np.flatnonzero(np.diff(chave, prepend=-1))
+        fins = np.append(inicios[1:], len(instrucoes))
+        self.grupos = [
+            (
+                int(op[instrucoes[inicio]]),
+                instrucoes[inicio:fim],
+                entrada_a[instrucoes[inicio:fim]],
+                entrada_b[instrucoes[inicio:fim]],
+                expoente[instrucoes[inicio:fim]],
+            )
+            for inicio, fim in zip(inicios, fins)
+        ]
+        self.carrega()
+
+    def __len__(self):
+        return len(self.vertices)
+
+    def indices(self, valores):
+        """Posições de uma lista de vértices nos buffers `valores` e `grads`."""
+        return np.array([self.posicao[v] for v in valores], dtype=np.intp)
+
+    def carrega(self):
+        """Copia o `data` dos objetos das folhas para o buffer `valores`."""
+        vertices = self.vertices
+        self.valores[self.folhas] = [vertices[i].data for i in self.folhas.tolist()]
+
+    def escreve(self):
+        """Copia os buffers de volta para o `data` e o `grad` de todos os objetos."""
+        for v, valor, grad in zip(self.vertices, self.valores.tolist(), self.grads.tolist()):
+            v.data = valor
+            v.grad = grad
+
+    def avanca(self):
+        """Refaz a ida com os valores atuais das folhas no buffer.
+
+        Returns:
+          O valor da raiz.
+        """
+        valores = self.valores
+        for op, saida, a, b, expoente in self.grupos:
+            if op == OP_SOMA:
+                valores[saida] = valores[a] + valores[b]
+            elif op == OP_MULTIPLICACAO:
+                valores[saida] = valores[a] * valores[b]
+            elif op == OP_POTENCIA:
+                valores[saida] = valores[a] ** expoente
+            elif op == OP_TANH:
+                valores[saida] = np.tanh(valores[a])
+            elif op == OP_EXP:
+                valores[saida] = np.exp(valores[a])
+            elif op == OP_RELU:
+                valores[saida] = np.maximum(valores[a], 0)
+        return valores[self.raiz]
+
+    def retropropaga(self):
+        """Refaz a volta, preenchendo o buffer `grads` (a raiz recebe gradiente 1)."""
+        valores = self.valores
+        grads = self.grads
+        grads.fill(0)
+        grads[self.raiz] = 1
+        for op, saida, a, b, expoente in reversed(self.grupos):
+            grad = grads[saida]
+            if op == OP_SOMA:
+                np.add.at(grads, a, grad)
+                np.add.at(grads, b, grad)
+            elif op == OP_MULTIPLICACAO:
+                np.add.at(grads, a, grad * valores[b])
+                np.add.at(grads, b, grad * valores[a])
+            elif op == OP_POTENCIA:
+                np.add.at(grads, a, grad * expoente * valores[a] ** (expoente - 1))
+            elif op == OP_TANH:
+                np.add.at(grads, a, grad * (1 - valores[saida] ** 2))
+            elif op == OP_EXP:
+                np.add.at(grads, a, grad * valores[saida])
+            elif op == OP_RELU:
+                np.add.at(grads, a, grad * (valores[saida] > 0))
+
+    def passo(self):
+        """Carrega as folhas dos objetos, faz a ida e a volta e escreve tudo de volta.
+
+        É o equivalente a reconstruir o grafo e chamar `propagar_tudo`, mas
+        sem criar objetos. Para laços longos, prefira atualizar `valores`
+        diretamente (ver o exemplo da classe) e chamar `escreve` só no fim.
+
+        Returns:
+          O valor da raiz.
+        """
+        self.carrega()
+        resultado = self.avanca()
+        self.retropropaga()
+        self.escreve()
+        return resultado
+
+
+###############################################################################
+#                               Redes neurais                                 #
+###############################################################################
+# Os pesos de uma camada ficam em uma única matriz de `ValorTensor`: a ida de
+# um lote inteiro é `x @ pesos + vies`, um vértice por operação, no lugar de
+# um grafo de `Valor` por amostra e por peso.
+
+ATIVACOES = ("tanh", "relu", "sigmoide")
+
+
+def _checa_ativacao(ativacao):
+    if ativacao is not None and ativacao not in ATIVACOES:
+        raise ValueError(f"Ativação desconhecida: {ativacao!r} (use uma de {ATIVACOES} ou None)")
+
+
+class Neuronio:
+    """Um neurônio: soma ponderada das entradas mais um viés, seguida da ativação.
+
+    Recebe um lote de entradas de forma (tamanho_lote, num_entradas) e devolve
+    um `ValorTensor` de forma (tamanho_lote,).
+
+    Args:
+      num_entradas: número de entradas do neurônio.
+      ativacao: "tanh", "relu", "sigmoide" ou None (neurônio linear).
+      rng: gerador do NumPy usado para sortear os pesos iniciais.
+      rotulo: prefixo dos rótulos dos pesos e do viés.
+    """
+
+    def __init__(self, num_entradas, ativacao="tanh", rng=None, rotulo="neuronio"):
+        _checa_ativacao(ativacao)
+        rng = np.random.default_rng() if rng is None else rng
+        escala = 1 / math.sqrt(num_entradas)
+        self.pesos = ValorTensor(rng.uniform(-escala, escala, num_entradas), rotulo=f"{rotulo}.w")
+        self.vies = ValorTensor(0.0, rotulo=f"{rotulo}.b")
+        self.ativacao = ativacao
+
+    def __call__(self, x):
+        saida = x @ self.pesos + self.vies
+        return saida if self.ativacao is None else getattr(saida, self.ativacao)()
+
+    def parametros(self):
+        return [self.pesos, self.vies]
+
+    def __repr__(self):
+        return f"Neuronio({self.ativacao or 'linear'}, {self.pesos.data.size})"
+
+
+class Camada:
+    """Camada totalmente conectada com `num_saidas` neurônios.
+
+    Equivale a `num_saidas` objetos `Neuronio` lado a lado, mas os pesos de
+    todos eles ficam nas colunas de uma única matriz, e a camada inteira é
+    calculada com um produto de matrizes.
+
+    Args:
+      num_entradas: número de entradas de cada neurônio.
+      num_saidas: número de neurônios da camada.
+      ativacao: "tanh", "relu", "sigmoide" ou None (camada linear).
+      rng: gerador do NumPy usado para sortear os pesos iniciais.
+      rotulo: prefixo dos rótulos dos pesos e do viés (útil para agrupar a
+        camada no desenho do grafo com `plota_grafo(..., agrupa_rotulos=...)`).
+    """
+
+    def __init__(self, num_entradas, num_saidas, ativacao="tanh", rng=None, rotulo="camada"):
+        _checa_ativacao(ativacao)
+        rng = np.random.default_rng() if rng is None else rng
+        escala = 1 / math.sqrt(num_entradas)
+        pesos = rng.uniform(-escala, escala, (num_entradas, num_saidas))
+        self.pesos = ValorTensor(pesos, rotulo=f"{rotulo}.w")
+        self.vies = ValorTensor(np.zeros(num_saidas), rotulo=f"{rotulo}.b")
+        self.ativacao = ativacao
+
+    def __call__(self, x):
+        saida = x @ self.pesos + self.vies
+        return saida if self.ativacao is None else getattr(saida, self.ativacao)()
+
+    def parametros(self):
+        return [self.pesos, self.vies]
+
+    def __repr__(self):
+        num_entradas, num_saidas = self.pesos.data.shape
+        return f"Camada({self.ativacao or 'linear'}, {num_entradas} -> {num_saidas})"
+
+
+class MLP:
+    """Perceptron de múltiplas camadas.
+
+    Todas as camadas usam `ativacao`, menos a última, que é linear por
+    padrão (troque com `ativacao_saida`, por exemplo "sigmoide" para
+    classificação binária).
+
+    Exemplo:
+      modelo = MLP(3, [16, 16, 1], semente=0)
+      previsto = modelo(x_lote)  # ValorTensor de forma (tamanho_lote, 1)
+
+    Args:
+      num_entradas: número de atributos de cada amostra.
+      tamanhos: número de neurônios de cada camada, da primeira até a saída.
+      ativacao: ativação das camadas ocultas.
+      ativacao_saida: ativação da última camada (None para linear).
+      semente: semente do sorteio dos pesos iniciais.
+    """
+
+    def __init__(self, num_entradas, tamanhos, ativacao="tanh", ativacao_saida=None, semente=None):
+        rng = np.random.default_rng(semente)
+        entradas = [num_entradas, *tamanhos[:-1]]
+        ativacoes = [ativacao] * (len(tamanhos) - 1) + [ativacao_saida]
+        self.camadas = [
+            Camada(n, m, ativacao=a, rng=rng, rotulo=f"camada{i}")
+            for i, (n, m, a) in enumerate(zip(entradas, tamanhos, ativacoes))
+        ]
+
+    def __call__(self, x):
+        for camada in self.camadas:
+            x = camada(x)
+        return x
+
+    def parametros(self):
+        return [p for camada in self.camadas for p in camada.parametros()]
+
+    def zera_grad(self):
+        for p in self.parametros():
+            p.grad = 0.0
+
+    def __repr__(self):
+        return f"MLP([{', '.join(repr(camada) for camada in self.camadas)}])"
+
+
+###############################################################################
+#                                Otimizadores                                 #
+###############################################################################
+# Os otimizadores atualizam `data` dos parâmetros no próprio array; o grafo
+# da ida é refeito a cada lote, então só os parâmetros precisam ter o
+# gradiente zerado entre um passo e outro.
+
+
+class SGD:
+    """Descida do gradiente estocástica, com momento opcional.
+
+    Args:
+      parametros: lista de `ValorTensor` a otimizar (ex.: `modelo.parametros()`).
+      taxa: taxa de aprendizado.
+      momento: fração da atualização anterior somada à atual (0 desliga).
+    """
+
+    def __init__(self, parametros, taxa=0.01, momento=0.0):
+        self.parametros = list(parametros)
+        self.taxa = taxa
+        self.momento = momento
+        self.velocidades = [np.zeros_like(p.data) for p in self.parametros]
+
+    def zera_grad(self):
+        for p in self.parametros:
+            p.grad = 0.0
+
+    def passo(self):
+        for p, velocidade in zip(self.parametros, self.velocidades):
+            if self.momento:
+                velocidade *= self.momento
+                velocidade -= self.taxa * p.grad
+                p.data += velocidade
+            else:
+                p.data -= self.taxa * p.grad
+
+
+class Adam:
+    """Otimizador Adam (Kingma e Ba, 2014).
+
+    Args:
+      parametros: lista de `ValorTensor` a otimizar (ex.: `modelo.parametros()`).
+      taxa: taxa de aprendizado.
+      beta1: decaimento da média dos gradientes.
+      beta2: decaimento da média dos quadrados dos gradientes.
+      eps: termo que evita a divisão por zero.
+    """
+
+    def __init__(self, parametros, taxa=0.001, beta1=0.9, beta2=0.999, eps=1e-8):
+        self.parametros = list(parametros)
+        self.taxa = taxa
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.t = 0
+        self.m = [np.zeros_like(p.data) for p in self.parametros]
+        self.v = [np.zeros_like(p.data) for p in self.parametros]
+
+    def zera_grad(self):
+        for p in self.parametros:
+            p.grad = 0.0
+
+    def passo(self):
+        self.t += 1
+        correcao1 = 1 - self.beta1**self.t
+        correcao2 = 1 - self.beta2**self.t
+        taxa = self.taxa * math.sqrt(correcao2) / correcao1
+        for p, m, v in zip(self.parametros, self.m, self.v):
+            grad = p.grad
+            m *= self.beta1
+            m += (1 - self.beta1) * grad
+            v *= self.beta2
+            v += (1 - self.beta2) * np.square(grad)
+            p.data -= taxa * m / (np.sqrt(v) + self.eps)
+
+
+###############################################################################
+#                                   Dados                                     #
+###############################################################################
+
+
+class CarregadorDeDados:
+    """Percorre um conjunto de dados em lotes, em ordem aleatória a cada época.
+
+    `x` e `y` podem ser arrays na memória ou mapeados do disco
+    (`np.load(caminho, mmap_mode="r")`, ou `CarregadorDeDados.de_arquivos`):
+    só as linhas de um lote são lidas e copiadas de cada vez. Os índices de
+    cada lote são ordenados antes da leitura, o que deixa o acesso ao disco
+    mais sequencial sem mudar o conteúdo do lote.
+
+    Exemplo:
+      carregador = CarregadorDeDados(x, y, tamanho_lote=64, semente=0)
+      for x_lote, y_lote in carregador:
+          ...
+
+    Args:
+      x: array de entradas, com uma amostra por linha.
+      y: array de alvos, com o mesmo número de linhas de `x`.
+      tamanho_lote: número de amostras por lote.
+      embaralha: sorteia uma nova ordem das amostras a cada época.
+      descarta_ultimo: descarta o último lote quando ele é incompleto.
+      semente: semente do embaralhamento.
+      dtype: tipo dos arrays entregues (None mantém o tipo original).
+    """
+
+    def __init__(self, x, y, tamanho_lote=32, embaralha=True, descarta_ultimo=False, semente=None, dtype=float):
+        if len(x) != len(y):
+            raise ValueError(f"x e y têm números de amostras diferentes ({len(x)} e {len(y)})")
+        self.x = x
+        self.y = y
+        self.tamanho_lote = tamanho_lote
+        self.embaralha = embaralha
+        self.descarta_ultimo = descarta_ultimo
+        self.dtype = dtype
+        self.rng = np.random.default_rng(semente)
+
+    @classmethod
+    def de_arquivos(cls, caminho_x, caminho_y, **kwargs):
+        """Cria um carregador que lê os lotes de dois arquivos .npy mapeados na memória."""
+        x = np.load(caminho_x, mmap_mode="r")
+        y = np.load(caminho_y, mmap_mode="r")
+        return cls(x, y, **kwargs)
+
+    @property
+    def num_amostras(self):
+        return len(self.x)
+
+    def __len__(self):
+        if self.descarta_ultimo:
+            return self.num_amostras // self.tamanho_lote
+        return -(-self.num_amostras // self.tamanho_lote)
+
+    def __iter__(self):
+        n = self.num_amostras
+        if self.embaralha:
+            ordem = self.rng.permutation(n)
+        for lote in range(len(self)):
+            inicio = lote * self.tamanho_lote
+            fim = min(inicio + self.tamanho_lote, n)
+            if self.embaralha:
+                indices = np.sort(ordem[inicio:fim])
+                x_lote, y_lote = self.x[indices], self.y[indices]
+            else:
+                x_lote, y_lote = self.x[inicio:fim], self.y[inicio:fim]
+            yield np.asarray(x_lote, dtype=self.dtype), np.asarray(y_lote, dtype=self.dtype)
@@ -1,57 +1,292 @@
+import time
+from collections import deque
+
+import numpy as np
 from graphviz import Digraph
 
 
 def _tracar(raiz):
     """Função originalmente criada por Andrej Karpathy para construção de grafo.
 
+    Percorre o grafo com uma pilha explícita no lugar da recursão original,
+    então funciona em grafos de qualquer profundidade.
+
     Referência: https://github.com/karpathy/micrograd
     """
 
     vertices, arestas = set(), set()
+    pilha = [raiz]
 
-    def construir(v):
-        if v not in vertices:
-            vertices.add(v)
-            for progenitor in v.progenitor:
-                arestas.add((progenitor, v))
-                construir(progenitor)
+    while pilha:
+        v = pilha.pop()
+        if v in vertices:
+            continue
+        vertices.add(v)
+        for progenitor in v.progenitor:
+            arestas.add((progenitor, v))
+            if progenitor not in vertices:
+                pilha.append(progenitor)
 
-    construir(raiz)
     return vertices, arestas
 
 
-def plota_grafo(raiz):
+def _formata(numero):
+    """Formata um número (ou o tamanho de um array) para o rótulo de um vértice."""
+    forma = getattr(numero, "shape", ())
+    if forma:
+        return "shape %s" % (forma,)
+    return "%.4f" % numero
+
+
+def _rotulo_do_vertice(v):
+    # fmt: off
+    if hasattr(v, "rotulo") and (hasattr(v, "grad")):
+        return "{ %s | data %s | grad %s }" % (v.rotulo, _formata(v.data), _formata(v.grad))
+    elif hasattr(v, "rotulo"):
+        return "{ %s | data %s }" % (v.rotulo, _formata(v.data))
+    else:
+        return "{ data %s }" % _formata(v.data)
+    # fmt: on
+
+
+def _grupo_do_vertice(v, prefixos):
+    """Prefixo de `prefixos` com que o rótulo de `v` começa (ou None)."""
+    rotulo = getattr(v, "rotulo", "")
+    if rotulo:
+        for prefixo in prefixos:
+            if rotulo.startswith(prefixo):
+                return prefixo
+    return None
+
+
+def _instrucoes_do_grafo(raiz, max_vertices, profundidade_maxima, agrupa_rotulos):
+    """Percorre o grafo e gera as instruções para desenhá-lo.
+
+    O grafo é percorrido em largura a partir da raiz. Um vértice é desenhado
+    se estiver a no máximo `profundidade_maxima` passos da raiz e se ainda
+    houver espaço em `max_vertices`; um grupo de `agrupa_rotulos` ocupa um
+    único vértice. Os vértices que ficaram de fora são contados e resumidos
+    em um vértice "… N vértices" ligado ao vértice desenhado que leva até
+    eles.
+
+    Yields:
+      Tuplas ("vertice", nome, atributos) e ("aresta", origem, destino).
+    """
+    sem_limite = float("inf")
+    max_vertices = sem_limite if max_vertices is None else max_vertices
+    profundidade_maxima = sem_limite if profundidade_maxima is None else profundidade_maxima
+
+    # nome do vértice desenhado que representa cada vértice visitado
+    # (None para os que ficaram de fora)
+    desenhado = {raiz: None}
+    membros_do_grupo = {}
+    ocultos_por_dono = {}
+    num_desenhados = 0
+
+    def descobre(v, profundidade):
+        nonlocal num_desenhados
+        grupo = _grupo_do_vertice(v, agrupa_rotulos)
+        if grupo is not None and grupo in membros_do_grupo:
+            membros_do_grupo[grupo] += 1
+            desenhado[v] = "grupo " + grupo
+        elif profundidade <= profundidade_maxima and num_desenhados < max_vertices:
+            num_desenhados += 1
+            if grupo is not None:
+                membros_do_grupo[grupo] = 1
+                desenhado[v] = "grupo " + grupo
+            else:
+                desenhado[v] = str(id(v))
+                return True
+        else:
+            desenhado[v] = None
+        return False
+
+    fila = deque()
+    if descobre(raiz, 0):
+        yield from _instrucoes_do_vertice(raiz)
+    fila.append((raiz, 0))
+
+    arestas_de_grupos = set()
+    while fila:
+        v, profundidade = fila.popleft()
+        nome = desenhado[v]
+        if nome is None:
+            continue
+        destino = nome if nome.startswith("grupo ") else nome + v.operador_mae
+        for progenitor in v.progenitor:
+            if progenitor not in desenhado:
+                if descobre(progenitor, profundidade + 1):
+                    yield from _instrucoes_do_vertice(progenitor)
+                fila.append((progenitor, profundidade + 1))
+            origem = desenhado[progenitor]
+            if origem is None:
+                ocultos_por_dono.setdefault(destino, []).append(progenitor)
+            elif origem == nome:
+                continue  # aresta dentro de um grupo
+            elif origem.startswith("grupo ") or nome.startswith("grupo "):
+                if (origem, destino) not in arestas_de_grupos:
+                    arestas_de_grupos.add((origem, destino))
+                    yield ("aresta", origem, destino)
+            else:
+                yield ("aresta", origem, destino)
+
+    for grupo, quantidade in membros_do_grupo.items():
+        atributos = {"label": "%s (%d vértices)" % (grupo, quantidade), "shape": "box3d"}
+        yield ("vertice", "grupo " + grupo, atributos)
+
+    # conta os vértices ocultos, atribuindo cada um ao primeiro vértice
+    # desenhado que chega até ele
+    fila = deque()
+    for dono, ocultos in ocultos_por_dono.items():
+        for v in ocultos:
+            if v in desenhado and desenhado[v] is None:
+                desenhado[v] = dono
+                fila.append(v)
+    contagem = dict.fromkeys(ocultos_por_dono, 0)
+    while fila:
+        v = fila.popleft()
+        contagem[desenhado[v]] += 1
+        for progenitor in v.progenitor:
+            if desenhado.get(progenitor) is None:
+                desenhado[progenitor] = desenhado[v]
+                fila.append(progenitor)
+
+    for dono, quantidade in contagem.items():
+        if quantidade:
+            resumo = dono + " ocultos"
+            atributos = {"label": "… %d vértice%s" % (quantidade, "s" * (quantidade > 1)), "shape": "note", "style": "dashed"}
+            yield ("vertice", resumo, atributos)
+            yield ("aresta", resumo, dono)
+
+
+def _instrucoes_do_vertice(v):
+    """Instruções que desenham um vértice e o vértice da sua operação."""
+    uid = str(id(v))
+    yield ("vertice", uid, {"label": _rotulo_do_vertice(v), "shape": "record"})
+    if v.operador_mae:
+        yield ("vertice", uid + v.operador_mae, {"label": v.operador_mae})
+        yield ("aresta", uid + v.operador_mae, uid)
+
+
+def _aspas(texto):
+    return '"%s"' % texto.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def plota_grafo(raiz, max_vertices=None, profundidade_maxima=None, agrupa_rotulos=(), arquivo=None):
     """Função originalmente criada por Andrej Karpathy para construção de grafo.
 
+    Para grafos grandes, o desenho pode ser limitado: os vértices que ficam
+    de fora são resumidos em vértices "… N vértices".
+
+    Args:
+      raiz: vértice final do grafo.
+      max_vertices: número máximo de vértices desenhados (os mais próximos
+        da raiz). None para desenhar todos.
+      profundidade_maxima: distância máxima da raiz dos vértices desenhados.
+        None para não limitar.
+      agrupa_rotulos: prefixos de rótulo; todos os vértices cujo rótulo
+        começa com um mesmo prefixo viram um único vértice.
+      arquivo: caminho de um arquivo .dot. Quando informado, o DOT é escrito
+        no arquivo enquanto o grafo é percorrido, sem montar o `Digraph` na
+        memória (para renderizar: `dot -Tsvg arquivo.dot -o grafo.svg`).
+
+    Returns:
+      O `Digraph` do graphviz ou, quando `arquivo` é informado, o caminho do
+      arquivo escrito.
+
     Referência: https://github.com/karpathy/micrograd
     """
 
-    grafo = Digraph(format="svg", graph_attr={"rankdir": "LR"})
-    vertices, arestas = _tracar(raiz)
+    instrucoes = _instrucoes_do_grafo(raiz, max_vertices, profundidade_maxima, tuple(agrupa_rotulos))
 
-    for v in vertices:
-        uid = str(id(v))
+    if arquivo is not None:
+        with open(arquivo, "w") as saida:
+            saida.write("digraph {\n\tgraph [rankdir=LR]\n")
+            for instrucao in instrucoes:
+                if instrucao[0] == "vertice":
+                    _, nome, atributos = instrucao
+                    lista = " ".join("%s=%s" % (chave, _aspas(valor)) for chave, valor in atributos.items())
+                    saida.write("\t%s [%s]\n" % (_aspas(nome), lista))
+                else:
+                    _, origem, destino = instrucao
+                    saida.write("\t%s -> %s\n" % (_aspas(origem), _aspas(destino)))
+            saida.write("}\n")
+        return arquivo
 
-        # fmt: off
-        if hasattr(v, "rotulo") and (hasattr(v, "grad")):
-            label="{ %s | data %.4f | grad %.4f }" % (v.rotulo, v.data, v.grad)
-        elif hasattr(v, "rotulo"):
-            label="{ %s | data %.4f }" % (v.rotulo, v.data)
+    grafo = Digraph(format="svg", graph_attr={"rankdir": "LR"})
+    for instrucao in instrucoes:
+        if instrucao[0] == "vertice":
+            _, nome, atributos = instrucao
+            grafo.node(name=nome, **atributos)
         else:
-            label="{ data %.4f }" % (v.data)
-        # fmt: on
+            _, origem, destino = instrucao
+            grafo.edge(origem, destino)
 
-        grafo.node(
-            name=uid,
-            label=label,
-            shape="record",
-        )
+    return grafo
 
-        if v.operador_mae:
-            grafo.node(name=uid + v.operador_mae, label=v.operador_mae)
-            grafo.edge(uid + v.operador_mae, uid)
 
-    for n1, n2 in arestas:
-        grafo.edge(str(id(n1)), str(id(n2)) + n2.operador_mae)
+###############################################################################
+#                                Treinamento                                  #
+###############################################################################
 
-    return grafo
+
+def erro_quadratico_medio(previsto, alvo):
+    """Média de (previsto - alvo)², com `alvo` ajustado à forma de `previsto`."""
+    alvo = np.asarray(alvo).reshape(previsto.shape)
+    return ((previsto - alvo) ** 2).media()
+
+
+def entropia_cruzada_binaria(previsto, alvo, eps=1e-12):
+    """Entropia cruzada média entre probabilidades previstas (ex.: saída sigmoide) e alvos 0/1."""
+    alvo = np.asarray(alvo).reshape(previsto.shape)
+    return -(alvo * (previsto + eps).log() + (1 - alvo) * (1 - previsto + eps).log()).media()
+
+
+def treina(modelo, carregador, otimizador, funcao_perda=erro_quadratico_medio, num_epocas=10, verboso=True):
+    """Treina `modelo` por `num_epocas` épocas, um lote por passo do otimizador.
+
+    Cada lote passa pela rede de uma vez só: a ida e a retropropagação são
+    operações sobre a matriz do lote inteiro.
+
+    Args:
+      modelo: objeto chamável com os lotes de entrada (ex.: `MLP`).
+      carregador: iterável de pares (x_lote, y_lote) (ex.: `CarregadorDeDados`).
+      otimizador: objeto com `zera_grad()` e `passo()` (ex.: `SGD`, `Adam`).
+      funcao_perda: função (previsto, alvo) -> `ValorTensor` escalar.
+      num_epocas: número de passagens pelo conjunto de dados.
+      verboso: imprime a perda média e a vazão de cada época.
+
+    Returns:
+      Lista com um dicionário por época: epoca, perda (média das amostras),
+      amostras, tempo (segundos) e amostras_por_segundo.
+    """
+
+    historico = []
+    for epoca in range(1, num_epocas + 1):
+        soma_perdas = 0.0
+        amostras = 0
+        inicio = time.perf_counter()
+        for x_lote, y_lote in carregador:
+            perda = funcao_perda(modelo(x_lote), y_lote)
+            otimizador.zera_grad()
+            perda.propagar_tudo()
+            otimizador.passo()
+            soma_perdas += float(perda.data) * len(x_lote)
+            amostras += len(x_lote)
+        tempo = time.perf_counter() - inicio
+
+        registro = {
+            "epoca": epoca,
+            "perda": soma_perdas / max(amostras, 1),
+            "amostras": amostras,
+            "tempo": tempo,
+            "amostras_por_segundo": amostras / tempo if tempo > 0 else float("inf"),
+        }
+        historico.append(registro)
+        if verboso:
+            print(
+                f"Época {epoca}/{num_epocas} | perda {registro['perda']:.6f} | "
+                f"{registro['amostras_por_segundo']:,.0f} amostras/s"
+            )
+
+    return historico